@@ -0,0 +1,292 @@
+"""Reproducible benchmarks for the calculation core, batch modes, GUI rendering and startup
+
+    python benchmarks.py -o bench.json
+    python benchmarks.py --compare bench.json
+
+Every input set is generated from a fixed seed, so runs of different versions
+measure the same work. Results are JSON; --compare prints the change against
+an earlier run.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from wage_batch import calculate_batch
+from wage_bulk import calculate_columns, read_records, write_columns
+from wage_cache import ResultCache
+from wage_core import PAY_FREQUENCIES, WageInputs, calculate
+
+SEED = 20260131
+SCALAR_RECORDS = 1000
+BATCH_ROWS = 1_000_000
+BULK_ROWS = 50_000
+
+# one fixed input set per commute mode
+MODES = {
+    'car': {'transport_type': 'car'},
+    'ev': {'transport_type': 'ev'},
+    'public_daily_fare': {'transport_type': 'public', 'use_monthly_pass': False},
+    'public_monthly_pass': {'transport_type': 'public', 'use_monthly_pass': True},
+    'biking': {'transport_type': 'biking'},
+    'walking': {'transport_type': 'walking'},
+}
+
+
+def synthetic_columns(mode, rows, seed=SEED):
+    """Column arrays for one commute mode, the same every run"""
+    rng = np.random.default_rng(seed)
+    columns = {
+        'paycheck': rng.uniform(400, 6000, rows).round(2),
+        'pay_frequency': rng.integers(0, 5, rows),
+        'daily_hours': rng.uniform(4, 12, rows).round(1),
+        'work_days': rng.integers(1, 8, rows).astype(float),
+        'commute_minutes': rng.uniform(0, 120, rows).round(),
+        'daily_miles': rng.uniform(0, 60, rows).round(1),
+        'gas_mileage': rng.uniform(12, 55, rows).round(1),
+        'gas_price': rng.uniform(2.5, 6, rows).round(2),
+        'ev_efficiency': rng.uniform(2.5, 5, rows).round(1),
+        'electricity_price': rng.uniform(0.08, 0.45, rows).round(2),
+        'daily_public_cost': rng.uniform(2, 15, rows).round(2),
+        'monthly_pass_cost': rng.uniform(50, 300, rows).round(2),
+        'walking_minutes': rng.uniform(0, 30, rows).round(),
+        'daily_other_costs': rng.uniform(0, 25, rows).round(2),
+    }
+    columns.update(MODES[mode])
+    return columns
+
+
+def synthetic_inputs(mode, count, seed=SEED):
+    """The same data as synthetic_columns() as a list of WageInputs"""
+    columns = synthetic_columns(mode, count, seed)
+    records = []
+    for i in range(count):
+        record = {name: (value[i] if np.ndim(value) else value) for name, value in columns.items()}
+        record['pay_frequency'] = PAY_FREQUENCIES[record['pay_frequency']]
+        records.append(WageInputs(**{name: value.item() if hasattr(value, 'item') else value
+                                     for name, value in record.items()}))
+    return records
+
+
+def measure(function, units=1, min_time=0.2, repeat=3):
+    """Best units-per-second over a few rounds, each round runs for at least min_time"""
+    best = 0.0
+    for _ in range(repeat):
+        calls = 0
+        started = time.perf_counter()
+        while True:
+            function()
+            calls += 1
+            elapsed = time.perf_counter() - started
+            if elapsed >= min_time:
+                break
+        best = max(best, calls * units / elapsed)
+    return best
+
+
+def bench_core(modes):
+    results = {}
+    for mode in modes:
+        inputs = synthetic_inputs(mode, SCALAR_RECORDS)
+        cache = ResultCache(maxsize=len(inputs))
+
+        def plain():
+            for record in inputs:
+                calculate(record)
+
+        def cached():
+            for record in inputs:
+                cache.calculate(record)
+
+        results[mode] = {
+            'ops_per_sec': round(measure(plain, len(inputs))),
+            'cached_ops_per_sec': round(measure(cached, len(inputs))),
+        }
+    return results
+
+
+def bench_batch(modes, rows=BATCH_ROWS):
+    results = {}
+    for mode in modes:
+        columns = synthetic_columns(mode, rows)
+        results[mode] = {'rows_per_sec': round(measure(lambda: calculate_batch(**columns), rows, repeat=2))}
+    return results
+
+
+def bench_bulk(mode='car', rows=BULK_ROWS, workers=1):
+    """CSV in, CSV out through the streaming pipeline, all in memory"""
+    columns = synthetic_columns(mode, rows)
+    columns['pay_frequency'] = np.array(PAY_FREQUENCIES)[columns['pay_frequency']]
+    source = io.StringIO()
+    write_columns(source, [{name: np.broadcast_to(value, rows) for name, value in columns.items()}], 'csv')
+    text = source.getvalue()
+
+    def run():
+        target = io.StringIO()
+        write_columns(target, calculate_columns(read_records(io.StringIO(text), 'csv'), workers=workers), 'csv')
+
+    return {'rows': rows, 'workers': workers, 'rows_per_sec': round(measure(run, rows, min_time=0, repeat=2))}
+
+
+def bench_gui_render(modes, renders=50):
+    """ms per results tab update, needs a display"""
+    try:
+        import tkinter as tk
+        from wage_calc_gui import TrueHourlyWageCalculator
+        root = tk.Tk()
+    except Exception as e:  # no display, no tkinter
+        return {'skipped': str(e)}
+
+    try:
+        root.withdraw()
+        app = TrueHourlyWageCalculator(root, cache_size=0)
+        results = {}
+        for mode in modes:
+            inputs = synthetic_inputs(mode, renders)
+
+            # the first render builds the chart, report it apart from steady state updates
+            started = time.perf_counter()
+            app.results = calculate(inputs[0])
+            app.display_results()
+            root.update_idletasks()
+            first = time.perf_counter() - started
+
+            started = time.perf_counter()
+            for record in inputs[1:]:
+                app.results = calculate(record)
+                app.display_results()
+                root.update_idletasks()
+            steady = (time.perf_counter() - started) / max(len(inputs) - 1, 1)
+            results[mode] = {'first_render_ms': round(first * 1000, 3), 'render_ms': round(steady * 1000, 3)}
+        return results
+    finally:
+        root.destroy()
+
+
+def bench_startup(runs=5):
+    """Cold start to first window, measured by the GUI's own startup benchmark"""
+    command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'wage_calc_gui.py'),
+               '--startup-benchmark', '--runs', str(runs)]
+    try:
+        output = subprocess.run(command, capture_output=True, text=True, check=True, timeout=300).stdout
+    except (subprocess.SubprocessError, OSError) as e:
+        return {'skipped': str(e).splitlines()[0] if str(e) else type(e).__name__}
+    report = json.loads(output)
+    report.pop('samples', None)
+    return report
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'commit': commit or None,
+        'seed': SEED,
+    }
+
+
+def run(sections, modes, workers):
+    report = {'environment': environment()}
+    if 'core' in sections:
+        report['core'] = bench_core(modes)
+    if 'batch' in sections:
+        report['batch'] = bench_batch(modes)
+    if 'bulk' in sections:
+        report['bulk'] = [bench_bulk(workers=1)]
+        if workers != 1:
+            report['bulk'].append(bench_bulk(workers=workers))
+    if 'gui' in sections:
+        report['gui'] = bench_gui_render(modes)
+    if 'startup' in sections:
+        report['startup'] = bench_startup()
+    return report
+
+
+def flatten(report, prefix=''):
+    """{'core.car.ops_per_sec': 123, ...} for every number in a report"""
+    flat = {}
+    items = enumerate(report) if isinstance(report, list) else report.items()
+    for key, value in items:
+        name = f"{prefix}{key}"
+        if isinstance(value, (dict, list)):
+            flat.update(flatten(value, name + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+RATE_SUFFIXES = ('_per_sec',)
+TIME_SUFFIXES = ('_ms', '_sec', '_seconds')
+
+
+def direction(name):
+    """1 if higher is better for a metric, -1 if lower is, 0 for counts and sizes
+
+    A unit can sit on a parent key, as in startup.time_to_first_window_ms.median.
+    """
+    parts = name.split('.')
+    if any(part.endswith(RATE_SUFFIXES) for part in parts):
+        return 1
+    if any(part.endswith(TIME_SUFFIXES) for part in parts):
+        return -1
+    return 0
+
+
+def compare(old, new):
+    """Lines showing the change of every shared metric"""
+    old_flat, new_flat = flatten(old), flatten(new)
+    lines = []
+    for name in sorted(set(old_flat) & set(new_flat)):
+        if name.startswith('environment.'):
+            continue
+        before, after = old_flat[name], new_flat[name]
+        change = (after - before) / before * 100 if before else 0.0
+        # only rates and times are marked, a changed count or size is neither better nor worse
+        gain = change * direction(name)
+        mark = '' if abs(change) < 5 or not gain else (' (better)' if gain > 0 else ' (WORSE)')
+        lines.append(f"{name:55} {before:>14,.2f} -> {after:>14,.2f} {change:+7.1f}%{mark}")
+    return lines
+
+
+SECTIONS = ('core', 'batch', 'bulk', 'gui', 'startup')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the true wage calculator")
+    parser.add_argument('--only', nargs='+', choices=SECTIONS, default=list(SECTIONS), metavar='SECTION',
+                        help=f"What to benchmark: {', '.join(SECTIONS)} (default: everything)")
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    parser.add_argument('--workers', type=int, default=0, help="Processes for the parallel bulk run, 0 = every core")
+    parser.add_argument('-o', '--output', help="Write the JSON report here instead of stdout")
+    parser.add_argument('--compare', metavar='OLD_JSON', help="Print the change against an earlier report")
+    args = parser.parse_args(argv)
+
+    report = run(args.only, args.modes, args.workers or os.cpu_count() or 1)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            old = json.load(f)
+        print("\n".join(compare(old, report)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""calculate_batch() gives what calculate() gives, row by row"""
+import numpy as np
+import pytest
+
+from wage_batch import OUTPUT_FIELDS, calculate_batch
+from wage_core import PAY_FREQUENCIES, TRANSPORT_TYPES, WageInputs, calculate
+
+
+def random_columns(rows, seed):
+    rng = np.random.default_rng(seed)
+    return {
+        'paycheck': rng.uniform(200, 8000, rows),
+        'pay_frequency': rng.choice(PAY_FREQUENCIES, rows),
+        'daily_hours': rng.uniform(2, 12, rows),
+        'work_days': rng.uniform(1, 7, rows),
+        'commute_minutes': rng.uniform(0, 120, rows),
+        'transport_type': rng.choice(TRANSPORT_TYPES, rows),
+        'daily_miles': rng.uniform(0, 80, rows),
+        'gas_mileage': rng.uniform(10, 60, rows),
+        'gas_price': rng.uniform(2, 7, rows),
+        'ev_efficiency': rng.uniform(2, 5, rows),
+        'electricity_price': rng.uniform(0.05, 0.5, rows),
+        'daily_public_cost': rng.uniform(0, 20, rows),
+        'monthly_pass_cost': rng.uniform(0, 300, rows),
+        'use_monthly_pass': rng.random(rows) < 0.5,
+        'walking_minutes': rng.uniform(0, 30, rows),
+        'daily_other_costs': rng.uniform(0, 20, rows),
+    }
+
+
+def test_batch_matches_calculate():
+    columns = random_columns(500, seed=1)
+    batch = calculate_batch(**columns)
+    for row in range(len(batch)):
+        inputs = WageInputs(**{name: values[row].item() for name, values in columns.items()})
+        result = calculate(inputs)
+        for name in OUTPUT_FIELDS:
+            assert batch[name][row] == pytest.approx(getattr(result, name), rel=1e-9, abs=1e-9), (name, inputs)
+
+
+@pytest.mark.parametrize('transport_type', TRANSPORT_TYPES)
+def test_left_out_inputs_take_the_gui_defaults(transport_type):
+    batch = calculate_batch(paycheck=2000, transport_type=transport_type)
+    result = calculate(WageInputs(paycheck=2000, transport_type=transport_type))
+    assert float(batch['true_wage']) == pytest.approx(result.true_wage)
@@ -0,0 +1,41 @@
+"""Bulk output keeps its inputs, so a results file can be fed back in"""
+import csv
+
+from wage_bulk import run_bulk
+from wage_core import WageInputs, calculate
+
+ROWS = [
+    {'paycheck': '2000', 'transport_type': 'public', 'commute_minutes': '45', 'walking_minutes': '10'},
+    {'paycheck': '3000', 'pay_frequency': 'monthly', 'transport_type': 'car', 'daily_miles': '25'},
+]
+
+
+def read(path):
+    """Rows with numbers as floats, '8' and '8.0' are the same input"""
+    def value(text):
+        try:
+            return float(text)
+        except ValueError:
+            return text
+
+    with open(path, newline='') as source:
+        return [{name: value(text) for name, text in row.items()} for row in csv.DictReader(source)]
+
+
+def test_results_sit_next_to_unchanged_inputs(tmp_path):
+    source = tmp_path / 'in.csv'
+    with open(source, 'w', newline='') as output:
+        writer = csv.DictWriter(output, ['paycheck', 'pay_frequency', 'transport_type', 'commute_minutes',
+                                         'daily_miles', 'walking_minutes'])
+        writer.writeheader()
+        writer.writerows(ROWS)
+    first, second = tmp_path / 'out1.csv', tmp_path / 'out2.csv'
+    assert run_bulk(str(source), str(first)) == 2
+    assert run_bulk(str(first), str(second)) == 2
+
+    rows = read(first)
+    assert rows[0]['commute_minutes'] == 45
+    assert rows[0]['one_way_minutes'] == 55
+    expected = calculate(WageInputs(paycheck=2000, transport_type='public', commute_minutes=45, walking_minutes=10))
+    assert rows[0]['true_wage'] == expected.true_wage
+    assert read(second) == rows
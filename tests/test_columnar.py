@@ -0,0 +1,43 @@
+"""Columnar files read back as written, and the results recalculate from the stored inputs"""
+import numpy as np
+import pytest
+
+from wage_batch import OUTPUT_FIELDS, calculate_batch
+from wage_bulk import run_bulk
+from wage_columnar import read_columns, read_results, write_results
+
+
+@pytest.fixture
+def batch():
+    return calculate_batch(paycheck=np.array([1500.0, 2000.0, 3000.0]), transport_type=['car', 'public', 'ev'],
+                           commute_minutes=np.array([20.0, 45.0, 60.0]), walking_minutes=10)
+
+
+def test_round_trip(tmp_path, batch):
+    path = str(tmp_path / 'results.tcol')
+    write_results(path, batch, metadata={'run': 1})
+    loaded = read_results(path, verify=True)
+    for name in OUTPUT_FIELDS:
+        np.testing.assert_array_equal(loaded[name], batch[name])
+    np.testing.assert_array_equal(loaded.inputs['commute_minutes'], [20.0, 45.0, 60.0])
+    assert list(read_columns(path, names=['transport_type'], decode=True)['transport_type']) == ['car', 'public', 'ev']
+
+
+def test_verify_catches_changed_results(tmp_path, batch):
+    path = str(tmp_path / 'results.tcol')
+    write_results(path, batch)
+    columns = dict(read_columns(path))
+    columns['true_wage'] = columns['true_wage'] + 1
+    write_results(path, columns)
+    with pytest.raises(ValueError, match='true_wage'):
+        read_results(path, verify=True)
+
+
+def test_bulk_output_verifies(tmp_path):
+    source = tmp_path / 'in.csv'
+    source.write_text("paycheck,transport_type,commute_minutes,walking_minutes\n2000,public,45,10\n3000,car,30,0\n")
+    path = str(tmp_path / 'out.tcol')
+    assert run_bulk(str(source), path) == 2
+    loaded = read_results(path, verify=True)
+    np.testing.assert_array_equal(loaded.inputs['commute_minutes'], [45.0, 30.0])
+    np.testing.assert_array_equal(loaded['commute_minutes'], [55.0, 30.0])
@@ -0,0 +1,55 @@
+"""Aggregators merged from parts report what one aggregator over everything reports"""
+import json
+
+import numpy as np
+import pytest
+
+from wage_batch import calculate_batch
+from wage_report import Aggregator, summarize
+
+
+@pytest.fixture(scope='module')
+def chunks():
+    rng = np.random.default_rng(7)
+    parts = []
+    for _ in range(4):
+        rows = 2000
+        parts.append(calculate_batch(paycheck=rng.uniform(500, 6000, rows),
+                                     transport_type=rng.choice(['car', 'public', 'biking'], rows),
+                                     commute_minutes=rng.uniform(5, 90, rows)))
+    return parts
+
+
+def test_merged_parts_match_one_pass(chunks):
+    whole = summarize(chunks, by='transport_type')
+    merged = summarize(chunks[:2], by='transport_type')
+    other = Aggregator.from_dict(json.loads(json.dumps(summarize(chunks[2:], by='transport_type').as_dict())))
+    merged.merge(other)
+    for expected, row in zip(whole.rows(), merged.rows()):
+        assert row.keys() == expected.keys()
+        for name, value in expected.items():
+            if isinstance(value, float):
+                assert row[name] == pytest.approx(value, rel=1e-9), name
+            else:
+                assert row[name] == value, name
+
+
+def test_percentiles_within_accuracy(chunks):
+    report = summarize(chunks)
+    wages = np.concatenate([chunk['true_wage'] for chunk in chunks])
+    row = report.rows()[0]
+    assert row['count'] == len(wages)
+    for q in (5, 50, 95):
+        assert row[f'true_wage_p{q}'] == pytest.approx(np.percentile(wages, q), rel=0.02)
+
+
+def test_counts_per_field_and_empty_fields():
+    report = Aggregator(by='transport_type', fields=('true_wage', 'extra'))
+    report.add({'transport_type': np.array(['car', 'car', 'public']),
+                'true_wage': np.array([10.0, np.nan, 20.0]), 'extra': np.array([np.nan, np.nan, 1.0])})
+    car, public = report.rows()
+    assert (car['count'], car['true_wage_count'], car['extra_count']) == (2, 1, 0)
+    assert car['extra_min'] is None and car['extra_p50'] is None
+    assert public['extra_min'] == 1.0
+    text = json.dumps(report.as_dict(), allow_nan=False)
+    assert Aggregator.from_dict(json.loads(text)).rows() == report.rows()
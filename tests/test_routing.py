@@ -0,0 +1,66 @@
+"""route_many() agrees with routing each pair on its own"""
+import csv
+
+import numpy as np
+import pytest
+
+from wage_routing import Router, haversine_miles, load_graph
+
+SIZE = 12
+STEP = 0.004
+
+
+def node(i, j):
+    # rounded, so both segments meeting at a corner name the same node
+    return round(40.7 + i * STEP, 6), round(-74.0 + j * STEP, 6)
+
+
+@pytest.fixture(scope='module')
+def graph(tmp_path_factory):
+    """A street grid with a faster avenue every fourth row and a one-way street every third column"""
+    path = tmp_path_factory.mktemp('roads') / 'grid.csv'
+    with open(path, 'w', newline='') as output:
+        writer = csv.writer(output)
+        writer.writerow(['from_lat', 'from_lon', 'to_lat', 'to_lon', 'highway', 'oneway'])
+        for i in range(SIZE):
+            for j in range(SIZE):
+                if j + 1 < SIZE:
+                    writer.writerow([*node(i, j), *node(i, j + 1), 'primary' if i % 4 == 0 else 'residential', ''])
+                if i + 1 < SIZE:
+                    writer.writerow([*node(i, j), *node(i + 1, j), 'residential', 'yes' if j % 3 == 0 else ''])
+    graph = load_graph(str(path))
+    assert len(graph) == SIZE * SIZE
+    return graph
+
+
+def points(count, seed):
+    rng = np.random.default_rng(seed)
+    return list(zip((40.7 + rng.uniform(0, STEP * (SIZE - 1), count)).tolist(),
+                    (-74.0 + rng.uniform(0, STEP * (SIZE - 1), count)).tolist()))
+
+
+@pytest.mark.parametrize('transport_type', ['car', 'biking', 'walking'])
+def test_route_many_matches_route(graph, transport_type):
+    offices = points(2, seed=1)
+    homes = points(30, seed=2)
+    pairs = [(home, offices[i % 2]) for i, home in enumerate(homes)]
+    together = Router(graph).route_many(pairs, transport_type)
+    alone = Router(graph)
+    for (origin, destination), route in zip(pairs, together):
+        single = alone.route(origin, destination, transport_type)
+        assert route.miles == pytest.approx(single.miles)
+        assert route.minutes == pytest.approx(single.minutes)
+
+
+def test_route_is_no_shorter_than_a_straight_line(graph):
+    router = Router(graph)
+    for origin, destination in zip(points(20, seed=3), points(20, seed=4)):
+        route = router.route(origin, destination)
+        assert route.miles >= haversine_miles(*origin, *destination) - 1e-9
+
+
+def test_points_off_the_map(graph):
+    router = Router(graph)
+    with pytest.raises(ValueError):
+        router.route((10.0, 10.0), (40.71, -73.99))
+    assert router.route_many([((10.0, 10.0), (40.71, -73.99))]) == [None]
@@ -0,0 +1,53 @@
+"""The HTTP service answers both endpoints alike and refuses bad requests"""
+import asyncio
+import json
+
+from wage_server import WageServer
+
+
+def run(check):
+    async def main():
+        server = await WageServer(port=0, workers=1).start()
+        try:
+            return await check(server)
+        finally:
+            await server.close()
+    return asyncio.run(main())
+
+
+def post(server, path, data):
+    return server.dispatch('POST', path, json.dumps(data).encode())
+
+
+def test_calculate_and_batch_give_the_same_row():
+    record = {'paycheck': 2000, 'transport_type': 'public', 'commute_minutes': 30}
+
+    async def check(server):
+        return await post(server, '/calculate', record), await post(server, '/batch', [record])
+
+    (status, single), (batch_status, batch) = run(check)
+    assert status == batch_status == 200
+    assert single == batch['results'][0]
+    assert (single['commute_minutes'], single['one_way_minutes']) == (30, 40)
+
+
+def test_bad_inputs_get_a_400():
+    async def check(server):
+        return [await post(server, '/calculate', {'paycheck': 2000, 'commute_minutes': 5000}),
+                await post(server, '/batch', [{'paycheck': 2000}, {'paycheck': 2000, 'daily_hours': 30}])]
+
+    for status, payload in run(check):
+        assert status == 400
+        assert 'must be' in payload['error']
+
+
+def test_negative_content_length():
+    async def check(server):
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.port)
+        writer.write(b"POST /calculate HTTP/1.1\r\nContent-Length: -5\r\n\r\n")
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+        return response
+
+    assert run(check).startswith(b"HTTP/1.1 400")
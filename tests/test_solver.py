@@ -0,0 +1,48 @@
+"""Solved inputs give back the target wage, within the input limits"""
+import math
+import warnings
+
+import numpy as np
+import pytest
+
+from wage_batch import calculate_batch
+from wage_core import WageInputs, calculate
+from wage_solver import break_even_table, solve, solve_for
+
+
+@pytest.mark.parametrize('parameter, target', [
+    ('paycheck', 25.0), ('commute_minutes', 21.0), ('gas_price', 20.0), ('gas_mileage', 21.0),
+    ('daily_other_costs', 21.0),
+])
+def test_solution_reaches_target(parameter, target):
+    inputs = WageInputs(paycheck=2000, commute_minutes=30)
+    value = solve_for(inputs, parameter, target)
+    assert calculate(WageInputs(**dict(inputs.as_dict(), **{parameter: value}))).true_wage == pytest.approx(target)
+
+
+def test_closed_form_matches_bisection():
+    columns = {'paycheck': np.array([1500.0, 2000.0, 3000.0]), 'daily_miles': 20}
+    targets = np.array([15.0, 20.0])[:, None]
+    closed = solve(targets, 'commute_minutes', **columns)
+    bisected = solve(targets, 'commute_minutes', method='bisect', **columns)
+    np.testing.assert_allclose(closed, bisected, rtol=1e-6)
+    reached = ~np.isnan(closed)
+    assert reached.any()
+    wages = calculate_batch(commute_minutes=np.where(reached, closed, 0), **columns)['true_wage']
+    np.testing.assert_allclose(wages[reached], np.broadcast_to(targets, closed.shape)[reached])
+
+
+def test_answers_outside_the_limits_are_nan():
+    columns = WageInputs(paycheck=2000, pay_frequency='weekly').as_dict()
+    # 30/h needs more than seven work days, 40/h is about five and a half
+    days = solve([30.0, 40.0], 'work_days', **columns)
+    assert math.isnan(days[0])
+    assert 5 < days[1] < 6
+
+
+def test_unused_parameter_warns():
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        table = break_even_table('gas_price', [20.0], paycheck=[2000.0], transport_type='biking')
+    assert np.isnan(table).all()
+    assert any(issubclass(warning.category, RuntimeWarning) for warning in caught)
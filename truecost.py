@@ -1,3 +1,15 @@
+import argparse
+import json
+import sys
+from dataclasses import replace
+
+from wage_bulk import DEFAULT_CHUNK_SIZE, INPUT_FORMATS, OUTPUT_FORMATS, run_bulk
+from wage_cache import TRANSPORT_FIELDS
+from wage_core import WageInputs, calculate, cost_breakdown, pay_description
+from wage_parallel import ThroughputReport, default_workers
+import wage_profile
+
+
 def validate_input(prompt, input_type=float, min_value=None, max_value=None, allow_zero=False):
     """Validate user input with optional range checking"""
     while True:
@@ -22,7 +34,7 @@ def validate_input(prompt, input_type=float, min_value=None, max_value=None, all
             print(f"Please enter a valid {input_type.__name__}")
 
 
-def calculate_true_hourly_wage():
+def calculate_true_hourly_wage(compare_modes=False):
     """Calculate true hourly wage - one time calculation"""
     print("\n" + "="*60)
     print("TRUE HOURLY WAGE CALCULATOR")
@@ -83,9 +95,11 @@ def calculate_true_hourly_wage():
     electricity_price = 0
     daily_public_transport_cost = 0
     monthly_pass_cost = 0
+    use_monthly_pass = False
+    daily_walking_minutes = 0
     
     if transport_choice == '2':  # Public Transport
-        transport_type = "public_transport"
+        transport_type = "public"
         print("\n--- Public Transport Details ---")
         print("Enter your public transport costs:")
         print("Option A: Daily cost")
@@ -99,20 +113,18 @@ def calculate_true_hourly_wage():
             )
             # No need for monthly pass cost
         else:
+            # daily cost is worked out from the pass by the calculation
+            use_monthly_pass = True
             monthly_pass_cost = validate_input(
                 "Monthly pass cost: $", 
                 float, min_value=0
             )
-            # Calculate daily cost from monthly pass
-            daily_public_transport_cost = monthly_pass_cost / (work_days_per_week * 4.33)  # Average weeks per month
         
         print("\n--- Additional Public Transport Details ---")
         daily_walking_minutes = validate_input(
             "Daily walking time to/from stations/stops (minutes): ", 
             float, min_value=0
         )
-        # Add walking time to commute time
-        daily_commute_minutes += daily_walking_minutes
         
     elif transport_choice == '3':  # EV
         transport_type = "ev"
@@ -146,106 +158,74 @@ def calculate_true_hourly_wage():
         print("Additional daily commuting costs (tolls, etc.)")
     daily_other_costs = validate_input("Additional daily commuting costs: $", float, min_value=0, allow_zero=True)
     
-    # Calculate annual income based on pay frequency
+    inputs = WageInputs(
+        paycheck=paycheck_amount,
+        pay_frequency=pay_frequency,
+        daily_hours=daily_work_hours,
+        work_days=work_days_per_week,
+        commute_minutes=daily_commute_minutes,
+        transport_type=transport_type,
+        daily_miles=daily_commute_miles,
+        gas_mileage=gas_mileage,
+        gas_price=gas_price,
+        ev_efficiency=ev_efficiency,
+        electricity_price=electricity_price,
+        daily_public_cost=daily_public_transport_cost,
+        monthly_pass_cost=monthly_pass_cost,
+        use_monthly_pass=use_monthly_pass,
+        walking_minutes=daily_walking_minutes,
+        daily_other_costs=daily_other_costs,
+    )
     print("\n" + "="*60)
-    
-    if pay_frequency == 'daily':
-        annual_income = paycheck_amount * work_days_per_week * 50
-        pay_description = f"${paycheck_amount:.2f} per day"
-    elif pay_frequency == 'weekly':
-        annual_income = paycheck_amount * 50
-        pay_description = f"${paycheck_amount:.2f} per week"
-    elif pay_frequency == 'biweekly':
-        annual_income = paycheck_amount * 26
-        pay_description = f"${paycheck_amount:.2f} bi-weekly"
-    elif pay_frequency == 'semi_monthly':
-        annual_income = paycheck_amount * 24
-        pay_description = f"${paycheck_amount:.2f} semi-monthly"
-    else:  # monthly
-        annual_income = paycheck_amount * 12
-        pay_description = f"${paycheck_amount:.2f} per month"
-    
-    # Calculate commute costs and time
-    daily_commute_hours = (daily_commute_minutes * 2) / 60  # Round trip
-    
-    # Calculate daily commute costs based on transport type
-    daily_commute_cost = 0
-    cost_details = ""
-    
-    if transport_type == "car":
-        round_trip_miles = daily_commute_miles * 2
-        if gas_mileage > 0:
-            daily_fuel_cost = (round_trip_miles / gas_mileage) * gas_price
-        daily_commute_cost = daily_fuel_cost + daily_other_costs
-        cost_details = f"Fuel: ${daily_fuel_cost:.2f}"
-        if daily_other_costs > 0:
-            cost_details += f" + Other: ${daily_other_costs:.2f}"
-        
-    elif transport_type == "ev":
-        round_trip_miles = daily_commute_miles * 2
-        if ev_efficiency > 0:
-            daily_electricity_cost = (round_trip_miles / ev_efficiency) * electricity_price
-        daily_commute_cost = daily_electricity_cost + daily_other_costs
-        cost_details = f"Electricity: ${daily_electricity_cost:.2f}"
-        if daily_other_costs > 0:
-            cost_details += f" + Other: ${daily_other_costs:.2f}"
-        
-    elif transport_type == "public_transport":
-        daily_commute_cost = daily_public_transport_cost + daily_other_costs
-        cost_details = f"Transport fare: ${daily_public_transport_cost:.2f}"
-        if monthly_pass_cost > 0:
-            cost_details += f" (from ${monthly_pass_cost:.2f}/month pass)"
-        if daily_other_costs > 0:
-            cost_details += f" + Other: ${daily_other_costs:.2f}"
-    
-    elif transport_type == "biking":
-        daily_commute_cost = daily_other_costs
-        cost_details = "No fuel/transportation costs"
-        if daily_other_costs > 0:
-            cost_details = f"Maintenance/gear: ${daily_other_costs:.2f}"
-    
-    elif transport_type == "walking":
-        daily_commute_cost = daily_other_costs
-        cost_details = "No fuel/transportation costs"
-        if daily_other_costs > 0:
-            cost_details = f"Gear/other: ${daily_other_costs:.2f}"
-    
-    # Yearly calculations
-    weekly_work_hours = daily_work_hours * work_days_per_week
-    weekly_commute_hours = daily_commute_hours * work_days_per_week
-    weekly_commute_costs = daily_commute_cost * work_days_per_week
-    
-    work_weeks_per_year = 50
-    yearly_work_hours = weekly_work_hours * work_weeks_per_year
-    yearly_commute_hours = weekly_commute_hours * work_weeks_per_year
-    yearly_commute_costs = weekly_commute_costs * work_weeks_per_year
-    
-    # Wage calculations
-    if yearly_work_hours > 0:
-        traditional_wage = annual_income / yearly_work_hours
-    else:
-        traditional_wage = 0
-    
-    net_yearly_income = annual_income - yearly_commute_costs
-    total_committed_hours = yearly_work_hours + yearly_commute_hours
-    
-    if total_committed_hours > 0:
-        true_wage = net_yearly_income / total_committed_hours
-    else:
-        true_wage = 0
+    result = calculate(inputs)
+    print_results(result)
+    if compare_modes:
+        print_comparison(inputs)
+    return result.true_wage
+
+
+def print_comparison(inputs):
+    """Rank every transport option for the same person"""
+    from wage_compare import compare  # numpy is only needed when comparing
+
+    # only the chosen mode's details were asked for, the other modes get the defaults
+    entered = set(TRANSPORT_FIELDS[inputs.transport_type])
+    if inputs.transport_type == 'public':
+        entered.discard('monthly_pass_cost' if not inputs.use_monthly_pass else 'daily_public_cost')
+    defaults = WageInputs()
+    others = {name: getattr(defaults, name) for names in TRANSPORT_FIELDS.values() for name in names
+              if name not in entered and name != 'use_monthly_pass'}
+
+    print(f"\n" + "-"*60)
+    print("TRANSPORT OPTIONS (default costs for details you didn't enter)")
+    print("-"*60)
+    print(compare(replace(inputs, **others)).table())
+
+
+def print_results(result):
+    """Print the full report for one calculation result"""
+    inputs = result.inputs
+    transport_type = inputs.transport_type
+    pay_frequency = inputs.pay_frequency
+    paycheck_amount = inputs.paycheck
+    work_days_per_week = inputs.work_days
+    daily_commute_hours = result.daily_commute_hours
+    daily_commute_cost = result.daily_commute_cost
+    traditional_wage = result.traditional_wage
+    true_wage = result.true_wage
     
     # Display results
     print("\n" + "="*60)
     print("RESULTS")
     print("="*60)
-    print(f"Pay Frequency: {pay_description}")
+    print(f"Pay Frequency: {pay_description(inputs)}")
     
     # Display transport type
     if transport_type == "car":
         print(f"Transportation: Driving (Gas Vehicle)")
     elif transport_type == "ev":
         print(f"Transportation: Electric Vehicle")
-    elif transport_type == "public_transport":
+    elif transport_type == "public":
         print(f"Transportation: Public Transport")
     elif transport_type == "biking":
         print(f"Transportation: Biking")
@@ -262,39 +242,38 @@ def calculate_true_hourly_wage():
     print(f"\n" + "-"*60)
     print("TIME BREAKDOWN")
     print("-"*60)
-    print(f"Work hours per day: {daily_work_hours} hours")
+    print(f"Work hours per day: {inputs.daily_hours} hours")
     print(f"Work days per week: {work_days_per_week} days")
-    print(f"Daily commute time: {daily_commute_hours:.1f} hours ({daily_commute_minutes*2:.0f} min total)")
-    print(f"Weekly work hours: {weekly_work_hours:.1f} hours")
-    print(f"Weekly commute hours: {weekly_commute_hours:.1f} hours")
-    print(f"Yearly work hours: {yearly_work_hours:.0f} hours")
-    print(f"Yearly commute hours: {yearly_commute_hours:.0f} hours")
-    print(f"Total committed time per year: {total_committed_hours:.0f} hours")
+    print(f"Daily commute time: {daily_commute_hours:.1f} hours ({result.commute_minutes*2:.0f} min total)")
+    print(f"Weekly work hours: {result.weekly_work_hours:.1f} hours")
+    print(f"Weekly commute hours: {result.weekly_commute_hours:.1f} hours")
+    print(f"Yearly work hours: {result.yearly_work_hours:.0f} hours")
+    print(f"Yearly commute hours: {result.yearly_commute_hours:.0f} hours")
+    print(f"Total committed time per year: {result.total_committed_hours:.0f} hours")
     
     print(f"\n" + "-"*60)
     print("COST BREAKDOWN")
     print("-"*60)
     
     if transport_type in ["car", "ev", "biking", "walking"]:
-        round_trip_miles = daily_commute_miles * 2
+        round_trip_miles = inputs.daily_miles * 2
         print(f"Round trip distance: {round_trip_miles:.1f} miles")
         
         if transport_type == "car":
-            print(f"Vehicle efficiency: {gas_mileage:.1f} MPG")
-            print(f"Gas price: ${gas_price:.2f} per gallon")
+            print(f"Vehicle efficiency: {inputs.gas_mileage:.1f} MPG")
+            print(f"Gas price: ${inputs.gas_price:.2f} per gallon")
         elif transport_type == "ev":
-            print(f"Vehicle efficiency: {ev_efficiency:.1f} mi/kWh")
-            print(f"Electricity price: ${electricity_price:.2f} per kWh")
+            print(f"Vehicle efficiency: {inputs.ev_efficiency:.1f} mi/kWh")
+            print(f"Electricity price: ${inputs.electricity_price:.2f} per kWh")
     
-    print(f"Daily commute cost breakdown: {cost_details}")
+    print(f"Daily commute cost breakdown: {cost_breakdown(result)}")
     print(f"Total daily commute cost: ${daily_commute_cost:.2f}")
-    print(f"Yearly commute cost: ${yearly_commute_costs:,.2f}")
-    print(f"Yearly take-home pay: ${annual_income:,.2f}")
-    print(f"Yearly disposable income (after commute): ${net_yearly_income:,.2f}")
+    print(f"Yearly commute cost: ${result.yearly_commute_costs:,.2f}")
+    print(f"Yearly take-home pay: ${result.annual_income:,.2f}")
+    print(f"Yearly disposable income (after commute): ${result.net_yearly_income:,.2f}")
     
-    if annual_income > 0:
-        cost_percentage = (yearly_commute_costs / annual_income) * 100
-        print(f"\nCommute costs consume {cost_percentage:.1f}% of your take-home pay")
+    if result.annual_income > 0:
+        print(f"\nCommute costs consume {result.commute_cost_percentage:.1f}% of your take-home pay")
     
     # Per paycheck perspective for common frequencies
     print(f"\n" + "-"*60)
@@ -313,7 +292,6 @@ def calculate_true_hourly_wage():
     
     elif pay_frequency == 'weekly':
         weekly_commute_cost = daily_commute_cost * work_days_per_week
-        weekly_commute_hours = daily_commute_hours * work_days_per_week
         print(f"Per Weekly Paycheck:")
         print(f"  Take-home: ${paycheck_amount:.2f}")
         print(f"  Commute costs: ${weekly_commute_cost:.2f}")
@@ -328,19 +306,122 @@ def calculate_true_hourly_wage():
     if true_wage < traditional_wage:
         print(f"\nYour commute reduces your effective wage by:")
         print(f"  ${(traditional_wage - true_wage):.2f} per hour")
-        print(f"  ${(traditional_wage - true_wage) * yearly_work_hours:,.2f} per year")
-    
-    return true_wage
+        print(f"  ${(traditional_wage - true_wage) * result.yearly_work_hours:,.2f} per year")
+
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Calculate your true hourly wage including commute time and costs")
+    parser.add_argument('--bulk', metavar='INPUT',
+                        help="Calculate every record in a CSV/JSONL file ('-' for stdin) or .bin record file "
+                             "instead of prompting")
+    parser.add_argument('-o', '--output', default='-',
+                        help="Where bulk results go, CSV, JSONL, .tcol, .arrow or .parquet by extension "
+                             "(default: stdout)")
+    parser.add_argument('--input-format', choices=INPUT_FORMATS, help="Bulk input format if it can't be told from the name")
+    parser.add_argument('--fixed-width', metavar='LAYOUT',
+                        help="Read the bulk input as fixed-width text with these comma separated name:width "
+                             "columns, e.g. paycheck:10,_:2,transport_type:8 (names that aren't inputs are skipped)")
+    parser.add_argument('--skip-lines', type=int, default=0,
+                        help="Header lines at the top of a --fixed-width file")
+    parser.add_argument('--output-format', choices=OUTPUT_FORMATS, help="Bulk output format if it can't be told from the name")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Records calculated at a time in bulk mode")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Processes used in bulk mode, 0 means one per CPU core")
+    parser.add_argument('--report', action='store_true', help="Print a throughput report after a bulk run")
+    parser.add_argument('--road-graph', metavar='FILE',
+                        help="Route each bulk record's daily_miles and commute_minutes from its home_lat/home_lon "
+                             "and work_lat/work_lon over a local road graph (.osm, edge list .csv or .npz)")
+    parser.add_argument('--no-validate', action='store_true',
+                        help="Calculate bulk rows without checking them against the prompt limits "
+                             "(.bin input still stops at a bad chunk)")
+    parser.add_argument('--errors', metavar='FILE',
+                        help="Write the row number and problem of every bulk row left out as CSV")
+    parser.add_argument('--summary', nargs='?', const='', metavar='KEYS',
+                        help="Print group statistics after a bulk run, grouped by comma separated columns "
+                             "(e.g. transport_type,pay_frequency), or over everyone with no KEYS")
+    parser.add_argument('--summary-json', metavar='FILE',
+                        help="Also write the --summary sketches as JSON, for merging with other runs")
+    parser.add_argument('--compare', action='store_true',
+                        help="After each calculation, rank every transport option for the same inputs")
+    parser.add_argument('--serve', action='store_true', help="Run the HTTP/JSON calculation service")
+    # the server's own defaults apply when these are left out, wage_server is only imported for --serve
+    parser.add_argument('--host', help="Address --serve listens on (default: localhost only)")
+    parser.add_argument('--port', type=int, help="Port --serve listens on (default: 8080)")
+    parser.add_argument('--server-workers', type=int, default=0,
+                        help="Processes for /batch requests, 0 means one per CPU core")
+    parser.add_argument('--cache-size', type=int, help="Distinct single calculations --serve remembers")
+    parser.add_argument('--profile', action='store_true',
+                        help="Time every stage and write stage stats and a Chrome trace on exit")
+    parser.add_argument('--cprofile', action='store_true', help="With --profile, also write a cProfile dump")
+    parser.add_argument('--profile-dir', help="Where --profile writes its files (default: ./truecost-profile)")
+    return parser.parse_args(argv)
 
-def main():
+
+def run_bulk_mode(args):
+    """Non-interactive bulk run, returns the exit code"""
+    workers = args.workers or default_workers()
+    report = ThroughputReport(workers, args.chunk_size) if args.report else None
+    summary = None
+    if args.summary is not None or args.summary_json:
+        from wage_report import Aggregator
+        summary = Aggregator([key.strip() for key in (args.summary or '').split(',') if key.strip()])
+    errors = None
+    errors_file = None
+    router = None
+    layout = None
+    try:
+        if args.fixed_width:
+            from wage_records import FixedWidth
+            layout = FixedWidth.parse(args.fixed_width, args.skip_lines)
+        if args.road_graph:
+            from wage_routing import Router, load_graph
+            router = Router(load_graph(args.road_graph))
+        if not args.no_validate:
+            from wage_validation import ValidationReport
+            if args.errors:
+                errors_file = open(args.errors, 'w', newline='', encoding='utf-8')
+            errors = ValidationReport(stream=errors_file)
+        count = run_bulk(args.bulk, args.output, args.input_format, args.output_format,
+                         args.chunk_size, workers, report, summary, errors, router, layout)
+        if args.summary_json:
+            with open(args.summary_json, 'w', encoding='utf-8') as output:
+                json.dump(summary.as_dict(), output)
+    except (OSError, ValueError) as e:
+        print(f"Bulk run failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if errors_file is not None:
+            errors_file.close()
+    print(f"Calculated {count} records", file=sys.stderr)
+    if router is not None and router.unrouted:
+        print(f"{router.unrouted:,} records couldn't be routed and kept their own distance and time", file=sys.stderr)
+    if errors is not None and errors.invalid:
+        print(errors, file=sys.stderr)
+    if report is not None:
+        print(report, file=sys.stderr)
+    if summary is not None:
+        print(summary.table(), file=sys.stderr)
+    return 0
+
+
+def main(argv=None):
     """Main program"""
+    args = parse_args(argv)
+    if args.profile or args.cprofile:
+        wage_profile.enable(cprofile=args.cprofile, output_dir=args.profile_dir)
+    if args.bulk:
+        return run_bulk_mode(args)
+    if args.serve:
+        import wage_server  # asyncio and numpy are only needed for serving
+        return wage_server.run(args)
+
     print("Calculate your actual hourly wage including commute time and costs")
     
     while True:
         try:
             # Run the calculator
-            calculate_true_hourly_wage()
+            calculate_true_hourly_wage(args.compare)
             
             # Ask if user wants to calculate again
             print("\n" + "="*60)
@@ -359,4 +440,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
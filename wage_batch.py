@@ -0,0 +1,273 @@
+"""Vectorized true hourly wage calculation over columns of records"""
+from dataclasses import fields
+
+import numpy as np
+
+from wage_core import (
+    ASSUMPTIONS, PAY_FREQUENCIES, RESULT_FIELDS, TRANSPORT_ALIASES, TRANSPORT_TYPES,
+    WageInputs, WageResult, paychecks_per_year,
+)
+
+CAR, EV, PUBLIC, BIKING, WALKING = range(len(TRANSPORT_TYPES))
+DAILY, WEEKLY, BIWEEKLY, SEMI_MONTHLY, MONTHLY = range(len(PAY_FREQUENCIES))
+
+DEFAULT_INPUTS = WageInputs()
+
+OUTPUT_FIELDS = RESULT_FIELDS
+INPUT_FIELDS = tuple(field.name for field in fields(WageInputs))
+
+
+def _at(column, index):
+    return column[index] if np.ndim(column) else column[()]
+
+
+class ResultBatch:
+    """Struct of arrays for a batch of results, one NumPy column per output field
+
+    Indexing by name gives a column, so it can be used like the dict it
+    replaces; len() is the number of rows. The inputs are kept as passed
+    (scalars stay scalars) and only turned into WageResult/WageInputs
+    records, or formatted, when a single row is asked for.
+    """
+
+    def __init__(self, columns, inputs=None):
+        self.columns = columns
+        self.inputs = inputs or {}
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __len__(self):
+        shape = self.shape
+        return shape[0] if shape else 1
+
+    def keys(self):
+        return self.columns.keys()
+
+    def values(self):
+        return self.columns.values()
+
+    def items(self):
+        return self.columns.items()
+
+    @property
+    def shape(self):
+        return np.shape(next(iter(self.columns.values()))) if self.columns else (0,)
+
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for column in self.columns.values())
+
+    def _input(self, name, index):
+        if name not in self.inputs:
+            return getattr(DEFAULT_INPUTS, name)
+        value = self.inputs[name]
+        if np.ndim(value):
+            value = _at(np.broadcast_to(value, self.shape), index)
+        if name == 'transport_type':
+            return TRANSPORT_TYPES[encode_transport(value)]
+        if name == 'pay_frequency':
+            return PAY_FREQUENCIES[encode_pay_frequency(value)]
+        if name == 'use_monthly_pass':
+            return bool(value)
+        return float(value)
+
+    def row(self, index):
+        """One row as a WageResult, needs every output field"""
+        inputs = WageInputs(**{name: self._input(name, index) for name in INPUT_FIELDS})
+        return WageResult(inputs, **{name: float(_at(self.columns[name], index)) for name in RESULT_FIELDS})
+
+    def rows(self):
+        for index in range(len(self)):
+            yield self.row(index)
+
+    def select(self, index):
+        """New batch with only the rows picked by a slice, index array or mask"""
+        shape = self.shape
+        inputs = {name: np.broadcast_to(value, shape)[index] if np.ndim(value) else value
+                  for name, value in self.inputs.items()}
+        return ResultBatch({name: column[index] for name, column in self.columns.items()}, inputs)
+
+
+def encode_choices(values, choices, aliases=None):
+    """Turn a column of names (or existing integer codes) into integer codes"""
+    values = np.asarray(values)
+    if values.dtype.kind in 'iu':
+        if values.size and (values.min() < 0 or values.max() >= len(choices)):
+            raise ValueError(f"Codes must be between 0 and {len(choices) - 1}")
+        return values.astype(np.intp, copy=False)
+
+    # only the distinct names go through python, the rest is a take()
+    uniques, inverse = np.unique(values.astype(str), return_inverse=True)
+    lookup = np.empty(len(uniques), dtype=np.intp)
+    for i, name in enumerate(uniques):
+        name = (aliases or {}).get(name, name)
+        if name not in choices:
+            raise ValueError(f"Unknown value '{name}', expected one of {', '.join(choices)}")
+        lookup[i] = choices.index(name)
+    return lookup[inverse].reshape(values.shape)
+
+
+def encode_transport(values):
+    return encode_choices(values, TRANSPORT_TYPES, TRANSPORT_ALIASES)
+
+
+def encode_pay_frequency(values):
+    return encode_choices(values, PAY_FREQUENCIES)
+
+
+def paycheck_table():
+    """Paychecks per year indexed by pay code, daily pay is scaled by days worked instead"""
+    return np.array([0.0] + [paychecks_per_year(name) for name in PAY_FREQUENCIES[1:]])
+
+
+def _safe_div(numerator, denominator):
+    """Elementwise division that gives 0 wherever the denominator is not positive"""
+    numerator, denominator = np.broadcast_arrays(numerator, denominator)
+    out = np.zeros(numerator.shape)
+    np.divide(numerator, denominator, out=out, where=denominator > 0)
+    return out
+
+
+def calculate_batch(paycheck,
+                    pay_frequency=DEFAULT_INPUTS.pay_frequency,
+                    daily_hours=DEFAULT_INPUTS.daily_hours,
+                    work_days=DEFAULT_INPUTS.work_days,
+                    commute_minutes=DEFAULT_INPUTS.commute_minutes,
+                    transport_type=DEFAULT_INPUTS.transport_type,
+                    daily_miles=DEFAULT_INPUTS.daily_miles,
+                    gas_mileage=DEFAULT_INPUTS.gas_mileage,
+                    gas_price=DEFAULT_INPUTS.gas_price,
+                    ev_efficiency=DEFAULT_INPUTS.ev_efficiency,
+                    electricity_price=DEFAULT_INPUTS.electricity_price,
+                    daily_public_cost=DEFAULT_INPUTS.daily_public_cost,
+                    monthly_pass_cost=DEFAULT_INPUTS.monthly_pass_cost,
+                    use_monthly_pass=DEFAULT_INPUTS.use_monthly_pass,
+                    walking_minutes=DEFAULT_INPUTS.walking_minutes,
+                    daily_other_costs=DEFAULT_INPUTS.daily_other_costs,
+                    daily_transport_cost=None,
+                    yearly_paychecks=None,
+                    work_days_per_year=None,
+                    commute_days_per_year=None,
+                    outputs=None):
+    """Calculate true hourly wage for whole columns of inputs at once
+
+    Every argument may be a scalar or an array, arrays are broadcast against
+    each other, and any left out take the WageInputs (GUI) defaults, so the
+    batch agrees with calculate(). pay_frequency and transport_type take
+    names or the integer codes from PAY_FREQUENCIES / TRANSPORT_TYPES. Returns a ResultBatch with
+    a column per OUTPUT_FIELDS name (or only the names in outputs).
+
+    daily_transport_cost replaces the cost worked out from transport_type,
+    e.g. with the cost of a multi-leg commute (see wage_chain).
+
+    yearly_paychecks, work_days_per_year and commute_days_per_year replace
+    the work_weeks_per_year / weeks_per_month approximations with counts
+    from a real calendar (see wage_calendar). With commute days given a
+    monthly pass costs twelve passes spread over the days actually commuted.
+    """
+    inputs = {
+        'paycheck': paycheck, 'pay_frequency': pay_frequency, 'daily_hours': daily_hours,
+        'work_days': work_days, 'commute_minutes': commute_minutes, 'transport_type': transport_type,
+        'daily_miles': daily_miles, 'gas_mileage': gas_mileage, 'gas_price': gas_price,
+        'ev_efficiency': ev_efficiency, 'electricity_price': electricity_price,
+        'daily_public_cost': daily_public_cost, 'monthly_pass_cost': monthly_pass_cost,
+        'use_monthly_pass': use_monthly_pass, 'walking_minutes': walking_minutes,
+        'daily_other_costs': daily_other_costs,
+    }
+    f8 = np.float64
+    work_weeks_per_year = ASSUMPTIONS['work_weeks_per_year']
+    paycheck = np.asarray(paycheck, dtype=f8)
+    daily_hours = np.asarray(daily_hours, dtype=f8)
+    work_days = np.asarray(work_days, dtype=f8)
+    daily_miles = np.asarray(daily_miles, dtype=f8)
+    daily_other_costs = np.asarray(daily_other_costs, dtype=f8)
+    pay_code = encode_pay_frequency(pay_frequency)
+    transport = encode_transport(transport_type)
+
+    # pay
+    if yearly_paychecks is None:
+        annual_income = paycheck * np.where(pay_code == DAILY,
+                                            work_days * work_weeks_per_year,
+                                            paycheck_table()[pay_code])
+    else:
+        annual_income = paycheck * np.asarray(yearly_paychecks, dtype=f8)
+
+    calendar = work_days_per_year is not None or commute_days_per_year is not None
+    if calendar:
+        days_worked = (work_days * work_weeks_per_year if work_days_per_year is None
+                       else np.asarray(work_days_per_year, dtype=f8))
+        commute_days = days_worked if commute_days_per_year is None else np.asarray(commute_days_per_year, dtype=f8)
+
+    # time, walking to/from stops only counts for public transport
+    is_public = transport == PUBLIC
+    commute_minutes = np.asarray(commute_minutes, dtype=f8) + np.where(is_public, walking_minutes, 0.0)
+    daily_commute_hours = (commute_minutes * 2) / 60
+
+    # cost of the transport itself, other costs are added for every mode
+    round_trip_miles = daily_miles * 2
+    fuel_cost = _safe_div(round_trip_miles, np.asarray(gas_mileage, dtype=f8)) * gas_price
+    electricity_cost = _safe_div(round_trip_miles, np.asarray(ev_efficiency, dtype=f8)) * electricity_price
+    if calendar:
+        pass_cost = _safe_div(np.asarray(monthly_pass_cost, dtype=f8) * 12, commute_days)
+    else:
+        pass_cost = _safe_div(np.asarray(monthly_pass_cost, dtype=f8), work_days * ASSUMPTIONS['weeks_per_month'])
+    fare = np.where(use_monthly_pass, pass_cost, daily_public_cost)
+
+    if daily_transport_cost is None:
+        daily_transport_cost = np.select(
+            [transport == CAR, transport == EV, is_public],
+            [fuel_cost, electricity_cost, fare],
+            0.0,
+        )
+    else:
+        daily_transport_cost = np.asarray(daily_transport_cost, dtype=f8)
+    daily_commute_cost = daily_transport_cost + daily_other_costs
+
+    # yearly
+    weekly_work_hours = daily_hours * work_days
+    weekly_commute_hours = daily_commute_hours * work_days
+    weekly_commute_costs = daily_commute_cost * work_days
+
+    if calendar:
+        # commute time and costs only on the days spent at the workplace
+        yearly_work_hours = daily_hours * days_worked
+        yearly_commute_hours = daily_commute_hours * commute_days
+        yearly_commute_costs = daily_commute_cost * commute_days
+    else:
+        yearly_work_hours = weekly_work_hours * work_weeks_per_year
+        yearly_commute_hours = weekly_commute_hours * work_weeks_per_year
+        yearly_commute_costs = weekly_commute_costs * work_weeks_per_year
+
+    # wages
+    net_yearly_income = annual_income - yearly_commute_costs
+    total_committed_hours = yearly_work_hours + yearly_commute_hours
+    traditional_wage = _safe_div(annual_income, yearly_work_hours)
+    true_wage = _safe_div(net_yearly_income, total_committed_hours)
+
+    values = {
+        'annual_income': annual_income,
+        'commute_minutes': commute_minutes,
+        'daily_commute_hours': daily_commute_hours,
+        'daily_transport_cost': daily_transport_cost,
+        'daily_commute_cost': daily_commute_cost,
+        'weekly_work_hours': weekly_work_hours,
+        'weekly_commute_hours': weekly_commute_hours,
+        'weekly_commute_costs': weekly_commute_costs,
+        'yearly_work_hours': yearly_work_hours,
+        'yearly_commute_hours': yearly_commute_hours,
+        'yearly_commute_costs': yearly_commute_costs,
+        'net_yearly_income': net_yearly_income,
+        'total_committed_hours': total_committed_hours,
+        'traditional_wage': traditional_wage,
+        'true_wage': true_wage,
+    }
+    names = OUTPUT_FIELDS if outputs is None else outputs
+    shape = np.broadcast_shapes(*(np.shape(values[name]) for name in names))
+    return ResultBatch({name: np.broadcast_to(values[name], shape) for name in names}, inputs)
@@ -0,0 +1,266 @@
+"""Streaming CSV/JSONL bulk mode, records flow through in fixed size chunks"""
+import csv
+import json
+import sys
+from dataclasses import fields
+from itertools import compress, islice
+
+from wage_core import OUTPUT_COLUMNS, WageInputs, normalize_inputs
+from wage_profile import stage
+
+INPUT_FIELDS = tuple(field.name for field in fields(WageInputs))
+FORMATS = ('csv', 'jsonl')
+COLUMNAR_FORMATS = ('tcol', 'arrow', 'parquet')
+INPUT_FORMATS = FORMATS + ('binary',)
+OUTPUT_FORMATS = FORMATS + COLUMNAR_FORMATS
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def detect_format(path, default='csv'):
+    """Guess the format from a file name, '-' (stdin/stdout) uses the default"""
+    if path and path != '-':
+        lowered = path.lower()
+        if lowered.endswith(('.jsonl', '.ndjson', '.json')):
+            return 'jsonl'
+        if lowered.endswith(('.csv', '.txt')):
+            return 'csv'
+        if lowered.endswith('.tcol'):
+            return 'tcol'
+        if lowered.endswith(('.arrow', '.feather', '.ipc')):
+            return 'arrow'
+        if lowered.endswith('.parquet'):
+            return 'parquet'
+        if lowered.endswith('.bin'):
+            return 'binary'
+    return default
+
+
+def read_records(stream, fmt='csv'):
+    """Yield one dict per input record"""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    elif fmt == 'jsonl':
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+    else:
+        raise ValueError(f"Unknown format '{fmt}', expected one of {', '.join(FORMATS)}")
+
+
+def iter_chunks(iterable, size):
+    """Yield lists of up to size items"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_chunk(records, first_row=1, errors=None):
+    """Turn raw dicts into WageInputs, reporting the row number of a bad record
+
+    With a wage_validation.ValidationReport as errors a bad record is
+    recorded there and left as None instead.
+    """
+    parsed = []
+    for row, record in enumerate(records, first_row):
+        try:
+            parsed.append(normalize_inputs(WageInputs.from_dict(record)))
+        except (TypeError, ValueError) as e:
+            if errors is None:
+                raise ValueError(f"Row {row}: {e}") from None
+            errors.add({str(e): [row]}, checked=1, invalid=1)
+            parsed.append(None)
+    return parsed
+
+
+def inputs_to_columns(inputs):
+    """Struct of lists for a list of WageInputs"""
+    return {name: [getattr(record, name) for record in inputs] for name in INPUT_FIELDS}
+
+
+def output_columns(outputs):
+    """Result columns renamed by OUTPUT_COLUMNS, ready to go next to the inputs"""
+    return {OUTPUT_COLUMNS.get(name, name): column for name, column in outputs.items()}
+
+
+def calculate_chunk(inputs, first_row=1, errors=None):
+    """Run one chunk of WageInputs through the batch engine, returns the column dict
+
+    With errors (a ValidationReport) the chunk is checked first, rows
+    breaking wage_validation's rules are recorded there and left out.
+    None entries from parse_chunk() are already recorded.
+    """
+    from wage_batch import calculate_batch  # numpy is only needed for bulk mode
+
+    if errors is None:
+        columns = inputs_to_columns(inputs)
+    else:
+        import numpy as np
+        from wage_validation import validate_columns
+
+        rows = first_row
+        if None in inputs:
+            rows = first_row + np.array([i for i, record in enumerate(inputs) if record is not None], dtype=np.int64)
+            inputs = [record for record in inputs if record is not None]
+        columns = inputs_to_columns(inputs)
+        with stage('validate_chunk'):
+            valid = validate_columns(columns, rows, errors)
+        if not valid.all():
+            keep = valid.tolist()
+            columns = {name: list(compress(column, keep)) for name, column in columns.items()}
+    outputs = calculate_batch(**columns)
+    columns.update(output_columns(outputs))
+    return columns
+
+
+def columns_to_rows(columns):
+    """Yield one flat dict per row of a column dict"""
+    names = list(columns)
+    values = [column.tolist() if hasattr(column, 'tolist') else column for column in columns.values()]
+    for row in zip(*values):
+        yield dict(zip(names, row))
+
+
+def calculate_columns(records, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, report=None, errors=None):
+    """Yield one result column dict per chunk of raw input records
+
+    workers > 1 (or 0 for every core) spreads the chunks over a process pool.
+    With errors (a ValidationReport) bad rows are left out and recorded
+    there instead of stopping the run.
+    """
+    if workers != 1:
+        from wage_parallel import calculate_records_parallel
+        yield from calculate_records_parallel(records, chunk_size, workers or None, report, errors)
+    else:
+        first_row = 1
+        for chunk in iter_chunks(records, chunk_size):
+            with stage('parse_chunk'):
+                inputs = parse_chunk(chunk, first_row, errors)
+            with stage('calculate_chunk'):
+                columns = calculate_chunk(inputs, first_row, errors)
+            if report is not None:
+                # rows actually calculated, as the parallel and record paths count them
+                report.add_chunk(len(columns['true_wage']))
+            first_row += len(chunk)
+            yield columns
+    if report is not None:
+        report.stop()
+
+
+def calculate_records(records, chunk_size=DEFAULT_CHUNK_SIZE, workers=1, report=None, errors=None):
+    """Yield one result dict per raw input record, only a few chunks are held in memory"""
+    for columns in calculate_columns(records, chunk_size, workers, report, errors):
+        yield from columns_to_rows(columns)
+
+
+def write_columns(stream, chunks, fmt='csv'):
+    """Write result column dicts as they arrive, returns the number of rows written"""
+    count = 0
+    if fmt == 'csv':
+        writer = csv.writer(stream)
+        for i, columns in enumerate(chunks):
+            if i == 0:
+                writer.writerow(list(columns))
+            with stage('write_chunk'):
+                rows = list(zip(*(column.tolist() if hasattr(column, 'tolist') else column
+                                  for column in columns.values())))
+                writer.writerows(rows)
+            count += len(rows)
+    elif fmt == 'jsonl':
+        for columns in chunks:
+            with stage('write_chunk'):
+                lines = [json.dumps(row) for row in columns_to_rows(columns)]
+                if lines:
+                    stream.write("\n".join(lines) + "\n")
+            count += len(lines)
+    else:
+        raise ValueError(f"Unknown format '{fmt}', expected one of {', '.join(FORMATS)}")
+    return count
+
+
+def _open(path, mode):
+    if path in (None, '-'):
+        return sys.stdin if 'r' in mode else sys.stdout
+    return open(path, mode, newline='', encoding='utf-8')
+
+
+def write_output(output_path, chunks, fmt='csv'):
+    """Write result column dicts to a text file, stdout or a columnar file, returns the number of rows"""
+    if fmt in COLUMNAR_FORMATS:
+        from wage_columnar import write_chunks
+
+        if output_path in (None, '-'):
+            raise ValueError(f"{fmt} output needs a file name, not stdout")
+        return write_chunks(output_path, chunks, fmt)
+
+    target = _open(output_path, 'w')
+    try:
+        return write_columns(target, chunks, fmt)
+    finally:
+        if target is not sys.stdout:
+            target.close()
+        else:
+            target.flush()
+
+
+def summarized(chunks, summary):
+    """Pass chunks through, adding each to a wage_report.Aggregator on the way"""
+    for columns in chunks:
+        with stage('summarize_chunk'):
+            summary.add(columns)
+        yield columns
+
+
+def run_bulk(input_path, output_path='-', input_format=None, output_format=None,
+             chunk_size=DEFAULT_CHUNK_SIZE, workers=1, report=None, summary=None, errors=None, router=None,
+             layout=None):
+    """Stream input_path through the calculation into output_path, '-' means stdin/stdout
+
+    Binary input is a file of wage_records.RECORD_DTYPE records, and with a
+    wage_records.FixedWidth layout input_path is read as fixed-width text;
+    both are memory mapped and calculated in this process. A
+    wage_report.Aggregator passed as summary sees every chunk. With a
+    wage_validation.ValidationReport as errors, rows breaking the input
+    rules are left out and recorded there. A wage_routing.Router fills in
+    daily_miles and commute_minutes of CSV/JSONL records that have
+    home_lat/lon and work_lat/lon.
+    """
+    if layout is not None:
+        input_format = 'fixed'
+    input_format = input_format or detect_format(input_path)
+    output_format = output_format or detect_format(output_path, default=input_format if input_format in FORMATS
+                                                   else 'csv')
+    if input_format not in INPUT_FORMATS + ('fixed',):
+        raise ValueError(f"Bulk input must be one of {', '.join(INPUT_FORMATS)}, not {input_format}")
+
+    if input_format in ('binary', 'fixed'):
+        from wage_records import calculate_records, decode_columns, open_binary, open_fixed_width
+
+        if input_path in (None, '-'):
+            raise ValueError(f"{input_format} input needs a file name, not stdin")
+        if router is not None:
+            raise ValueError("routing needs CSV or JSONL input with home and work coordinates")
+        records = open_fixed_width(input_path, layout) if layout is not None else open_binary(input_path)
+        chunks = calculate_records(records, chunk_size, report=report, errors=errors)
+        if summary is not None:
+            chunks = summarized(chunks, summary)
+        if output_format not in COLUMNAR_FORMATS:
+            chunks = map(decode_columns, chunks)
+        return write_output(output_path, chunks, output_format)
+
+    source = _open(input_path, 'r')
+    try:
+        records = read_records(source, input_format)
+        if router is not None:
+            from wage_routing import fill_commutes
+            records = fill_commutes(records, router, chunk_size)
+        chunks = calculate_columns(records, chunk_size, workers, report, errors)
+        if summary is not None:
+            chunks = summarized(chunks, summary)
+        return write_output(output_path, chunks, output_format)
+    finally:
+        if source is not sys.stdin:
+            source.close()
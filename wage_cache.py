@@ -0,0 +1,109 @@
+"""Bounded LRU cache of calculation results keyed on the normalized inputs"""
+from collections import OrderedDict
+
+from wage_core import calculate, normalize_inputs, on_assumption_change
+
+DEFAULT_CACHE_SIZE = 1024
+
+COMMON_FIELDS = ('paycheck', 'pay_frequency', 'daily_hours', 'work_days', 'commute_minutes',
+                 'transport_type', 'daily_other_costs')
+
+# the inputs each transport type actually uses, the rest can't change its result
+TRANSPORT_FIELDS = {
+    'car': ('daily_miles', 'gas_mileage', 'gas_price'),
+    'ev': ('daily_miles', 'ev_efficiency', 'electricity_price'),
+    'public': ('use_monthly_pass', 'daily_public_cost', 'monthly_pass_cost', 'walking_minutes'),
+    'biking': ('daily_miles',),
+    'walking': ('daily_miles',),
+}
+
+
+def cache_key(inputs):
+    """Hashable key made of only the inputs that matter for this transport type"""
+    names = COMMON_FIELDS + TRANSPORT_FIELDS[inputs.transport_type]
+    if inputs.transport_type == 'public':
+        # only one of the two fares is used
+        unused = 'daily_public_cost' if inputs.use_monthly_pass else 'monthly_pass_cost'
+        names = tuple(name for name in names if name != unused)
+    return tuple(getattr(inputs, name) for name in names)
+
+
+class ResultCache:
+    """LRU cache of WageResults plus anything formatted from them
+
+    Entries are dropped whenever an assumption in wage_core changes.
+    """
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        on_assumption_change(self.on_assumption_change)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def calculate(self, inputs, check=None):
+        """Cached wage_core.calculate()
+
+        check(inputs), raising for bad inputs, only runs on a miss: the key
+        holds every field a transport's result (and its validation) reads.
+        """
+        inputs = normalize_inputs(inputs)
+        key = cache_key(inputs)
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            result = entry['result']
+            if result.inputs != inputs:
+                # same key, but fields this transport doesn't use differ
+                result = result.with_inputs(inputs)
+            return result
+
+        self.misses += 1
+        if check is not None:
+            check(inputs)
+        result = calculate(inputs)
+        if self.maxsize > 0:
+            self.entries[key] = {'result': result, 'formatted': {}}
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return result
+
+    def format(self, result, name, formatter):
+        """formatter(result), remembered alongside the cached result so repeats skip formatting"""
+        entry = self.entries.get(cache_key(result.inputs))
+        if entry is None:
+            return formatter(result)
+        formatted = entry['formatted']
+        if name not in formatted:
+            formatted[name] = formatter(result)
+        return formatted[name]
+
+    def resize(self, maxsize):
+        self.maxsize = maxsize
+        while len(self.entries) > max(maxsize, 0):
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self):
+        """Forget every entry, the counters are kept"""
+        self.entries.clear()
+
+    def on_assumption_change(self, name, value):
+        self.invalidate()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self.entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
@@ -1,11 +1,93 @@
+import time
+
+# taken before the other imports so the startup benchmark includes them
+STARTED = time.perf_counter()
+
+import argparse
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import numpy as np
+
+from wage_cache import DEFAULT_CACHE_SIZE, ResultCache
+from wage_core import TRANSPORT_NAMES, WageInputs, cost_breakdown, normalize_inputs
+from wage_graph import WageGraph
+import wage_profile
+from wage_profile import stage, timed
+
+# how long inputs must be still before live mode recalculates
+LIVE_DEBOUNCE_MS = 30
+
+TIME_METRICS = (
+    "Daily Work Hours",
+    "Daily Commute Time",
+    "Weekly Work Hours",
+    "Weekly Commute Hours",
+    "Yearly Work Hours",
+    "Yearly Commute Hours",
+    "Total Committed Hours/Year",
+)
+
+_PAYCHECK_NODES = ('pay_frequency', 'paycheck', 'daily_commute_cost', 'daily_commute_hours', 'work_days')
+
+# the inputs and wage_graph nodes each result label is made from, live mode only touches labels whose nodes changed
+LABEL_NODES = {
+    'traditional_wage': ('traditional_wage',),
+    'difference': ('traditional_wage', 'true_wage'),
+    'true_wage': ('true_wage',),
+    'wage_reduction': ('traditional_wage', 'true_wage'),
+    "Daily Work Hours": ('daily_hours',),
+    "Daily Commute Time": ('daily_commute_hours',),
+    "Weekly Work Hours": ('daily_hours', 'work_days'),
+    "Weekly Commute Hours": ('daily_commute_hours', 'work_days'),
+    "Yearly Work Hours": ('yearly_work_hours',),
+    "Yearly Commute Hours": ('yearly_commute_hours',),
+    "Total Committed Hours/Year": ('total_committed_hours',),
+    'transportation': ('transport_type',),
+    'round_trip': ('transport_type', 'daily_miles'),
+    'cost_breakdown': ('transport_type', 'daily_transport_cost', 'use_monthly_pass', 'monthly_pass_cost',
+                       'daily_other_costs'),
+    'additional_costs': ('transport_type', 'daily_other_costs'),
+    'daily_commute_cost': ('daily_commute_cost',),
+    'annual_income': ('annual_income',),
+    'yearly_commute_costs': ('yearly_commute_costs',),
+    'net_yearly_income': ('net_yearly_income',),
+    'cost_percentage': ('annual_income', 'yearly_commute_costs'),
+    'paycheck_title': _PAYCHECK_NODES,
+    'paycheck_amounts': _PAYCHECK_NODES,
+    'paycheck_time': _PAYCHECK_NODES,
+}
+CHART_NODES = ('traditional_wage', 'true_wage', 'yearly_work_hours', 'yearly_commute_hours')
+
+# matplotlib (and numpy under it) is most of the startup time, so it is only
+# imported once the window is up, or when the first chart is drawn
+_plotting = None
+_plotting_lock = threading.Lock()
+
+
+def load_plotting():
+    """Import the plotting stack on first use, returns (FigureCanvasTkAgg, Figure)"""
+    global _plotting
+    with _plotting_lock:
+        if _plotting is None:
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            from matplotlib.figure import Figure
+            _plotting = FigureCanvasTkAgg, Figure
+    return _plotting
+
+
+def preload_plotting():
+    """Warm the plotting imports on a background thread"""
+    threading.Thread(target=load_plotting, name='preload-plotting', daemon=True).start()
+
 
 class TrueHourlyWageCalculator:
-    def __init__(self, root):
+    def __init__(self, root, cache_size=DEFAULT_CACHE_SIZE):
         #font tuple
         self.font_family = "Segoe UI"  #hotswap fonts
         self.title_font = (self.font_family, 24, 'bold')
@@ -41,12 +123,37 @@ class TrueHourlyWageCalculator:
         # frequency of pay
         self.pay_frequency = tk.StringVar(value="biweekly")
         
+        # spread for the Uncertainty panel on the results tab
+        self.mc_commute_sd_var = tk.DoubleVar(value=10)
+        self.mc_distribution = tk.StringVar(value="lognormal")
+        self.mc_price_spread_var = tk.DoubleVar(value=20)
+        self.mc_toll_var = tk.DoubleVar(value=0)
+        self.mc_toll_percent_var = tk.DoubleVar(value=0)
+        self.mc_samples_var = tk.IntVar(value=1000000)
+        
+        # repeated inputs (kiosks, the defaults) skip calculating and formatting
+        self.result_cache = ResultCache(cache_size)
+        
+        # live mode recalculates on every input change
+        self.live_mode = tk.BooleanVar(value=False)
+        self.live_job = None
+        self.graph = None  # made on the first live update, then only what changed is recalculated
+        
+        # named inputs kept between sessions, the store is opened on first use
+        self.scenario_name = tk.StringVar()
+        self.scenario_store = None
+        
         self.setup_ui()
+        
+        for var in (self.paycheck_var, self.daily_hours_var, self.work_days_var, self.commute_minutes_var,
+                    self.daily_miles_var, self.gas_price_var, self.mpg_var, self.daily_costs_var,
+                    self.transport_type, self.ev_efficiency_var, self.electricity_price_var,
+                    self.public_daily_cost_var, self.public_monthly_cost_var, self.public_walking_minutes_var,
+                    self.use_monthly_pass, self.pay_frequency):
+            var.trace_add('write', self.on_input_change)
 
     def exit_app(self):
         try:
-            if hasattr(self, 'results'):
-                plt.close('all')  # close matplotlib figures
             self.root.quit()
         except:
             self.root.destroy()
@@ -143,9 +250,23 @@ class TrueHourlyWageCalculator:
         ttk.Label(costs_frame, text="$", font=self.body_font).grid(row=0, column=2, sticky='w', pady=8)
         ttk.Label(costs_frame, text="parking, tolls, etc.", font=self.body_font, foreground='gray').grid(row=1, column=0, columnspan=3, sticky='w', pady=(0, 5))
         
+        # saved scenarios
+        scenario_frame = ttk.LabelFrame(left_column, text="Saved Scenarios", padding=15)
+        scenario_frame.pack(fill='x', pady=(0, 20))
+        
+        ttk.Label(scenario_frame, text="Name:", font=self.body_font).grid(row=0, column=0, sticky='w', pady=8)
+        self.scenario_combo = ttk.Combobox(scenario_frame, textvariable=self.scenario_name, width=20,
+                                           font=self.body_font, postcommand=self.list_scenarios)
+        self.scenario_combo.grid(row=0, column=1, padx=10, pady=8, sticky='w')
+        self.scenario_combo.bind('<<ComboboxSelected>>', lambda event: self.load_scenario())
+        ttk.Button(scenario_frame, text="Save", command=self.save_scenario).grid(row=0, column=2, padx=5, pady=8)
+        ttk.Button(scenario_frame, text="Load", command=self.load_scenario).grid(row=0, column=3, padx=5, pady=8)
+        
         #calc button 
         ttk.Button(left_column, text="Calculate True Hourly Wage", 
-                  command=self.calculate, style='Accent.TButton').pack(pady=30)
+                  command=self.calculate, style='Accent.TButton').pack(pady=(30, 10))
+        ttk.Checkbutton(left_column, text="Live results (update as you type)", variable=self.live_mode,
+                        command=self.on_live_mode_change).pack()
         
         # commute times 
         commute_time_frame = ttk.LabelFrame(right_column, text="Commute Time", padding=15)
@@ -275,99 +396,80 @@ class TrueHourlyWageCalculator:
         
         self.results_canvas.pack(side="left", fill="both", expand=True)
         self.scrollbar.pack(side="right", fill="y")
+        self.build_results_view()
     
-    def calculate(self):
+    def read_inputs(self):
+        """Snapshot the form into a WageInputs record"""
+        return WageInputs(**{name: var.get() for name, var in self.input_vars().items()})
+
+    def input_vars(self):
+        """The form variable behind each WageInputs field"""
+        return {
+            'paycheck': self.paycheck_var,
+            'pay_frequency': self.pay_frequency,
+            'daily_hours': self.daily_hours_var,
+            'work_days': self.work_days_var,
+            'commute_minutes': self.commute_minutes_var,
+            'transport_type': self.transport_type,
+            'daily_miles': self.daily_miles_var,
+            'gas_mileage': self.mpg_var,
+            'gas_price': self.gas_price_var,
+            'ev_efficiency': self.ev_efficiency_var,
+            'electricity_price': self.electricity_price_var,
+            'daily_public_cost': self.public_daily_cost_var,
+            'monthly_pass_cost': self.public_monthly_cost_var,
+            'use_monthly_pass': self.use_monthly_pass,
+            'walking_minutes': self.public_walking_minutes_var,
+            'daily_other_costs': self.daily_costs_var,
+        }
+
+    def write_inputs(self, inputs):
+        """Fill the form from a WageInputs record"""
+        for name, var in self.input_vars().items():
+            var.set(getattr(inputs, name))
+        self.setup_transport_details()
+        if inputs.transport_type == 'public':
+            self.on_public_cost_change()
+
+    def open_scenarios(self):
+        if self.scenario_store is None:
+            from wage_scenarios import ScenarioStore
+            self.scenario_store = ScenarioStore()
+        return self.scenario_store
+
+    def list_scenarios(self):
         try:
-            paycheck = self.paycheck_var.get()
-            daily_hours = self.daily_hours_var.get()
-            work_days = self.work_days_var.get()
-            commute_minutes = self.commute_minutes_var.get()
-            daily_miles = self.daily_miles_var.get()
-            daily_costs = self.daily_costs_var.get()
-            transport_type = self.transport_type.get()
-
-            pay_freq = self.pay_frequency.get()
-            if pay_freq == 'daily':
-                annual_income = paycheck * work_days * 50
-            elif pay_freq == 'weekly':
-                annual_income = paycheck * 50
-            elif pay_freq == 'biweekly':
-                annual_income = paycheck * 26
-            elif pay_freq == 'semi_monthly':
-                annual_income = paycheck * 24
-            else:  # monthly
-                annual_income = paycheck * 12
-
-            if transport_type == "public":
-                commute_minutes += self.public_walking_minutes_var.get()
-            
-            daily_commute_hours = (commute_minutes * 2) / 60
+            self.scenario_combo.config(values=self.open_scenarios().names())
+        except Exception as e:
+            messagebox.showerror("Scenarios", f"Couldn't open the saved scenarios: {e}")
 
-            daily_commute_cost = daily_costs
-            cost_breakdown = ""
-            
-            if transport_type == "car":
-                round_trip_miles = daily_miles * 2
-                gas_mileage = self.mpg_var.get()
-                gas_price = self.gas_price_var.get()
-                daily_fuel_cost = (round_trip_miles / gas_mileage) * gas_price if gas_mileage > 0 else 0
-                daily_commute_cost += daily_fuel_cost
-                cost_breakdown = f"Fuel: ${daily_fuel_cost:.2f}"
-                
-            elif transport_type == "ev":
-                round_trip_miles = daily_miles * 2
-                ev_efficiency = self.ev_efficiency_var.get()
-                electricity_price = self.electricity_price_var.get()
-                daily_electricity_cost = (round_trip_miles / ev_efficiency) * electricity_price if ev_efficiency > 0 else 0
-                daily_commute_cost += daily_electricity_cost
-                cost_breakdown = f"Electricity: ${daily_electricity_cost:.2f}"
-                
-            elif transport_type == "public":
-                if self.use_monthly_pass.get():
-                    monthly_pass = self.public_monthly_cost_var.get()
-                    daily_transport_cost = monthly_pass / (work_days * 4.33)  # avg weeks per month
-                else:
-                    daily_transport_cost = self.public_daily_cost_var.get()
-                daily_commute_cost += daily_transport_cost
-                cost_breakdown = f"Transport: ${daily_transport_cost:.2f}"
-            
-            elif transport_type in ["biking", "walking"]:
-                cost_breakdown = "No fuel/transportation costs"
-                if daily_costs > 0:
-                    cost_breakdown = f"Gear/Maintenance: ${daily_costs:.2f}"
-            
-            # yearly
-            weekly_work_hours = daily_hours * work_days
-            weekly_commute_hours = daily_commute_hours * work_days
-            weekly_commute_costs = daily_commute_cost * work_days
-            
-            work_weeks_per_year = 50
-            yearly_work_hours = weekly_work_hours * work_weeks_per_year
-            yearly_commute_hours = weekly_commute_hours * work_weeks_per_year
-            yearly_commute_costs = weekly_commute_costs * work_weeks_per_year
-            
-            # wage calculations
-            traditional_wage = annual_income / yearly_work_hours if yearly_work_hours > 0 else 0
-            net_yearly_income = annual_income - yearly_commute_costs
-            total_committed_hours = yearly_work_hours + yearly_commute_hours
-            true_wage = net_yearly_income / total_committed_hours if total_committed_hours > 0 else 0
-            
+    def save_scenario(self):
+        name = self.scenario_name.get().strip()
+        if not name:
+            messagebox.showerror("Scenarios", "Give the scenario a name first")
+            return
+        try:
+            self.open_scenarios().add(name, self.read_inputs())
+        except Exception as e:
+            messagebox.showerror("Scenarios", f"Couldn't save '{name}': {e}")
+
+    def load_scenario(self):
+        name = self.scenario_name.get().strip()
+        try:
+            inputs = self.open_scenarios().inputs(name)
+        except KeyError:
+            messagebox.showerror("Scenarios", f"There's no saved scenario called '{name}'")
+            return
+        except Exception as e:
+            messagebox.showerror("Scenarios", f"Couldn't load '{name}': {e}")
+            return
+        self.write_inputs(inputs)
+
+    def calculate(self):
+        try:
             # savee results
-            self.results = {
-                'traditional_wage': traditional_wage,
-                'true_wage': true_wage,
-                'annual_income': annual_income,
-                'yearly_commute_costs': yearly_commute_costs,
-                'net_yearly_income': net_yearly_income,
-                'yearly_work_hours': yearly_work_hours,
-                'yearly_commute_hours': yearly_commute_hours,
-                'total_committed_hours': total_committed_hours,
-                'daily_commute_cost': daily_commute_cost,
-                'daily_commute_hours': daily_commute_hours,
-                'cost_breakdown': cost_breakdown,
-                'transport_type': transport_type,
-                'daily_miles': daily_miles
-            }
+            with stage('calculate'):
+                self.results = self.result_cache.calculate(self.read_inputs())
             
             # switcching 
             self.notebook.select(1)
@@ -376,18 +478,16 @@ class TrueHourlyWageCalculator:
         except Exception as e:
             messagebox.showerror("Calculation Error", f"An error occurred: {str(e)}")
     
-    def display_results(self):
-        # clear results 
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-        
-        r = self.results
-    
+    def build_results_view(self):
+        """Create every results widget once, display_results() only changes their text"""
+        self.result_labels = {}
+        self.result_texts = {}
+        self.chart_values = None
+        self.figure = None
+
         header_frame = ttk.Frame(self.scrollable_frame)
         header_frame.pack(fill='x', padx=20, pady=20)
         
-        ttk.Label(self.transport_details_frame, text="$/kWh", font=self.body_font).grid(row=2, column=2, sticky='w', pady=8)
-        
         # wage Comparison
         wage_frame = ttk.LabelFrame(self.scrollable_frame, text="Wage Analysis", padding=15)
         wage_frame.pack(fill='x', padx=20, pady=10)
@@ -400,179 +500,541 @@ class TrueHourlyWageCalculator:
         # trad wage
         ttk.Label(wage_frame, text="Traditional Hourly Wage:", 
                 font=self.heading_font).grid(row=0, column=0, sticky='w', padx=10, pady=5)
-        ttk.Label(wage_frame, text=f"${r['traditional_wage']:.2f}", 
-                font=self.heading_font, foreground='#2c3e50').grid(row=1, column=0, sticky='w', padx=10, pady=5)
+        self.result_label('traditional_wage', wage_frame, font=self.heading_font,
+                          foreground='#2c3e50').grid(row=1, column=0, sticky='w', padx=10, pady=5)
 
         # diff
-        diff = r['traditional_wage'] - r['true_wage']
         ttk.Label(wage_frame, text="Difference:", 
                 font=self.heading_font).grid(row=0, column=1, sticky='w', padx=10, pady=5)
-        ttk.Label(wage_frame, text=f"${diff:.2f} per hour", 
-                font=self.heading_font).grid(row=1, column=1, sticky='w', padx=10, pady=5)
+        self.result_label('difference', wage_frame,
+                          font=self.heading_font).grid(row=1, column=1, sticky='w', padx=10, pady=5)
 
         # true wage
         ttk.Label(wage_frame, text="True Hourly Wage:", 
                 font=self.heading_font).grid(row=0, column=2, sticky='w', padx=10, pady=5)
-        ttk.Label(wage_frame, text=f"${r['true_wage']:.2f}", 
-                font=self.heading_font, foreground='#27ae60').grid(row=1, column=2, sticky='w', padx=10, pady=5)
+        self.result_label('true_wage', wage_frame, font=self.heading_font,
+                          foreground='#27ae60').grid(row=1, column=2, sticky='w', padx=10, pady=5)
 
-        if diff > 0:
-            ttk.Label(wage_frame, 
-                    text=f"Commute reduces wage by ${diff:.2f}/hr",
-                    font=self.subheading_font, foreground='#c0392b').grid(row=2, column=0, columnspan=3, sticky='w', padx=10, pady=(10, 0))
+        self.result_label('wage_reduction', wage_frame, font=self.subheading_font,
+                          foreground='#c0392b').grid(row=2, column=0, columnspan=3, sticky='w', padx=10, pady=(10, 0))
         
         time_frame = ttk.LabelFrame(self.scrollable_frame, text="Time Breakdown", padding=15)
         time_frame.pack(fill='x', padx=20, pady=10)
         
-        # time metrics
-        metrics = [
-            ("Daily Work Hours", f"{self.daily_hours_var.get():.1f} hrs"),
-            ("Daily Commute Time", f"{r['daily_commute_hours']:.1f} hrs"),
-            ("Weekly Work Hours", f"{self.daily_hours_var.get() * self.work_days_var.get():.1f} hrs"),
-            ("Weekly Commute Hours", f"{r['daily_commute_hours'] * self.work_days_var.get():.1f} hrs"),
-            ("Yearly Work Hours", f"{r['yearly_work_hours']:.0f} hrs"),
-            ("Yearly Commute Hours", f"{r['yearly_commute_hours']:.0f} hrs"),
-            ("Total Committed Hours/Year", f"{r['total_committed_hours']:.0f} hrs")
-        ]
-        
-        for i, (label, value) in enumerate(metrics):
+        for i, label in enumerate(TIME_METRICS):
             row = i // 2
             col = (i % 2) * 2
             
             ttk.Label(time_frame, text=label, font=self.body_font).grid(row=row, column=col, 
                                                                       sticky='w', padx=10, pady=5)
-            ttk.Label(time_frame, text=value, font=self.body_font).grid(row=row, 
-                                                                              column=col+1, 
-                                                                              sticky='w', 
-                                                                              padx=10, pady=5)
+            self.result_label(label, time_frame, font=self.body_font).grid(row=row, 
+                                                                          column=col+1, 
+                                                                          sticky='w', 
+                                                                          padx=10, pady=5)
         
-        # breakdown for cost
+        # breakdown for cost, gridded so rows can be hidden and shown again in place
         cost_frame = ttk.LabelFrame(self.scrollable_frame, text="Cost Breakdown", padding=15)
         cost_frame.pack(fill='x', padx=20, pady=10)
         
-        # Transport type
-        transport_names = {
-            'car': 'Car (Gas)',
-            'ev': 'Electric Vehicle',
-            'public': 'Public Transport',
-            'biking': 'Biking',
-            'walking': 'Walking'
-        }
-        
-        ttk.Label(cost_frame, text=f"Transportation: {transport_names.get(r['transport_type'], r['transport_type'])}",
-                 font=self.body_font).pack(anchor='w', pady=5)
-        
-        if r['transport_type'] in ['car', 'ev', 'biking', 'walking']:
-            ttk.Label(cost_frame, text=f"Round Trip Distance: {r['daily_miles'] * 2:.1f} miles",
-                     font=self.body_font).pack(anchor='w', pady=2)
-        
-        ttk.Label(cost_frame, text=f"Daily Cost Breakdown: {r['cost_breakdown']}",
-                 font=self.body_font).pack(anchor='w', pady=2)
-        
-        if self.daily_costs_var.get() > 0 and r['transport_type'] not in ['biking', 'walking']:
-            ttk.Label(cost_frame, text=f"+ Additional Costs: ${self.daily_costs_var.get():.2f}",
-                     font=self.body_font).pack(anchor='w', pady=2)
-        
-        ttk.Label(cost_frame, text=f"Total Daily Commute Cost: ${r['daily_commute_cost']:.2f}",
-                 font=self.body_font).pack(anchor='w', pady=5)
+        self.result_label('transportation', cost_frame, font=self.body_font).grid(row=0, sticky='w', pady=5)
+        self.result_label('round_trip', cost_frame, font=self.body_font).grid(row=1, sticky='w', pady=2)
+        self.result_label('cost_breakdown', cost_frame, font=self.body_font).grid(row=2, sticky='w', pady=2)
+        self.result_label('additional_costs', cost_frame, font=self.body_font).grid(row=3, sticky='w', pady=2)
+        self.result_label('daily_commute_cost', cost_frame, font=self.body_font).grid(row=4, sticky='w', pady=5)
         
         # yearly costs
         yearly_cost_frame = ttk.Frame(cost_frame)
-        yearly_cost_frame.pack(fill='x', pady=10)
+        yearly_cost_frame.grid(row=5, sticky='we', pady=10)
         
         ttk.Label(yearly_cost_frame, text="Yearly Take-home Pay:", 
                  font=self.body_font).pack(side='left', padx=20)
-        ttk.Label(yearly_cost_frame, text=f"${r['annual_income']:,.2f}", 
-                 font=self.body_font).pack(side='left', padx=10)
+        self.result_label('annual_income', yearly_cost_frame, 
+                          font=self.body_font).pack(side='left', padx=10)
         
         ttk.Label(yearly_cost_frame, text="Yearly Commute Costs:", 
                  font=self.body_font).pack(side='left', padx=20)
-        ttk.Label(yearly_cost_frame, text=f"${r['yearly_commute_costs']:,.2f}", 
-                 font=self.body_font, foreground='#c0392b').pack(side='left', padx=10)
+        self.result_label('yearly_commute_costs', yearly_cost_frame, 
+                          font=self.body_font, foreground='#c0392b').pack(side='left', padx=10)
         
         ttk.Label(yearly_cost_frame, text="Net Yearly Income:", 
                  font=self.body_font).pack(side='left', padx=20)
-        ttk.Label(yearly_cost_frame, text=f"${r['net_yearly_income']:,.2f}", 
-                 font=self.body_font, foreground='#27ae60').pack(side='left', padx=10)
+        self.result_label('net_yearly_income', yearly_cost_frame, 
+                          font=self.body_font, foreground='#27ae60').pack(side='left', padx=10)
         
         # % of income spent on commute
-        if r['annual_income'] > 0:
-            cost_percentage = (r['yearly_commute_costs'] / r['annual_income']) * 100
-            ttk.Label(cost_frame, 
-                     text=f"Commute costs consume {cost_percentage:.1f}% of your take-home pay",
-                     font=self.body_font).pack(anchor='w', pady=5)
+        self.result_label('cost_percentage', cost_frame, font=self.body_font).grid(row=6, sticky='w', pady=5)
         
         # paycheck
         paycheck_frame = ttk.LabelFrame(self.scrollable_frame, text="Paycheck Perspective", padding=15)
         paycheck_frame.pack(fill='x', padx=20, pady=10)
         
-        pay_freq = self.pay_frequency.get()
-        paycheck = self.paycheck_var.get()
-        
-        if pay_freq == 'biweekly':
-            biweekly_commute_cost = r['daily_commute_cost'] * self.work_days_var.get() * 2
-            biweekly_commute_hours = r['daily_commute_hours'] * self.work_days_var.get() * 2
-            percentage = (biweekly_commute_cost / paycheck) * 100 if paycheck > 0 else 0
-            
-            ttk.Label(paycheck_frame, text="Per Bi-weekly Paycheck:", 
-                     font=self.body_font).pack(anchor='w', pady=5)
-            
-            ttk.Label(paycheck_frame, 
-                     text=f"Take-home: ${paycheck:.2f} | Commute costs: ${biweekly_commute_cost:.2f} | Effective: ${paycheck - biweekly_commute_cost:.2f}",
-                     font=self.body_font).pack(anchor='w', pady=2)
-            
-            ttk.Label(paycheck_frame, 
-                     text=f"Commute time: {biweekly_commute_hours:.1f} hours | Commute eats {percentage:.1f}% of your paycheck",
-                     font=self.body_font).pack(anchor='w', pady=2)
+        self.result_label('paycheck_title', paycheck_frame, font=self.body_font).grid(row=0, sticky='w', pady=5)
+        self.result_label('paycheck_amounts', paycheck_frame, font=self.body_font).grid(row=1, sticky='w', pady=2)
+        self.result_label('paycheck_time', paycheck_frame, font=self.body_font).grid(row=2, sticky='w', pady=2)
         
         # visualization
-        self.create_visualization()
+        self.vis_frame = ttk.LabelFrame(self.scrollable_frame, text="Wage Comparison", padding=15)
+        self.vis_frame.pack(fill='x', padx=20, pady=10)
+        
+        self.build_comparison_view()
+        self.build_uncertainty_view()
         ttk.Button(self.scrollable_frame, text="← Back to Calculator", 
                   command=lambda: self.notebook.select(0)).pack(pady=20)
+
+    def build_comparison_view(self):
+        """Every transport option ranked in one chart, filled in on request"""
+        self.compare_figure = None
+        
+        frame = ttk.LabelFrame(self.scrollable_frame, text="Transport Options", padding=15)
+        frame.pack(fill='x', padx=20, pady=10)
+        ttk.Button(frame, text="Compare All Options", command=self.show_comparison).pack(anchor='w')
+        self.compare_summary = ttk.Label(frame, text="", font=self.body_font, justify='left')
+        self.compare_summary.pack(anchor='w', pady=(10, 5))
+        self.compare_plot_frame = ttk.Frame(frame)
+        self.compare_plot_frame.pack(fill='x')
+
+    def show_comparison(self):
+        from wage_compare import compare, option_for
+        
+        try:
+            inputs = self.read_inputs()
+            with stage('compare'):
+                comparison = compare(inputs)
+        except (tk.TclError, ValueError) as e:
+            messagebox.showerror("Comparison Error", f"An error occurred: {str(e)}")
+            return
+        
+        lines = [f"Best true wage: {comparison.best()}  |  "
+                 f"Lowest commute cost per committed hour: {comparison.best('cost_per_hour')}"]
+        lines.extend(break_even.describe() for break_even in comparison.break_evens)
+        self.compare_summary.config(text="\n".join(lines))
+        
+        if self.compare_figure is None:
+            FigureCanvasTkAgg, Figure = load_plotting()
+            self.compare_figure = Figure(figsize=(10, 3.5))
+            self.compare_figure.patch.set_facecolor('#f0f0f0')
+            self.compare_axes = self.compare_figure.subplots()
+            self.compare_figure.subplots_adjust(left=0.25, right=0.95, bottom=0.15)
+            self.compare_canvas = FigureCanvasTkAgg(self.compare_figure, master=self.compare_plot_frame)
+            self.compare_canvas.get_tk_widget().pack(fill='both', expand=True)
+        
+        # best option on top, the current choice highlighted
+        ax = self.compare_axes
+        ax.clear()
+        rows = list(comparison.rows())[::-1]
+        current = option_for(normalize_inputs(inputs))
+        colors = ['#27ae60' if row['option'] == current else '#3498db' for row in rows]
+        bars = ax.barh([row['option'] for row in rows], [row['true_wage'] for row in rows], color=colors)
+        for bar, row in zip(bars, rows):
+            ax.text(bar.get_width(), bar.get_y() + bar.get_height() / 2,
+                    f"  \\${row['true_wage']:.2f}  (commute costs \\${row['cost_per_committed_hour']:.2f}/hr)",
+                    va='center', fontsize=8)
+        ax.set_xlim(0, max(max(row['true_wage'] for row in rows), 1) * 1.4)
+        ax.set_xlabel('True Hourly Wage ($)')
+        ax.set_title('Transport Options')
+        self.compare_canvas.draw_idle()
+
+    def build_uncertainty_view(self):
+        """Monte Carlo controls, percentiles and a histogram that fills in as chunks finish"""
+        self.simulation = None
+        self.simulation_job = None
+        self.mc_figure = None
+        
+        frame = ttk.LabelFrame(self.scrollable_frame, text="Uncertainty", padding=15)
+        frame.pack(fill='x', padx=20, pady=10)
+        controls = ttk.Frame(frame)
+        controls.pack(fill='x')
+        
+        ttk.Label(controls, text="Commute Time Spread:", font=self.body_font).grid(row=0, column=0, sticky='w', pady=5)
+        ttk.Entry(controls, textvariable=self.mc_commute_sd_var, width=10, font=self.body_font).grid(row=0, column=1, padx=10, pady=5)
+        ttk.Label(controls, text="± min", font=self.body_font).grid(row=0, column=2, sticky='w', pady=5)
+        ttk.Combobox(controls, textvariable=self.mc_distribution, values=["normal", "lognormal"],
+                     state="readonly", width=10, font=self.body_font).grid(row=0, column=3, padx=10, pady=5, sticky='w')
+        
+        ttk.Label(controls, text="Price Range:", font=self.body_font).grid(row=1, column=0, sticky='w', pady=5)
+        ttk.Entry(controls, textvariable=self.mc_price_spread_var, width=10, font=self.body_font).grid(row=1, column=1, padx=10, pady=5)
+        ttk.Label(controls, text="± %", font=self.body_font).grid(row=1, column=2, sticky='w', pady=5)
+        
+        ttk.Label(controls, text="Toll:", font=self.body_font).grid(row=2, column=0, sticky='w', pady=5)
+        ttk.Entry(controls, textvariable=self.mc_toll_var, width=10, font=self.body_font).grid(row=2, column=1, padx=10, pady=5)
+        ttk.Label(controls, text="$ on", font=self.body_font).grid(row=2, column=2, sticky='w', pady=5)
+        ttk.Entry(controls, textvariable=self.mc_toll_percent_var, width=10, font=self.body_font).grid(row=2, column=3, padx=10, pady=5, sticky='w')
+        ttk.Label(controls, text="% of days", font=self.body_font).grid(row=2, column=4, sticky='w', pady=5)
+        
+        ttk.Label(controls, text="Samples:", font=self.body_font).grid(row=3, column=0, sticky='w', pady=5)
+        ttk.Entry(controls, textvariable=self.mc_samples_var, width=10, font=self.body_font).grid(row=3, column=1, padx=10, pady=5)
+        ttk.Button(controls, text="Run Simulation", command=self.run_simulation).grid(row=3, column=3, padx=10, pady=5, sticky='w')
+        
+        self.mc_summary = ttk.Label(frame, text="", font=self.subheading_font)
+        self.mc_summary.pack(anchor='w', pady=(10, 5))
+        self.mc_plot_frame = ttk.Frame(frame)
+        self.mc_plot_frame.pack(fill='x')
+
+    def run_simulation(self):
+        from wage_montecarlo import LogNormal, Normal, Simulation, Toll, Uniform, price_field
+        
+        if self.simulation_job is not None:
+            self.root.after_cancel(self.simulation_job)
+            self.simulation_job = None
+        try:
+            inputs = self.read_inputs()
+            spread = self.mc_commute_sd_var.get()
+            commute = LogNormal if self.mc_distribution.get() == "lognormal" else Normal
+            distributions = {'commute_minutes': commute(inputs.commute_minutes, spread)}
+            price = price_field(inputs)
+            percent = self.mc_price_spread_var.get() / 100
+            if price is not None and percent > 0:
+                value = getattr(inputs, price)
+                distributions[price] = Uniform(value * (1 - percent), value * (1 + percent))
+            toll = Toll(self.mc_toll_var.get(), self.mc_toll_percent_var.get() / 100)
+            self.simulation = Simulation(inputs, self.mc_samples_var.get(), toll=toll, **distributions)
+        except (tk.TclError, ValueError) as e:
+            messagebox.showerror("Simulation Error", f"An error occurred: {str(e)}")
+            return
+        
+        self.mc_summary.config(text="Simulating...")
+        self.build_histogram()
+        self.simulation_job = self.root.after(0, self.simulation_step)
+
+    def simulation_step(self):
+        """One chunk per event loop turn, so the window stays responsive and the histogram grows"""
+        simulation = self.simulation
+        with stage('simulation_chunk'):
+            more = simulation.step()
+        self.update_histogram(simulation)
+        if more:
+            self.mc_summary.config(text=f"Simulating... {simulation.done:,} of {simulation.total:,} samples")
+            self.simulation_job = self.root.after(1, self.simulation_step)
+            return
+        
+        self.simulation_job = None
+        result = simulation.result()
+        p = result.percentiles
+        self.mc_summary.config(text=f"True wage P5: ${p[5]:.2f}  |  P50: ${p[50]:.2f}  |  P95: ${p[95]:.2f}  "
+                                    f"({len(result):,} samples)")
+
+    def build_histogram(self):
+        if self.mc_figure is None:
+            FigureCanvasTkAgg, Figure = load_plotting()
+            self.mc_figure = Figure(figsize=(10, 3))
+            self.mc_figure.patch.set_facecolor('#f0f0f0')
+            self.mc_axes = self.mc_figure.subplots()
+            self.mc_figure.subplots_adjust(bottom=0.2)
+            self.mc_canvas = FigureCanvasTkAgg(self.mc_figure, master=self.mc_plot_frame)
+            self.mc_canvas.get_tk_widget().pack(fill='both', expand=True)
+        # the bins are only known after the first chunk
+        self.mc_axes.clear()
+        self.mc_axes.set_xlabel('True Hourly Wage ($)')
+        self.mc_axes.set_ylabel('Samples')
+        self.mc_bars = None
+
+    def update_histogram(self, simulation):
+        edges = simulation.edges
+        if self.mc_bars is None:
+            self.mc_bars = self.mc_axes.bar(edges[:-1], simulation.counts, width=edges[1:] - edges[:-1],
+                                            align='edge', color='#27ae60')
+            self.mc_axes.set_xlim(edges[0], edges[-1])
+        else:
+            for bar, count in zip(self.mc_bars, simulation.counts):
+                bar.set_height(count)
+        self.mc_axes.set_ylim(0, max(simulation.counts.max(), 1) * 1.1)
+        self.mc_canvas.draw_idle()
+
+    def result_label(self, key, parent, **options):
+        label = ttk.Label(parent, text="", **options)
+        self.result_labels[key] = label
+        self.result_texts[key] = ""
+        return label
+
+    def set_result_text(self, key, text):
+        """Change one result label, None hides it, unchanged text is left alone"""
+        previous = self.result_texts[key]
+        if text == previous:
+            return
+        label = self.result_labels[key]
+        if text is None:
+            label.grid_remove()
+        else:
+            label.config(text=text)
+            if previous is None:
+                label.grid()
+        self.result_texts[key] = text
+
+    def result_texts_for(self, r):
+        """Text for every result label, None for rows that don't apply"""
+        inputs = r.inputs
+        diff = r.traditional_wage - r.true_wage
+        texts = {
+            'traditional_wage': f"${r.traditional_wage:.2f}",
+            'difference': f"${diff:.2f} per hour",
+            'true_wage': f"${r.true_wage:.2f}",
+            'wage_reduction': f"Commute reduces wage by ${diff:.2f}/hr" if diff > 0 else None,
+            "Daily Work Hours": f"{inputs.daily_hours:.1f} hrs",
+            "Daily Commute Time": f"{r.daily_commute_hours:.1f} hrs",
+            "Weekly Work Hours": f"{inputs.daily_hours * inputs.work_days:.1f} hrs",
+            "Weekly Commute Hours": f"{r.daily_commute_hours * inputs.work_days:.1f} hrs",
+            "Yearly Work Hours": f"{r.yearly_work_hours:.0f} hrs",
+            "Yearly Commute Hours": f"{r.yearly_commute_hours:.0f} hrs",
+            "Total Committed Hours/Year": f"{r.total_committed_hours:.0f} hrs",
+            'transportation': f"Transportation: {TRANSPORT_NAMES.get(r.transport_type, r.transport_type)}",
+            'round_trip': None,
+            'cost_breakdown': f"Daily Cost Breakdown: {cost_breakdown(r, include_other=False)}",
+            'additional_costs': None,
+            'daily_commute_cost': f"Total Daily Commute Cost: ${r.daily_commute_cost:.2f}",
+            'annual_income': f"${r.annual_income:,.2f}",
+            'yearly_commute_costs': f"${r.yearly_commute_costs:,.2f}",
+            'net_yearly_income': f"${r.net_yearly_income:,.2f}",
+            'cost_percentage': None,
+            'paycheck_title': None,
+            'paycheck_amounts': None,
+            'paycheck_time': None,
+        }
+        
+        if r.transport_type in ['car', 'ev', 'biking', 'walking']:
+            texts['round_trip'] = f"Round Trip Distance: {inputs.daily_miles * 2:.1f} miles"
+        
+        if inputs.daily_other_costs > 0 and r.transport_type not in ['biking', 'walking']:
+            texts['additional_costs'] = f"+ Additional Costs: ${inputs.daily_other_costs:.2f}"
+        
+        if r.annual_income > 0:
+            texts['cost_percentage'] = f"Commute costs consume {r.commute_cost_percentage:.1f}% of your take-home pay"
+        
+        paycheck = inputs.paycheck
+        if inputs.pay_frequency == 'biweekly':
+            biweekly_commute_cost = r.daily_commute_cost * inputs.work_days * 2
+            biweekly_commute_hours = r.daily_commute_hours * inputs.work_days * 2
+            percentage = (biweekly_commute_cost / paycheck) * 100 if paycheck > 0 else 0
+            texts['paycheck_title'] = "Per Bi-weekly Paycheck:"
+            texts['paycheck_amounts'] = (f"Take-home: ${paycheck:.2f} | Commute costs: ${biweekly_commute_cost:.2f} | "
+                                         f"Effective: ${paycheck - biweekly_commute_cost:.2f}")
+            texts['paycheck_time'] = (f"Commute time: {biweekly_commute_hours:.1f} hours | "
+                                      f"Commute eats {percentage:.1f}% of your paycheck")
+        return texts
+
+    @timed('display_results')
+    def display_results(self, changed=None):
+        """Update the results tab, only the labels and chart reading changed nodes if changed is given"""
+        r = self.results
+        with stage('format_results'):
+            texts = self.result_cache.format(r, 'results_tab', self.result_texts_for)
+        with stage('update_labels'):
+            for key, text in texts.items():
+                if changed is None or not changed.isdisjoint(LABEL_NODES[key]):
+                    self.set_result_text(key, text)
+        
+        # the chart only needs redrawing when something it shows has changed
+        if changed is not None and changed.isdisjoint(CHART_NODES):
+            return
+        chart_values = (r.traditional_wage, r.true_wage, r.yearly_work_hours, r.yearly_commute_hours)
+        if chart_values != self.chart_values:
+            self.chart_values = chart_values
+            self.create_visualization()
+
+    def on_input_change(self, *args):
+        if not self.live_mode.get():
+            return
+        # debounce, a slider drag fires many writes but only the last one is calculated
+        if self.live_job is not None:
+            self.root.after_cancel(self.live_job)
+        self.live_job = self.root.after(LIVE_DEBOUNCE_MS, self.live_update)
+
+    def on_live_mode_change(self):
+        if self.live_mode.get():
+            self.graph = None  # the labels may show a Calculate from other inputs since
+            self.live_update()
+
+    def live_update(self):
+        self.live_job = None
+        try:
+            inputs = self.read_inputs()
+            with stage('calculate'):
+                if self.graph is None:
+                    self.graph = WageGraph(inputs)
+                    changed = None  # nothing shown from the graph yet, update everything
+                    self.graph.refresh()
+                else:
+                    self.graph.update(inputs)
+                    changed = self.graph.refresh()
+        except (tk.TclError, ValueError):
+            return  # half typed entry, keep showing the last good results
+        if changed is not None and not changed:
+            return
+        self.results = self.graph.result()
+        self.display_results(changed)
     
+    @timed('create_visualization')
     def create_visualization(self):
-        # bar graph comparing wages
-        vis_frame = ttk.LabelFrame(self.scrollable_frame, text="Wage Comparison", padding=15)
-        vis_frame.pack(fill='x', padx=20, pady=10)
-        
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(10, 6))
-        fig.patch.set_facecolor('#f0f0f0')
+        """Draw the charts, the figure and canvas are made once and updated in place afterwards"""
+        if self.figure is None:
+            self.build_visualization()
+        self.update_visualization()
+
+    def build_visualization(self):
+        FigureCanvasTkAgg, Figure = load_plotting()
+        # a bare Figure rather than pyplot, so nothing keeps old figures alive
+        self.figure = Figure(figsize=(10, 6))
+        self.figure.patch.set_facecolor('#f0f0f0')
+        ax1, ax2 = self.figure.subplots(1, 2)
+        self.wage_axes = ax1
         
         # bar graph for wages
         labels = ['Traditional Wage', 'True Hourly Wage']
-        values = [self.results['traditional_wage'], self.results['true_wage']]
         colors = ['#3498db', '#27ae60']
         
-        bars = ax1.bar(labels, values, color=colors)
+        self.wage_bars = ax1.bar(labels, [0, 0], color=colors)
         ax1.set_ylabel('Hourly Wage ($)')
         ax1.set_title('Wage Comparison')
         
         # value labels on bars
-        for bar, value in zip(bars, values):
-            height = bar.get_height()
-            ax1.text(bar.get_x() + bar.get_width()/2., height + 0.5,
-                    f'${value:.2f}', ha='center', va='bottom')
-        
-        # Pie chart
-        work_hours = self.results['yearly_work_hours']
-        commute_hours = self.results['yearly_commute_hours']
-        
-        if work_hours + commute_hours > 0:
-            sizes = [work_hours, commute_hours]
-            labels_pie = ['Work Hours', 'Commute Hours']
-            colors_pie = ['#3498db', '#e74c3c']
-            
-            ax2.pie(sizes, labels=labels_pie, colors=colors_pie, autopct='%1.1f%%',
-                   startangle=90)
-            ax2.set_title('Yearly Time Allocation')
-        
-        plt.tight_layout()
+        self.wage_bar_labels = [
+            ax1.text(bar.get_x() + bar.get_width()/2., 0, '', ha='center', va='bottom')
+            for bar in self.wage_bars
+        ]
         
-        canvas = FigureCanvasTkAgg(fig, master=vis_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill='both', expand=True)
+        # Pie chart, wedge angles and label positions are moved on every update
+        labels_pie = ['Work Hours', 'Commute Hours']
+        colors_pie = ['#3498db', '#e74c3c']
+        self.time_wedges, self.time_labels, self.time_percentages = ax2.pie(
+            [1, 1], labels=labels_pie, colors=colors_pie, autopct='%1.1f%%', startangle=90)
+        ax2.set_title('Yearly Time Allocation')
+        
+        with stage('tight_layout'):
+            self.figure.tight_layout()
+        
+        # the changing artists are animated so updates can be blitted over a saved background
+        self.chart_artists = (list(self.wage_bars) + self.wage_bar_labels + list(self.time_wedges)
+                              + list(self.time_labels) + list(self.time_percentages))
+        for artist in self.chart_artists:
+            artist.set_animated(True)
+        self.chart_background = None
+        
+        self.chart_canvas = FigureCanvasTkAgg(self.figure, master=self.vis_frame)
+        self.chart_canvas.mpl_connect('draw_event', self.on_chart_draw)
+        wage_profile.wrap(self.chart_canvas, 'draw', 'canvas.draw')
+        self.chart_canvas.get_tk_widget().pack(fill='both', expand=True)
+
+    def on_chart_draw(self, event):
+        # a full draw leaves the animated artists out, keep that as the blit background
+        self.chart_background = self.chart_canvas.copy_from_bbox(self.figure.bbox)
+        self.draw_chart_artists()
 
-def main():
+    def draw_chart_artists(self):
+        for artist in self.chart_artists:
+            self.figure.draw_artist(artist)
+
+    def update_visualization(self):
+        r = self.results
+        values = [r.traditional_wage, r.true_wage]
+        for bar, label, value in zip(self.wage_bars, self.wage_bar_labels, values):
+            bar.set_height(value)
+            label.set_position((bar.get_x() + bar.get_width()/2., max(value, 0) + 0.5))
+            label.set_text(f'${value:.2f}')
+        
+        # round the y limit up so small changes keep the same axes and can be blitted
+        top = max(5, math.ceil(max(values) * 1.15 / 5) * 5)
+        bottom = min(0, math.floor(min(values) * 1.15 / 5) * 5)
+        limits_changed = self.wage_axes.get_ylim() != (bottom, top)
+        if limits_changed:
+            self.wage_axes.set_ylim(bottom, top)
+        
+        self.update_time_pie(r.yearly_work_hours, r.yearly_commute_hours)
+        
+        if limits_changed or self.chart_background is None:
+            self.chart_canvas.draw_idle()
+        else:
+            with stage('chart_blit'):
+                self.chart_canvas.restore_region(self.chart_background)
+                self.draw_chart_artists()
+                self.chart_canvas.blit(self.figure.bbox)
+
+    def update_time_pie(self, work_hours, commute_hours):
+        total = work_hours + commute_hours
+        visible = total > 0
+        for artist in (*self.time_wedges, *self.time_labels, *self.time_percentages):
+            artist.set_visible(visible)
+        if not visible:
+            return
+        
+        # same geometry ax.pie() uses: counterclockwise from 90 degrees, labels at 1.1, pct at 0.6
+        theta1 = 90
+        for wedge, label, percentage, size in zip(self.time_wedges, self.time_labels,
+                                                  self.time_percentages, (work_hours, commute_hours)):
+            theta2 = theta1 + 360 * size / total
+            wedge.set_theta1(theta1)
+            wedge.set_theta2(theta2)
+            middle = math.radians((theta1 + theta2) / 2)
+            x, y = math.cos(middle), math.sin(middle)
+            label.set_position((1.1 * x, 1.1 * y))
+            label.set_horizontalalignment('left' if x > 0 else 'right' if x < 0 else 'center')
+            percentage.set_position((0.6 * x, 0.6 * y))
+            percentage.set_text(f'{100 * size / total:1.1f}%')
+            theta1 = theta2
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="True Hourly Wage Calculator")
+    parser.add_argument('--no-preload', action='store_true',
+                        help="Don't warm up matplotlib in the background, load it when the first chart is drawn")
+    parser.add_argument('--startup-benchmark', action='store_true',
+                        help="Launch the app several times and report the time to first window as JSON")
+    parser.add_argument('--runs', type=int, default=5, help="Launches for --startup-benchmark")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE,
+                        help="How many distinct calculations to remember (0 turns the cache off)")
+    parser.add_argument('--profile', action='store_true',
+                        help="Time every stage and write stage stats and a Chrome trace on exit")
+    parser.add_argument('--cprofile', action='store_true', help="With --profile, also write a cProfile dump")
+    parser.add_argument('--profile-dir', help="Where --profile writes its files (default: ./truecost-profile)")
+    parser.add_argument('--time-to-window', action='store_true', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def startup_benchmark(runs=5):
+    """Time fresh launches of this app up to its first drawn window"""
+    if getattr(sys, 'frozen', False):
+        command = [sys.executable, '--time-to-window']  # PyInstaller build
+    else:
+        command = [sys.executable, os.path.abspath(__file__), '--time-to-window']
+    
+    samples = []
+    for _ in range(runs):
+        env = dict(os.environ, TRUECOST_LAUNCH_TIME=repr(time.time()))
+        output = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    
+    launch_ms = [sample['time_to_first_window_ms'] for sample in samples]
+    return {
+        'runs': runs,
+        'time_to_first_window_ms': {
+            'min': min(launch_ms),
+            'median': statistics.median(launch_ms),
+            'max': max(launch_ms),
+        },
+        'plotting_loaded_at_first_window': any(sample['plotting_loaded'] for sample in samples),
+        'samples': samples,
+    }
+
+
+def report_time_to_window(root):
+    """Print how long it took to get the first window on screen, then quit"""
+    root.update()
+    now = time.perf_counter()
+    launched = os.environ.get('TRUECOST_LAUNCH_TIME')
+    since_launch = (time.time() - float(launched)) * 1000 if launched else None
+    print(json.dumps({
+        'time_to_first_window_ms': round(since_launch if since_launch is not None else (now - STARTED) * 1000, 2),
+        'since_import_ms': round((now - STARTED) * 1000, 2),
+        'plotting_loaded': 'matplotlib' in sys.modules,
+    }))
+    root.destroy()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.profile or args.cprofile:
+        wage_profile.enable(cprofile=args.cprofile, output_dir=args.profile_dir)
+    if args.startup_benchmark:
+        print(json.dumps(startup_benchmark(args.runs), indent=2))
+        return
+    
     root = tk.Tk()
     style = ttk.Style()
     style.configure('TFrame', background='#f0f0f0')
@@ -587,7 +1049,12 @@ def main():
     style.configure('Accent.TButton', font=('Segoe UI', 12, 'bold'))  
     style.map('Accent.TButton', background=[('active', '#2980b9'), ('pressed', '#1c638e')])
     
-    app = TrueHourlyWageCalculator(root)
+    app = TrueHourlyWageCalculator(root, args.cache_size)
+    if args.time_to_window:
+        report_time_to_window(root)
+        return
+    if not args.no_preload:
+        root.after_idle(preload_plotting)
     root.mainloop()
 
 if __name__ == "__main__":
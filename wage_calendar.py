@@ -0,0 +1,183 @@
+"""Real calendar years instead of the 50 work weeks / 4.33 weeks per month approximations
+
+    schedule = Schedule(2026, holidays=('2026-01-01', '2026-12-25'), pto_days=15, wfh='0000100')
+    calculate_with_schedule(WageInputs(...), schedule)
+
+Weekday patterns are numpy style weekmasks, Monday first: '1111100' is
+Monday to Friday, 'Mon Wed Fri' works too. A pattern of several weeks
+('0000100 0001100') rotates week by week, starting with the week holding
+January 1st. Each day of the year is classified with datetime64 arrays;
+distinct schedules are only counted once, so a whole population of
+employees costs a lookup per person.
+"""
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+from wage_batch import BIWEEKLY, DAILY, MONTHLY, SEMI_MONTHLY, WEEKLY, calculate_batch, encode_pay_frequency
+from wage_core import PAY_FREQUENCIES, normalize_inputs
+
+WEEKDAY_NAMES = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+DEFAULT_WEEKDAYS = '1111100'
+NO_WFH = '0000000'
+
+
+@dataclass(frozen=True)
+class Schedule:
+    """One person's working year
+
+    weekdays None means the first work_days days of the week, e.g. Monday to
+    Friday for 5. PTO days are taken from office and home days in proportion.
+    pay_anchor is any payday for weekly and biweekly pay, by default the first
+    Friday of the year.
+    """
+    year: int
+    weekdays: str = None
+    holidays: tuple = ()
+    pto_days: float = 0
+    wfh: str = NO_WFH
+    pay_anchor: str = None
+
+    def days(self, work_days=5):
+        weekdays = self.weekdays or weekdays_for(work_days)
+        days = year_days(self.year, weekdays, self.wfh, self.pto_days, self.holidays)
+        return {name: float(value) for name, value in days.items()}
+
+
+def parse_weekmask(mask):
+    """Bool array for a weekmask, 7 entries per week of the rotation"""
+    text = str(mask).strip().lower()
+    if text[:3] in WEEKDAY_NAMES:
+        names = text.replace(',', ' ').split()
+        unknown = [name for name in names if name[:3] not in WEEKDAY_NAMES]
+        if unknown:
+            raise ValueError(f"Unknown weekday '{unknown[0]}'")
+        return np.array([day in {name[:3] for name in names} for day in WEEKDAY_NAMES])
+    digits = text.replace(' ', '').replace('|', '')
+    if not digits or len(digits) % 7 or set(digits) - {'0', '1'}:
+        raise ValueError(f"Bad weekday pattern '{mask}', expected 0/1 for each day Monday to Sunday")
+    return np.array([digit == '1' for digit in digits])
+
+
+def weekdays_for(work_days):
+    """Weekmask of the first work_days days of the week"""
+    days = min(max(int(round(float(work_days))), 0), 7)
+    return '1' * days + '0' * (7 - days)
+
+
+def year_dates(year):
+    return np.arange(np.datetime64(f'{year}-01-01'), np.datetime64(f'{year + 1}-01-01'))
+
+
+def _weekday(dates):
+    # 1970-01-01 was a Thursday
+    return (dates.astype(np.int64) + 3) % 7
+
+
+def weekday_counts(year, holidays=(), weeks=1):
+    """Days of the year that aren't holidays, by (week of the rotation, weekday)"""
+    dates = year_dates(year)
+    weekday = _weekday(dates)
+    week = (np.arange(len(dates)) + weekday[0]) // 7  # weeks since the Monday before January 1st
+    open_days = ~np.isin(dates, np.asarray(holidays, dtype='datetime64[D]'))
+    slots = (week % weeks) * 7 + weekday
+    return np.bincount(slots[open_days], minlength=weeks * 7).reshape(weeks, 7)
+
+
+def _pattern_days(year, holidays, weekdays, wfh):
+    """(work days, office days, days per week) for one weekday pattern and WFH pattern"""
+    work = parse_weekmask(weekdays)
+    home = parse_weekmask(wfh)
+    work_weeks, home_weeks = len(work) // 7, len(home) // 7
+    weeks = work_weeks * home_weeks // math.gcd(work_weeks, home_weeks)
+    work = np.tile(work, weeks * 7 // len(work))
+    home = np.tile(home, weeks * 7 // len(home))
+    counts = weekday_counts(year, holidays, weeks).ravel()
+    return counts[work].sum(), counts[work & ~home].sum(), work.sum() / weeks
+
+
+def year_days(year, weekdays=DEFAULT_WEEKDAYS, wfh=NO_WFH, pto_days=0, holidays=()):
+    """Days worked, commuted and worked from home in a year
+
+    weekdays, wfh and pto_days may be scalars or arrays with one entry per
+    person. Returns arrays:
+        work_days     days worked, after holidays and PTO
+        commute_days  of those, days at the workplace
+        wfh_days      of those, days at home
+        pto_days      PTO actually taken (no more than the scheduled days)
+        days_per_week scheduled days in an average week
+    """
+    weekdays = np.asarray(weekdays)
+    wfh = np.asarray(wfh)
+    pto_days = np.asarray(pto_days, dtype=np.float64)
+    shape = np.broadcast_shapes(weekdays.shape, wfh.shape, pto_days.shape)
+
+    # count each distinct pair of patterns once
+    weekday_names, weekday_codes = np.unique(weekdays.astype(str), return_inverse=True)
+    wfh_names, wfh_codes = np.unique(wfh.astype(str), return_inverse=True)
+    combined = weekday_codes.reshape(weekdays.shape) * len(wfh_names) + wfh_codes.reshape(wfh.shape)
+    pairs, pair_codes = np.unique(combined, return_inverse=True)
+    table = np.array([_pattern_days(year, holidays, weekday_names[pair // len(wfh_names)],
+                                    wfh_names[pair % len(wfh_names)]) for pair in pairs], dtype=np.float64)
+    pair_codes = pair_codes.reshape(combined.shape)
+    scheduled, office, per_week = (np.broadcast_to(table[pair_codes, i], shape) for i in range(3))
+
+    pto = np.minimum(np.maximum(pto_days, 0), scheduled)
+    work_days = scheduled - pto
+    share = np.divide(office, scheduled, out=np.zeros(shape), where=scheduled > 0)
+    commute_days = work_days * share
+    return {
+        'work_days': work_days,
+        'commute_days': commute_days,
+        'wfh_days': work_days - commute_days,
+        'pto_days': pto,
+        'days_per_week': per_week,
+    }
+
+
+def paydays(year, period, anchor=None):
+    """Paydays in the year for pay every period days, counted from a known payday"""
+    dates = year_dates(year)
+    if anchor is None:
+        anchor = dates[(4 - _weekday(dates[0])) % 7]  # first Friday
+    anchor = np.datetime64(anchor, 'D')
+    return int(np.count_nonzero((dates - anchor).astype(np.int64) % period == 0))
+
+
+def yearly_paychecks(year, pay_frequency, work_days, anchor=None):
+    """Paychecks each person receives in the year, daily pay counts the days worked"""
+    codes = encode_pay_frequency(pay_frequency)
+    table = np.zeros(len(PAY_FREQUENCIES))
+    table[WEEKLY] = paydays(year, 7, anchor)
+    table[BIWEEKLY] = paydays(year, 14, anchor)
+    table[SEMI_MONTHLY] = 24
+    table[MONTHLY] = 12
+    return np.where(codes == DAILY, work_days, table[codes])
+
+
+def calculate_calendar_batch(year, weekdays=None, wfh=NO_WFH, pto_days=0, holidays=(), pay_anchor=None,
+                             outputs=None, **inputs):
+    """calculate_batch() over a real year, the other keywords are its input columns
+
+    weekdays None gives everyone the first work_days days of the week. When
+    patterns are given, work_days becomes their average days per week.
+    """
+    derived = weekdays is None
+    if derived:
+        masks = np.array([weekdays_for(days) for days in range(8)])
+        weekdays = masks[np.clip(np.rint(np.asarray(inputs.get('work_days', 5), dtype=np.float64)), 0, 7).astype(int)]
+    days = year_days(year, weekdays, wfh, pto_days, holidays)
+    if not derived:
+        inputs['work_days'] = days['days_per_week']
+    paychecks = yearly_paychecks(year, inputs.get('pay_frequency', 'biweekly'), days['work_days'], pay_anchor)
+    return calculate_batch(yearly_paychecks=paychecks, work_days_per_year=days['work_days'],
+                           commute_days_per_year=days['commute_days'], outputs=outputs, **inputs)
+
+
+def calculate_with_schedule(inputs, schedule):
+    """WageResult for one person's inputs over the schedule's year"""
+    inputs = normalize_inputs(inputs)
+    batch = calculate_calendar_batch(schedule.year, schedule.weekdays, schedule.wfh, schedule.pto_days,
+                                     schedule.holidays, schedule.pay_anchor, **inputs.as_dict())
+    return batch.row(0)
@@ -0,0 +1,160 @@
+"""Multi-leg commutes, e.g. drive to a park-and-ride, take the train, walk the rest
+
+    chain = parse_chain("car 12mi 20min $4; public 35min; walking 0.4mi 8min")
+    calculate_chain(WageInputs(...), chain)
+
+Each leg has a mode, one-way distance and time, and its own extra cost per
+day (parking, a second fare). Running costs come from a per-mode table built
+once per batch from the usual inputs: dollars per mile for car and EV legs,
+and the daily fare or monthly pass once per day for any public transport.
+Batches of chains are padded 2-D leg arrays, so nothing loops per person.
+"""
+import re
+from dataclasses import dataclass
+
+import numpy as np
+
+from wage_batch import CAR, EV, PUBLIC, _safe_div, calculate_batch
+from wage_core import ASSUMPTIONS, TRANSPORT_ALIASES, TRANSPORT_TYPES, WageInputs, normalize_inputs
+
+# everyday names for the legs of a commute
+MODE_ALIASES = dict(TRANSPORT_ALIASES, drive='car', train='public', bus='public', subway='public',
+                    tram='public', metro='public', ferry='public', cycle='biking')
+
+NO_LEG = -1
+DEFAULT_INPUTS = WageInputs()
+
+
+@dataclass(frozen=True)
+class Leg:
+    """One part of the way to work, distance and time are one-way, cost is per day"""
+    mode: str
+    miles: float = 0
+    minutes: float = 0
+    cost: float = 0
+
+    def __post_init__(self):
+        mode = MODE_ALIASES.get(self.mode, self.mode)
+        if mode not in TRANSPORT_TYPES:
+            raise ValueError(f"Unknown commute mode '{self.mode}'")
+        object.__setattr__(self, 'mode', mode)
+
+
+_LEG_TOKEN = re.compile(r'^(?:\$(?P<cost>[\d.]+)|(?P<miles>[\d.]+)mi|(?P<minutes>[\d.]+)min)$')
+
+
+def parse_chain(text):
+    """Legs from "car 12mi 20min $4; train 35min; walk 8min", separated by ; or >"""
+    legs = []
+    for part in re.split(r'[;>]', text):
+        tokens = part.split()
+        if not tokens:
+            continue
+        values = {}
+        for token in tokens[1:]:
+            match = _LEG_TOKEN.match(token.lower())
+            if match is None:
+                raise ValueError(f"Can't read '{token}' in leg '{part.strip()}', use 12mi, 20min or $4")
+            values.update({name: float(value) for name, value in match.groupdict().items() if value})
+        legs.append(Leg(tokens[0].lower(), **values))
+    if not legs:
+        raise ValueError("A commute needs at least one leg")
+    return tuple(legs)
+
+
+def chain_columns(chains, max_legs=None):
+    """Padded (people, legs) arrays for a list of chains, missing legs have mode NO_LEG"""
+    width = max_legs or max((len(chain) for chain in chains), default=1)
+    columns = {
+        'leg_mode': np.full((len(chains), width), NO_LEG, dtype=np.intp),
+        'leg_miles': np.zeros((len(chains), width)),
+        'leg_minutes': np.zeros((len(chains), width)),
+        'leg_cost': np.zeros((len(chains), width)),
+    }
+    for row, chain in enumerate(chains):
+        if len(chain) > width:
+            raise ValueError(f"Commute {row} has {len(chain)} legs, more than {width}")
+        for column, leg in enumerate(chain):
+            columns['leg_mode'][row, column] = TRANSPORT_TYPES.index(leg.mode)
+            columns['leg_miles'][row, column] = leg.miles
+            columns['leg_minutes'][row, column] = leg.minutes
+            columns['leg_cost'][row, column] = leg.cost
+    return columns
+
+
+def mode_cost_table(gas_mileage=DEFAULT_INPUTS.gas_mileage,
+                    gas_price=DEFAULT_INPUTS.gas_price,
+                    ev_efficiency=DEFAULT_INPUTS.ev_efficiency,
+                    electricity_price=DEFAULT_INPUTS.electricity_price,
+                    daily_public_cost=DEFAULT_INPUTS.daily_public_cost,
+                    monthly_pass_cost=DEFAULT_INPUTS.monthly_pass_cost,
+                    use_monthly_pass=DEFAULT_INPUTS.use_monthly_pass,
+                    work_days=DEFAULT_INPUTS.work_days):
+    """(per mile, per day) cost of every mode, shape (..., len(TRANSPORT_TYPES)) each
+
+    The per day cost is paid once a day however many legs use the mode.
+    Rates left out take the WageInputs (GUI) defaults, as in calculate_batch().
+    """
+    per_mile_car = _safe_div(np.asarray(gas_price, dtype=np.float64), np.asarray(gas_mileage, dtype=np.float64))
+    per_mile_ev = _safe_div(np.asarray(electricity_price, dtype=np.float64),
+                            np.asarray(ev_efficiency, dtype=np.float64))
+    pass_cost = _safe_div(np.asarray(monthly_pass_cost, dtype=np.float64),
+                          np.asarray(work_days, dtype=np.float64) * ASSUMPTIONS['weeks_per_month'])
+    fare = np.where(use_monthly_pass, pass_cost, daily_public_cost)
+
+    shape = np.broadcast_shapes(per_mile_car.shape, per_mile_ev.shape, fare.shape)
+    per_mile = np.zeros(shape + (len(TRANSPORT_TYPES),))
+    per_day = np.zeros(shape + (len(TRANSPORT_TYPES),))
+    per_mile[..., CAR] = per_mile_car
+    per_mile[..., EV] = per_mile_ev
+    per_day[..., PUBLIC] = fare
+    return per_mile, per_day
+
+
+def evaluate_legs(leg_mode, leg_miles, leg_minutes, leg_cost, per_mile, per_day):
+    """One-way minutes, daily transport cost and main mode for each row of legs"""
+    leg_mode = np.atleast_2d(np.asarray(leg_mode, dtype=np.intp))
+    people = leg_mode.shape[0]
+    valid = leg_mode != NO_LEG
+    mode = np.where(valid, leg_mode, 0)
+    leg_miles = np.where(valid, leg_miles, 0.0)
+    rows = np.arange(people)[:, None]
+
+    per_mile = np.broadcast_to(per_mile, (people, len(TRANSPORT_TYPES)))
+    per_day = np.broadcast_to(per_day, (people, len(TRANSPORT_TYPES)))
+    running = (leg_miles * 2 * per_mile[rows, mode]).sum(axis=1)
+
+    used = np.zeros((people, len(TRANSPORT_TYPES)), dtype=bool)
+    used[np.broadcast_to(rows, mode.shape)[valid], mode[valid]] = True
+    daily = (per_day * used).sum(axis=1)
+
+    leg_minutes = np.where(valid, leg_minutes, -1.0)
+    extras = np.where(valid, leg_cost, 0.0).sum(axis=1)
+    # the longest leg names the commute
+    main_mode = mode[np.arange(people), leg_minutes.argmax(axis=1)]
+    return np.maximum(leg_minutes, 0).sum(axis=1), running + daily + extras, main_mode
+
+
+def calculate_chain_batch(leg_mode, leg_miles, leg_minutes, leg_cost, outputs=None, **inputs):
+    """calculate_batch() for rows of multi-leg commutes, the other keywords are its inputs
+
+    commute_minutes, transport_type and walking_minutes are replaced by the
+    legs; walking to a stop is a walking leg of its own.
+    """
+    rates = {name: inputs[name] for name in ('gas_mileage', 'gas_price', 'ev_efficiency', 'electricity_price',
+                                             'daily_public_cost', 'monthly_pass_cost', 'use_monthly_pass',
+                                             'work_days') if name in inputs}
+    per_mile, per_day = mode_cost_table(**rates)
+    minutes, cost, main_mode = evaluate_legs(leg_mode, leg_miles, leg_minutes, leg_cost, per_mile, per_day)
+    inputs.update(commute_minutes=minutes, transport_type=main_mode, walking_minutes=0,
+                  daily_transport_cost=cost)
+    return calculate_batch(outputs=outputs, **inputs)
+
+
+def calculate_chain(inputs, chain):
+    """WageResult for one person commuting by a chain of legs"""
+    if isinstance(chain, str):
+        chain = parse_chain(chain)
+    inputs = normalize_inputs(inputs).as_dict()
+    batch = calculate_chain_batch(**chain_columns([chain]), **inputs)
+    return batch.row(0)
@@ -0,0 +1,335 @@
+"""Columnar result files, for archiving big runs and loading them back without parsing text
+
+    write_results('nightly.tcol', batch)       # a ResultBatch or a column dict
+    columns = read_columns('nightly.tcol')     # memory mapped, nothing is copied
+
+.arrow/.feather (Arrow IPC) and .parquet files are written with pyarrow when
+it is installed. The .tcol format needs nothing but numpy: every column is
+one raw little-endian buffer, 64-byte aligned, with a JSON footer naming the
+columns, so reloading a column is a view into a memory map. Pay frequency
+and transport type are stored as their integer codes (dictionary arrays in
+Arrow), which calculate_batch() and ResultBatch take as they are.
+"""
+import json
+import os
+import shutil
+import struct
+import tempfile
+
+import numpy as np
+
+from wage_batch import INPUT_FIELDS, OUTPUT_FIELDS, ResultBatch, calculate_batch, encode_pay_frequency, encode_transport
+from wage_bulk import COLUMNAR_FORMATS, detect_format, output_columns
+from wage_core import OUTPUT_COLUMNS, PAY_FREQUENCIES, TRANSPORT_TYPES
+from wage_profile import stage
+
+MAGIC = b'TRUECOL1'
+ALIGNMENT = 64
+VERSION = 1
+METADATA_KEY = b'truecost'
+
+# columns of names, stored as codes into these tables
+CATEGORIES = {'pay_frequency': PAY_FREQUENCIES, 'transport_type': TRANSPORT_TYPES}
+_ENCODERS = {'pay_frequency': encode_pay_frequency, 'transport_type': encode_transport}
+
+
+def _format(path, fmt):
+    fmt = fmt or detect_format(path, default='tcol')
+    if fmt not in COLUMNAR_FORMATS:
+        raise ValueError(f"Unknown columnar format '{fmt}', expected one of {', '.join(COLUMNAR_FORMATS)}")
+    return fmt
+
+
+def _pyarrow(fmt):
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+        if fmt == 'parquet':
+            import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        raise ValueError(f"{fmt} files need pyarrow (pip install pyarrow), .tcol files don't") from None
+    return pyarrow
+
+
+def _padding(offset):
+    return -offset % ALIGNMENT
+
+
+def batch_columns(batch):
+    """Flat column dict of a ResultBatch, inputs first, scalar inputs repeated for every row"""
+    rows = len(batch)
+    columns = {name: np.broadcast_to(batch.inputs[name], (rows,)) for name in INPUT_FIELDS if name in batch.inputs}
+    columns.update(output_columns(batch.columns))
+    return columns
+
+
+def prepare_columns(columns):
+    """One 1-D array per column, all the same length, names turned into codes"""
+    if isinstance(columns, ResultBatch):
+        columns = batch_columns(columns)
+    prepared = {}
+    rows = None
+    for name, values in columns.items():
+        if name in _ENCODERS:
+            array = _ENCODERS[name](values).astype(np.int8)
+        else:
+            array = np.asarray(values)
+            if array.dtype.kind not in 'biuf':
+                raise ValueError(f"Column '{name}' isn't numeric, only numbers and booleans can be stored")
+        if array.ndim != 1:
+            raise ValueError(f"Column '{name}' has shape {array.shape}, expected one value per row")
+        if rows is None:
+            rows = len(array)
+        elif len(array) != rows:
+            raise ValueError(f"Column '{name}' has {len(array)} rows, expected {rows}")
+        prepared[name] = array
+    return prepared
+
+
+class ColumnWriter:
+    """Append chunks of columns to one file, the file is complete once close()d
+
+    The first chunk fixes the column names and types. Use as a context
+    manager; a run that fails leaves no half written file behind.
+    """
+
+    def __init__(self, path, fmt=None, metadata=None):
+        self.path = path
+        self.format = _format(path, fmt)
+        self.metadata = dict(metadata or {})
+        self.rows = 0
+        self.dtypes = None
+        self._spools = None
+        self._writer = None
+        self._created = False
+        if self.format != 'tcol':
+            _pyarrow(self.format)  # fail before any work is done
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None:
+            self.abort()
+            return
+        try:
+            self.close()
+        except BaseException:
+            self.abort()
+            raise
+
+    def write(self, columns):
+        """Append a ResultBatch or a column dict, returns its number of rows"""
+        columns = prepare_columns(columns)
+        if self.dtypes is None:
+            self.dtypes = {name: array.dtype.newbyteorder('<') for name, array in columns.items()}
+        elif list(columns) != list(self.dtypes):
+            raise ValueError("Every chunk needs the same columns in the same order")
+        columns = {name: array.astype(self.dtypes[name], copy=False) for name, array in columns.items()}
+        rows = len(next(iter(columns.values()))) if columns else 0
+
+        if self.format == 'tcol':
+            # one spool file per column so each ends up as a single buffer
+            if self._spools is None:
+                folder = os.path.dirname(os.path.abspath(self.path))
+                self._spools = {name: tempfile.TemporaryFile(dir=folder) for name in columns}
+            for name, array in columns.items():
+                self._spools[name].write(np.ascontiguousarray(array).data)
+        else:
+            self._write_arrow(columns)
+        self.rows += rows
+        return rows
+
+    def _write_arrow(self, columns):
+        pa = _pyarrow(self.format)
+        arrays = []
+        for name, array in columns.items():
+            if name in CATEGORIES:
+                arrays.append(pa.DictionaryArray.from_arrays(pa.array(array), pa.array(list(CATEGORIES[name]))))
+            else:
+                arrays.append(pa.array(array))
+        batch = pa.RecordBatch.from_arrays(arrays, names=list(columns))
+        if self._writer is None:
+            self._open_arrow(batch.schema)
+        if self.format == 'parquet':
+            self._writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            self._writer.write_batch(batch)
+
+    def _open_arrow(self, schema):
+        pa = _pyarrow(self.format)
+        schema = schema.with_metadata({METADATA_KEY: json.dumps(self.metadata)})
+        self._created = True
+        if self.format == 'parquet':
+            self._writer = pa.parquet.ParquetWriter(self.path, schema)
+        else:
+            self._writer = pa.ipc.new_file(self.path, schema)
+
+    def close(self):
+        if self.format == 'tcol':
+            self._finish_tcol()
+            return
+        if self._writer is None:
+            self._open_arrow(_pyarrow(self.format).schema([]))  # an empty run still leaves a valid file
+        self._writer.close()
+        self._writer = None
+
+    def abort(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        for spool in (self._spools or {}).values():
+            spool.close()
+        self._spools = None
+        if self._created and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _finish_tcol(self):
+        entries = []
+        self._created = True
+        with open(self.path, 'wb') as target:
+            target.write(MAGIC + bytes(_padding(len(MAGIC))))
+            for name, spool in (self._spools or {}).items():
+                offset = target.tell()
+                spool.seek(0)
+                shutil.copyfileobj(spool, target, 1 << 20)
+                spool.close()
+                entry = {'name': name, 'dtype': self.dtypes[name].str, 'offset': offset}
+                if name in CATEGORIES:
+                    entry['categories'] = list(CATEGORIES[name])
+                entries.append(entry)
+                target.write(bytes(_padding(target.tell())))
+            footer = json.dumps({'version': VERSION, 'rows': self.rows, 'columns': entries,
+                                 'metadata': self.metadata}).encode('utf-8')
+            target.write(footer)
+            target.write(struct.pack('<Q', len(footer)) + MAGIC)
+        self._spools = None
+
+
+def write_results(path, results, fmt=None, metadata=None):
+    """Write one ResultBatch or column dict, returns the number of rows"""
+    with ColumnWriter(path, fmt, metadata) as writer:
+        writer.write(results)
+    return writer.rows
+
+
+def write_chunks(path, chunks, fmt=None, metadata=None):
+    """Write column dicts as they arrive (bulk mode), returns the number of rows"""
+    with ColumnWriter(path, fmt, metadata) as writer:
+        for columns in chunks:
+            with stage('write_chunk'):
+                writer.write(columns)
+    return writer.rows
+
+
+def _tcol_footer(path):
+    with open(path, 'rb') as source:
+        source.seek(0, os.SEEK_END)
+        size = source.tell()
+        if size < 2 * len(MAGIC) + 8:
+            raise ValueError(f"{path} is not a .tcol file")
+        source.seek(size - len(MAGIC) - 8)
+        tail = source.read()
+        source.seek(0)
+        head = source.read(len(MAGIC))
+        if head != MAGIC or tail[8:] != MAGIC:
+            raise ValueError(f"{path} is not a .tcol file")
+        length, = struct.unpack('<Q', tail[:8])
+        source.seek(size - len(MAGIC) - 8 - length)
+        return json.loads(source.read(length).decode('utf-8'))
+
+
+def _read_tcol(path, names):
+    footer = _tcol_footer(path)
+    rows = footer['rows']
+    entries = {entry['name']: entry for entry in footer['columns']}
+    buffer = np.memmap(path, dtype=np.uint8, mode='r')
+    columns = {}
+    categories = {}
+    for name in names or entries:
+        if name not in entries:
+            raise ValueError(f"{path} has no column '{name}'")
+        entry = entries[name]
+        dtype = np.dtype(entry['dtype'])
+        start = entry['offset']
+        columns[name] = buffer[start:start + rows * dtype.itemsize].view(dtype)
+        if 'categories' in entry:
+            categories[name] = entry['categories']
+    return columns, categories
+
+
+def _read_arrow(path, fmt, names):
+    pa = _pyarrow(fmt)
+    if fmt == 'parquet':
+        table = pa.parquet.read_table(path, columns=names, memory_map=True)
+    else:
+        table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+        if names:
+            table = table.select(names)
+    columns = {}
+    categories = {}
+    for name in table.column_names:
+        chunked = table.column(name)
+        array = chunked.chunk(0) if chunked.num_chunks == 1 else chunked.combine_chunks()
+        if pa.types.is_dictionary(array.type):
+            categories[name] = array.dictionary.to_pylist()
+            array = array.indices
+        columns[name] = array.to_numpy(zero_copy_only=False)
+    return columns, categories
+
+
+def read_columns(path, names=None, fmt=None, decode=False):
+    """Column dict of a columnar file, only the columns in names if given
+
+    .tcol columns are read-only views of a memory map. Pay frequency and
+    transport type come back as codes, or as names with decode=True.
+    """
+    fmt = _format(path, fmt)
+    if fmt == 'tcol':
+        columns, categories = _read_tcol(path, names)
+    else:
+        columns, categories = _read_arrow(path, fmt, names)
+    if decode:
+        for name, table in categories.items():
+            columns[name] = np.array(table)[columns[name]]
+    return columns
+
+
+def read_metadata(path, fmt=None):
+    """The metadata dict given when the file was written"""
+    fmt = _format(path, fmt)
+    if fmt == 'tcol':
+        return _tcol_footer(path)['metadata']
+    pa = _pyarrow(fmt)
+    if fmt == 'parquet':
+        schema = pa.parquet.read_schema(path)
+    else:
+        schema = pa.ipc.open_file(pa.memory_map(path, 'r')).schema
+    return json.loads((schema.metadata or {}).get(METADATA_KEY, b'{}'))
+
+
+def read_results(path, fmt=None, verify=False):
+    """A file written from a ResultBatch (or by bulk mode) back as a ResultBatch
+
+    With verify=True the results are recalculated from the stored inputs and
+    checked against the stored outputs (see verify_results).
+    """
+    columns = read_columns(path, fmt=fmt)
+    outputs = {name: columns[OUTPUT_COLUMNS.get(name, name)] for name in OUTPUT_FIELDS
+               if OUTPUT_COLUMNS.get(name, name) in columns}
+    inputs = {name: columns[name] for name in INPUT_FIELDS if name in columns}
+    batch = ResultBatch(outputs, inputs)
+    if verify:
+        verify_results(batch)
+    return batch
+
+
+def verify_results(batch):
+    """Recalculate a ResultBatch from its inputs, ValueError naming any output that comes out different"""
+    if 'paycheck' not in batch.inputs:
+        raise ValueError("No paycheck column stored, the results can't be recalculated")
+    recalculated = calculate_batch(**batch.inputs, outputs=list(batch.columns))
+    different = [name for name in batch.columns
+                 if not np.allclose(batch[name], recalculated[name], equal_nan=True)]
+    if different:
+        raise ValueError(f"Stored results don't match their inputs: {', '.join(different)}")
@@ -0,0 +1,177 @@
+"""Every transport option side by side, ranked, with the break-even points between them
+
+    comparison = compare(WageInputs(...), variants={'Old car': {'transport_type': 'car', 'gas_mileage': 18}})
+    print(comparison.table())
+
+All options, and the probes behind the break-even points, are one
+calculate_batch() call. Break-evens are exact: the true wage is affine in
+every price, so two points on the line give where it crosses the other option.
+"""
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from wage_batch import calculate_batch
+from wage_core import TRANSPORT_NAMES, normalize_inputs
+
+# inputs the true wage is affine in, so a break-even is one division away
+AFFINE_PARAMETERS = ('paycheck', 'gas_price', 'electricity_price', 'daily_public_cost', 'monthly_pass_cost',
+                     'daily_other_costs')
+
+DAILY_FARE = 'Public Transport (daily fare)'
+MONTHLY_PASS = 'Public Transport (monthly pass)'
+
+# (option, its price, the option it is compared with) shown by default when both options exist
+DEFAULT_BREAK_EVENS = (
+    (TRANSPORT_NAMES['car'], 'gas_price', TRANSPORT_NAMES['ev']),
+    (TRANSPORT_NAMES['ev'], 'electricity_price', TRANSPORT_NAMES['car']),
+    (DAILY_FARE, 'daily_public_cost', TRANSPORT_NAMES['car']),
+    (MONTHLY_PASS, 'monthly_pass_cost', DAILY_FARE),
+)
+
+
+def default_options():
+    """One option per transport type, public transport once with each kind of fare"""
+    return {
+        TRANSPORT_NAMES['car']: {'transport_type': 'car'},
+        TRANSPORT_NAMES['ev']: {'transport_type': 'ev'},
+        DAILY_FARE: {'transport_type': 'public', 'use_monthly_pass': False},
+        MONTHLY_PASS: {'transport_type': 'public', 'use_monthly_pass': True},
+        TRANSPORT_NAMES['biking']: {'transport_type': 'biking'},
+        TRANSPORT_NAMES['walking']: {'transport_type': 'walking'},
+    }
+
+
+def option_for(inputs):
+    """Name of the default option matching these inputs"""
+    if inputs.transport_type == 'public':
+        return MONTHLY_PASS if inputs.use_monthly_pass else DAILY_FARE
+    return TRANSPORT_NAMES[inputs.transport_type]
+
+
+@dataclass(frozen=True)
+class BreakEven:
+    """option's true wage equals against's when its parameter is value, None when it never does"""
+    option: str
+    parameter: str
+    against: str
+    value: float
+    current: float
+    ahead: bool
+
+    def describe(self):
+        name = self.parameter.replace('_', ' ')
+        side = "ahead of" if self.ahead else "behind"
+        if self.value is None:
+            return f"{self.option} stays {side} {self.against} whatever its {name}"
+        if self.value < 0:
+            return f"{self.option} stays {side} {self.against} at any {name}"
+        article = "an" if name[0] in "aeiou" else "a"
+        return (f"{self.option} breaks even with {self.against} at {article} {name} of ${self.value:,.2f} "
+                f"(now ${self.current:,.2f})")
+
+
+class Comparison:
+    """Results for every option, ranked by true wage and by commute cost per committed hour"""
+
+    def __init__(self, names, inputs, results, break_evens):
+        self.names = names
+        self.inputs = inputs
+        self.results = results
+        self.break_evens = break_evens
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def true_wage(self):
+        return self.results['true_wage']
+
+    @property
+    def cost_per_hour(self):
+        """Yearly commute costs spread over every committed hour, work and commute"""
+        cost = self.results['yearly_commute_costs']
+        hours = self.results['total_committed_hours']
+        return np.divide(cost, hours, out=np.zeros(len(self.names)), where=hours > 0)
+
+    def ranked(self, by='true_wage'):
+        """Row indices, best first: highest true wage, or lowest cost per committed hour"""
+        if by == 'true_wage':
+            return np.argsort(-self.true_wage, kind='stable')
+        if by == 'cost_per_hour':
+            return np.argsort(self.cost_per_hour, kind='stable')
+        raise ValueError(f"Can't rank by '{by}', use true_wage or cost_per_hour")
+
+    def rows(self, by='true_wage'):
+        cost_rank = np.empty(len(self.names), dtype=int)
+        cost_rank[self.ranked('cost_per_hour')] = np.arange(1, len(self.names) + 1)
+        cost_per_hour = self.cost_per_hour
+        for rank, index in enumerate(self.ranked(by), 1):
+            yield {
+                'rank': rank,
+                'option': self.names[index],
+                'transport_type': self.inputs[index].transport_type,
+                'true_wage': float(self.true_wage[index]),
+                'daily_commute_cost': float(self.results['daily_commute_cost'][index]),
+                'yearly_commute_costs': float(self.results['yearly_commute_costs'][index]),
+                'yearly_commute_hours': float(self.results['yearly_commute_hours'][index]),
+                'cost_per_committed_hour': float(cost_per_hour[index]),
+                'cost_rank': int(cost_rank[index]),
+            }
+
+    def best(self, by='true_wage'):
+        return self.names[self.ranked(by)[0]]
+
+    def table(self, by='true_wage'):
+        """The ranking as aligned text"""
+        lines = [f"{'#':>2}  {'Option':34} {'True wage':>10} {'Cost/day':>9} {'Cost/yr':>10} {'$/hr':>6} {'Cost #':>6}"]
+        for row in self.rows(by):
+            lines.append(f"{row['rank']:>2}  {row['option']:34} {row['true_wage']:>10.2f} "
+                         f"{row['daily_commute_cost']:>9.2f} {row['yearly_commute_costs']:>10,.0f} "
+                         f"{row['cost_per_committed_hour']:>6.2f} {row['cost_rank']:>6}")
+        lines.extend(break_even.describe() for break_even in self.break_evens)
+        return "\n".join(lines)
+
+
+def compare(inputs, variants=None, include_defaults=True, break_evens=None):
+    """Calculate every option for one person in one batch
+
+    variants maps a name to the inputs it changes, e.g. a second car or a
+    different pass. break_evens is a list of (option, parameter, against)
+    triples, by default the ones in DEFAULT_BREAK_EVENS that apply.
+    """
+    base = normalize_inputs(inputs)
+    options = default_options() if include_defaults else {}
+    options.update(variants or {})
+    if not options:
+        raise ValueError("Nothing to compare")
+    names = list(options)
+    records = [normalize_inputs(replace(base, **changes)) for changes in options.values()]
+
+    if break_evens is None:
+        break_evens = [triple for triple in DEFAULT_BREAK_EVENS if triple[0] in options and triple[2] in options]
+    probes = []
+    for option, parameter, against in break_evens:
+        if parameter not in AFFINE_PARAMETERS:
+            raise ValueError(f"No closed form break-even for '{parameter}', "
+                             f"use one of {', '.join(AFFINE_PARAMETERS)}")
+        if option not in options or against not in options:
+            raise ValueError(f"Unknown option in break-even {option!r} vs {against!r}")
+        record = records[names.index(option)]
+        probes.append(replace(record, **{parameter: getattr(record, parameter) + 1}))
+
+    # the options and a probe per break-even, all at once
+    every = records + probes
+    columns = {name: [getattr(record, name) for record in every] for name in base.as_dict()}
+    results = calculate_batch(**columns)
+    wages = results['true_wage']
+
+    found = []
+    for probe, (option, parameter, against) in enumerate(break_evens, len(records)):
+        own, other = wages[names.index(option)], wages[names.index(against)]
+        current = getattr(records[names.index(option)], parameter)
+        slope = wages[probe] - own
+        value = None if slope == 0 else float(current + (other - own) / slope)
+        found.append(BreakEven(option, parameter, against, value, current, bool(own >= other)))
+
+    return Comparison(names, records, {name: column[:len(records)] for name, column in results.items()}, found)
@@ -0,0 +1,312 @@
+"""Headless true hourly wage calculation shared by the CLI, the GUI and services"""
+import weakref
+from dataclasses import dataclass, asdict, fields, replace
+
+TRANSPORT_TYPES = ('car', 'ev', 'public', 'biking', 'walking')
+PAY_FREQUENCIES = ('daily', 'weekly', 'biweekly', 'semi_monthly', 'monthly')
+
+# older spellings still accepted on input
+TRANSPORT_ALIASES = {'public_transport': 'public', 'gas': 'car', 'bike': 'biking', 'walk': 'walking'}
+
+TRANSPORT_NAMES = {
+    'car': 'Car (Gas)',
+    'ev': 'Electric Vehicle',
+    'public': 'Public Transport',
+    'biking': 'Biking',
+    'walking': 'Walking',
+}
+
+# yearly figures are built from these, change them with set_assumption()
+DEFAULT_ASSUMPTIONS = {
+    'work_weeks_per_year': 50,
+    'weeks_per_month': 4.33,  # turns a monthly pass into a daily cost
+}
+ASSUMPTIONS = dict(DEFAULT_ASSUMPTIONS)
+
+# paychecks per year, weekly pay follows work_weeks_per_year and daily pay is scaled by days worked
+PAYCHECKS_PER_YEAR = {
+    'biweekly': 26,
+    'semi_monthly': 24,
+    'monthly': 12,
+}
+
+_assumption_listeners = []
+
+
+def set_assumption(name, value):
+    """Change one of ASSUMPTIONS and tell every listener (e.g. result caches)"""
+    if name not in ASSUMPTIONS:
+        raise KeyError(f"Unknown assumption '{name}', expected one of {', '.join(ASSUMPTIONS)}")
+    if ASSUMPTIONS[name] == value:
+        return
+    ASSUMPTIONS[name] = value
+    for ref in list(_assumption_listeners):
+        callback = ref()
+        if callback is None:
+            _assumption_listeners.remove(ref)
+        else:
+            callback(name, value)
+
+
+def reset_assumptions():
+    for name, value in DEFAULT_ASSUMPTIONS.items():
+        set_assumption(name, value)
+
+
+def on_assumption_change(callback):
+    """Call callback(name, value) whenever an assumption changes, held by weak reference"""
+    if hasattr(callback, '__self__'):
+        _assumption_listeners.append(weakref.WeakMethod(callback))
+    else:
+        _assumption_listeners.append(weakref.ref(callback))
+
+
+def paychecks_per_year(pay_frequency):
+    """Paychecks in a year for every frequency except daily"""
+    if pay_frequency == 'weekly':
+        return ASSUMPTIONS['work_weeks_per_year']
+    return PAYCHECKS_PER_YEAR[pay_frequency]
+
+
+@dataclass(frozen=True)
+class WageInputs:
+    """Everything needed for one calculation, defaults match the GUI"""
+    paycheck: float = 2000
+    pay_frequency: str = 'biweekly'
+    daily_hours: float = 8
+    work_days: float = 5
+    commute_minutes: float = 30
+    transport_type: str = 'car'
+    daily_miles: float = 10
+    gas_mileage: float = 25
+    gas_price: float = 3.50
+    ev_efficiency: float = 4.0
+    electricity_price: float = 0.15
+    daily_public_cost: float = 5.50
+    monthly_pass_cost: float = 100
+    use_monthly_pass: bool = False
+    walking_minutes: float = 10
+    daily_other_costs: float = 5
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build inputs from a dict of (possibly string) values, unknown keys are ignored"""
+        values = {}
+        for name, kind in _INPUT_TYPES:
+            value = data.get(name)
+            if value is None or value == '':
+                continue
+            if kind is bool:
+                if isinstance(value, str):
+                    value = value.strip().lower() in ('1', 'true', 'yes', 'y')
+                value = bool(value)
+            elif kind is str:
+                value = str(value).strip()
+            else:
+                value = float(value)
+            values[name] = value
+        return cls(**values)
+
+    def as_dict(self):
+        return asdict(self)
+
+
+# looked up once, from_dict runs for every record in bulk mode
+_INPUT_TYPES = tuple((field.name, field.type) for field in fields(WageInputs))
+
+
+RESULT_FIELDS = (
+    'annual_income',
+    'commute_minutes',
+    'daily_commute_hours',
+    'daily_transport_cost',
+    'daily_commute_cost',
+    'weekly_work_hours',
+    'weekly_commute_hours',
+    'weekly_commute_costs',
+    'yearly_work_hours',
+    'yearly_commute_hours',
+    'yearly_commute_costs',
+    'net_yearly_income',
+    'total_committed_hours',
+    'traditional_wage',
+    'true_wage',
+)
+# results named like an input get a column of their own next to the inputs (the result's
+# commute_minutes includes walking), so every row can be recalculated from what is stored with it
+OUTPUT_COLUMNS = {'commute_minutes': 'one_way_minutes'}
+
+
+class WageResult:
+    """Derived figures for one calculation
+
+    Slotted so millions of them stay small, treat them as read-only since
+    caches hand out shared instances. Nothing is formatted until asked for.
+    """
+    __slots__ = ('inputs',) + RESULT_FIELDS
+
+    def __init__(self, inputs, **values):
+        self.inputs = inputs
+        for name in RESULT_FIELDS:
+            setattr(self, name, values[name])
+
+    def __repr__(self):
+        return f"WageResult(true_wage={self.true_wage!r}, traditional_wage={self.traditional_wage!r}, inputs={self.inputs!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, WageResult):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None
+
+    @property
+    def transport_type(self):
+        return self.inputs.transport_type
+
+    @property
+    def wage_difference(self):
+        return self.traditional_wage - self.true_wage
+
+    @property
+    def commute_cost_percentage(self):
+        if self.annual_income > 0:
+            return (self.yearly_commute_costs / self.annual_income) * 100
+        return 0
+
+    def with_inputs(self, inputs):
+        """Same figures for a different (equivalent) set of inputs"""
+        return WageResult(inputs, **{name: getattr(self, name) for name in RESULT_FIELDS})
+
+    def as_dict(self):
+        """Flat dict of the inputs followed by the results, results named by OUTPUT_COLUMNS"""
+        data = self.inputs.as_dict()
+        for name in RESULT_FIELDS:
+            data[OUTPUT_COLUMNS.get(name, name)] = getattr(self, name)
+        return data
+
+
+def normalize_inputs(inputs):
+    """Return inputs with canonical transport/pay names, raising ValueError on unknown ones"""
+    transport_type = TRANSPORT_ALIASES.get(inputs.transport_type, inputs.transport_type)
+    if transport_type not in TRANSPORT_TYPES:
+        raise ValueError(f"Unknown transport type '{inputs.transport_type}'")
+    if inputs.pay_frequency not in PAY_FREQUENCIES:
+        raise ValueError(f"Unknown pay frequency '{inputs.pay_frequency}'")
+    if transport_type != inputs.transport_type:
+        inputs = replace(inputs, transport_type=transport_type)
+    return inputs
+
+
+def annual_income_for(paycheck, pay_frequency, work_days):
+    if pay_frequency == 'daily':
+        return paycheck * work_days * ASSUMPTIONS['work_weeks_per_year']
+    return paycheck * paychecks_per_year(pay_frequency)
+
+
+def daily_transport_cost_for(inputs):
+    """Daily cost of the transport itself, not counting other costs"""
+    transport_type = inputs.transport_type
+    round_trip_miles = inputs.daily_miles * 2
+
+    if transport_type == 'car':
+        if inputs.gas_mileage > 0:
+            return (round_trip_miles / inputs.gas_mileage) * inputs.gas_price
+    elif transport_type == 'ev':
+        if inputs.ev_efficiency > 0:
+            return (round_trip_miles / inputs.ev_efficiency) * inputs.electricity_price
+    elif transport_type == 'public':
+        if not inputs.use_monthly_pass:
+            return inputs.daily_public_cost
+        if inputs.work_days > 0:
+            return inputs.monthly_pass_cost / (inputs.work_days * ASSUMPTIONS['weeks_per_month'])
+    return 0
+
+
+def calculate(inputs):
+    """Calculate the true hourly wage for one WageInputs record"""
+    inputs = normalize_inputs(inputs)
+    work_days = inputs.work_days
+
+    annual_income = annual_income_for(inputs.paycheck, inputs.pay_frequency, work_days)
+
+    # walking to/from stations only counts for public transport
+    commute_minutes = inputs.commute_minutes
+    if inputs.transport_type == 'public':
+        commute_minutes += inputs.walking_minutes
+    daily_commute_hours = (commute_minutes * 2) / 60  # round trip
+
+    daily_transport_cost = daily_transport_cost_for(inputs)
+    daily_commute_cost = daily_transport_cost + inputs.daily_other_costs
+
+    # yearly
+    weekly_work_hours = inputs.daily_hours * work_days
+    weekly_commute_hours = daily_commute_hours * work_days
+    weekly_commute_costs = daily_commute_cost * work_days
+
+    work_weeks_per_year = ASSUMPTIONS['work_weeks_per_year']
+    yearly_work_hours = weekly_work_hours * work_weeks_per_year
+    yearly_commute_hours = weekly_commute_hours * work_weeks_per_year
+    yearly_commute_costs = weekly_commute_costs * work_weeks_per_year
+
+    # wage calculations
+    traditional_wage = annual_income / yearly_work_hours if yearly_work_hours > 0 else 0
+    net_yearly_income = annual_income - yearly_commute_costs
+    total_committed_hours = yearly_work_hours + yearly_commute_hours
+    true_wage = net_yearly_income / total_committed_hours if total_committed_hours > 0 else 0
+
+    return WageResult(
+        inputs=inputs,
+        annual_income=annual_income,
+        commute_minutes=commute_minutes,
+        daily_commute_hours=daily_commute_hours,
+        daily_transport_cost=daily_transport_cost,
+        daily_commute_cost=daily_commute_cost,
+        weekly_work_hours=weekly_work_hours,
+        weekly_commute_hours=weekly_commute_hours,
+        weekly_commute_costs=weekly_commute_costs,
+        yearly_work_hours=yearly_work_hours,
+        yearly_commute_hours=yearly_commute_hours,
+        yearly_commute_costs=yearly_commute_costs,
+        net_yearly_income=net_yearly_income,
+        total_committed_hours=total_committed_hours,
+        traditional_wage=traditional_wage,
+        true_wage=true_wage,
+    )
+
+
+def pay_description(inputs):
+    amount = f"${inputs.paycheck:.2f}"
+    return {
+        'daily': f"{amount} per day",
+        'weekly': f"{amount} per week",
+        'biweekly': f"{amount} bi-weekly",
+        'semi_monthly': f"{amount} semi-monthly",
+    }.get(inputs.pay_frequency, f"{amount} per month")
+
+
+def cost_breakdown(result, include_other=True):
+    """Human readable daily cost breakdown"""
+    inputs = result.inputs
+    transport_type = inputs.transport_type
+    other = inputs.daily_other_costs
+    cost = result.daily_transport_cost
+
+    if transport_type in ('biking', 'walking'):
+        if other > 0:
+            label = "Maintenance/gear" if transport_type == 'biking' else "Gear/other"
+            return f"{label}: ${other:.2f}"
+        return "No fuel/transportation costs"
+
+    if transport_type == 'car':
+        details = f"Fuel: ${cost:.2f}"
+    elif transport_type == 'ev':
+        details = f"Electricity: ${cost:.2f}"
+    else:
+        details = f"Transport fare: ${cost:.2f}"
+        if inputs.use_monthly_pass:
+            details += f" (from ${inputs.monthly_pass_cost:.2f}/month pass)"
+
+    if include_other and other > 0:
+        details += f" + Other: ${other:.2f}"
+    return details
@@ -0,0 +1,187 @@
+"""Derived wage figures as a dependency graph, only what an input change reaches is recalculated
+
+    graph = WageGraph(WageInputs(...))
+    graph.update(gas_price=3.80)
+    changed = graph.refresh()      # e.g. {'gas_price', 'daily_transport_cost', ..., 'true_wage'}
+    graph.result()                 # WageResult, equal to calculate()
+
+Every node is one line of wage_core.calculate(). refresh() walks the nodes
+downstream of the changed inputs in order and stops early where a
+recalculated value comes out the same, e.g. a gas price change while
+commuting by train. affected() gives the nodes an input can reach, so
+callers can work out ahead of time which of their outputs need updating.
+"""
+from types import SimpleNamespace
+
+from wage_core import (ASSUMPTIONS, OUTPUT_COLUMNS, RESULT_FIELDS, WageInputs, WageResult, annual_income_for,
+                       daily_transport_cost_for, normalize_inputs, on_assumption_change)
+
+INPUT_FIELDS = tuple(WageInputs().as_dict())
+
+TRANSPORT_COST_INPUTS = ('transport_type', 'daily_miles', 'gas_mileage', 'gas_price', 'ev_efficiency',
+                         'electricity_price', 'daily_public_cost', 'monthly_pass_cost', 'use_monthly_pass',
+                         'work_days')
+
+
+def _one_way_minutes(commute_minutes, transport_type, walking_minutes):
+    # walking to/from stations only counts for public transport
+    if transport_type == 'public':
+        return commute_minutes + walking_minutes
+    return commute_minutes
+
+
+def _daily_transport_cost(*values):
+    return daily_transport_cost_for(SimpleNamespace(**dict(zip(TRANSPORT_COST_INPUTS, values))))
+
+
+def _yearly(weekly):
+    return weekly * ASSUMPTIONS['work_weeks_per_year']
+
+
+def _wage(income, hours):
+    return income / hours if hours > 0 else 0
+
+
+# name: (function, the inputs or nodes it is called with), in calculation order
+NODES = {
+    'annual_income': (annual_income_for, ('paycheck', 'pay_frequency', 'work_days')),
+    'one_way_minutes': (_one_way_minutes, ('commute_minutes', 'transport_type', 'walking_minutes')),
+    'daily_commute_hours': (lambda minutes: (minutes * 2) / 60, ('one_way_minutes',)),
+    'daily_transport_cost': (_daily_transport_cost, TRANSPORT_COST_INPUTS),
+    'daily_commute_cost': (lambda cost, other: cost + other, ('daily_transport_cost', 'daily_other_costs')),
+    'weekly_work_hours': (lambda hours, days: hours * days, ('daily_hours', 'work_days')),
+    'weekly_commute_hours': (lambda hours, days: hours * days, ('daily_commute_hours', 'work_days')),
+    'weekly_commute_costs': (lambda cost, days: cost * days, ('daily_commute_cost', 'work_days')),
+    'yearly_work_hours': (_yearly, ('weekly_work_hours',)),
+    'yearly_commute_hours': (_yearly, ('weekly_commute_hours',)),
+    'yearly_commute_costs': (_yearly, ('weekly_commute_costs',)),
+    'traditional_wage': (_wage, ('annual_income', 'yearly_work_hours')),
+    'net_yearly_income': (lambda income, costs: income - costs, ('annual_income', 'yearly_commute_costs')),
+    'total_committed_hours': (lambda work, commute: work + commute, ('yearly_work_hours', 'yearly_commute_hours')),
+    'true_wage': (_wage, ('net_yearly_income', 'total_committed_hours')),
+}
+
+# WageResult fields whose node has another name, the input already has that one
+RESULT_NODES = {name: OUTPUT_COLUMNS.get(name, name) for name in RESULT_FIELDS}
+
+
+class WageGraph:
+    """Inputs plus every derived node, recalculated incrementally
+
+    update() only records new inputs; refresh() (or any read) brings the
+    nodes up to date. evaluations counts node recalculations, for checking
+    how much work a change really cost.
+    """
+
+    def __init__(self, inputs=None, nodes=NODES):
+        self.nodes = nodes
+        self.order = tuple(nodes)
+        self.dependents = {name: [] for name in INPUT_FIELDS + self.order}
+        known = set(INPUT_FIELDS)
+        for name, (_, dependencies) in nodes.items():
+            unknown = [dependency for dependency in dependencies if dependency not in known]
+            if unknown:
+                raise ValueError(f"Node '{name}' depends on '{unknown[0]}', which isn't an input or earlier node")
+            known.add(name)
+            for dependency in dependencies:
+                self.dependents[dependency].append(name)
+        # what each input or node invalidates, worked out once
+        self.downstream = {}
+        for name in self.dependents:
+            reached = self._reach(name)
+            self.downstream[name] = tuple(node for node in self.order if node in reached)
+        self.values = normalize_inputs(inputs or WageInputs()).as_dict()
+        self.changed = set(INPUT_FIELDS)  # inputs changed since the last refresh
+        self.evaluations = 0
+        on_assumption_change(self.on_assumption_change)
+
+    def _reach(self, name):
+        reached = set()
+        stack = [name]
+        while stack:
+            for dependent in self.dependents[stack.pop()]:
+                if dependent not in reached:
+                    reached.add(dependent)
+                    stack.append(dependent)
+        return reached
+
+    def affected(self, *names):
+        """Nodes that depend on any of the given inputs or nodes, in calculation order"""
+        if len(names) == 1:
+            return self.downstream[names[0]]
+        reached = set().union(*(self.downstream[name] for name in names))
+        return tuple(name for name in self.order if name in reached)
+
+    @property
+    def dirty(self):
+        """Nodes waiting to be recalculated"""
+        return self.affected(*self.changed)
+
+    def _checked(self, values):
+        for name in values:
+            if name not in INPUT_FIELDS:
+                raise ValueError(f"Unknown input '{name}'")
+        if 'transport_type' in values or 'pay_frequency' in values:
+            checked = normalize_inputs(WageInputs(**{name: values.get(name, self.values[name])
+                                                     for name in ('transport_type', 'pay_frequency')}))
+            values = dict(values, transport_type=checked.transport_type, pay_frequency=checked.pay_frequency)
+        return values
+
+    def update(self, inputs=None, **values):
+        """Take new inputs (a WageInputs and/or fields), returns the names that changed"""
+        if inputs is not None:
+            values = dict(inputs.as_dict(), **values)
+        changed = []
+        for name, value in self._checked(values).items():
+            if self.values[name] != value:
+                self.values[name] = value
+                changed.append(name)
+        self.changed.update(changed)
+        return changed
+
+    def _propagate(self, values, changed):
+        """Recalculate the nodes downstream of changed in values, returns every name whose value changed"""
+        changed = set(changed)
+        for name in self.affected(*changed):
+            function, dependencies = self.nodes[name]
+            if changed.isdisjoint(dependencies):
+                continue  # whatever changed upstream came out the same
+            value = function(*[values[dependency] for dependency in dependencies])
+            self.evaluations += 1
+            if name not in values or values[name] != value:
+                values[name] = value
+                changed.add(name)
+        return changed
+
+    def refresh(self):
+        """Bring every node up to date, returns the inputs and nodes that changed"""
+        if not self.changed:
+            return set()
+        changed = self._propagate(self.values, self.changed)
+        self.changed = set()
+        return changed
+
+    def get(self, name):
+        self.refresh()
+        return self.values[name]
+
+    def result(self):
+        """The current values as a WageResult"""
+        self.refresh()
+        inputs = WageInputs(**{name: self.values[name] for name in INPUT_FIELDS})
+        return WageResult(inputs, **{field: self.values[node] for field, node in RESULT_NODES.items()})
+
+    def what_if(self, outputs=('true_wage',), **changes):
+        """Nodes after a change of inputs, recalculating only what it reaches and leaving the graph as it is"""
+        self.refresh()
+        values = dict(self.values)
+        changes = self._checked(changes)
+        changed = [name for name, value in changes.items() if values[name] != value]
+        values.update(changes)
+        self._propagate(values, changed)
+        return {name: values[RESULT_NODES.get(name, name)] for name in outputs}
+
+    def on_assumption_change(self, name, value):
+        # the assumptions are used all over, start again
+        self.values = {name: self.values[name] for name in INPUT_FIELDS}
+        self.changed = set(INPUT_FIELDS)
@@ -0,0 +1,205 @@
+"""Monte Carlo uncertainty: true wage percentiles when commute time, prices and tolls vary
+
+    result = simulate(WageInputs(...), commute_minutes=LogNormal(35, 12),
+                      gas_price=Uniform(3.2, 4.8), toll=Toll(6.50, 0.4))
+    result.percentiles  # {5: ..., 50: ..., 95: ...}
+
+Each sample is one day's draw of every distribution, run through the batch
+engine as if the whole year looked like that day, so the spread is the
+spread of the true wage from day to day. Samples are drawn and calculated
+in chunks; a Simulation can be stepped one chunk at a time to show the
+histogram filling in.
+"""
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+from wage_batch import calculate_batch
+from wage_core import WageInputs, normalize_inputs
+from wage_sweep import resolve_parameter
+
+DEFAULT_SAMPLES = 1_000_000
+CHUNK_SIZE = 1 << 17
+DEFAULT_BINS = 60
+PERCENTILES = (5, 50, 95)
+
+# the price a "price range" varies for each transport type
+PRICE_FIELDS = {'car': 'gas_price', 'ev': 'electricity_price', 'public': 'daily_public_cost'}
+
+
+@dataclass(frozen=True)
+class Normal:
+    """Normal distribution, truncated at zero since none of the inputs can go negative"""
+    mean: float
+    sd: float
+
+    def sample(self, rng, size):
+        return np.maximum(rng.normal(self.mean, self.sd, size), 0)
+
+
+@dataclass(frozen=True)
+class LogNormal:
+    """Log-normal with the given mean and standard deviation (not those of the log)"""
+    mean: float
+    sd: float
+
+    def sample(self, rng, size):
+        if self.mean <= 0:
+            return np.zeros(size)
+        sigma2 = math.log1p((self.sd / self.mean) ** 2)
+        return rng.lognormal(math.log(self.mean) - sigma2 / 2, math.sqrt(sigma2), size)
+
+
+@dataclass(frozen=True)
+class Uniform:
+    """Anywhere in a price range, equally likely"""
+    low: float
+    high: float
+
+    def sample(self, rng, size):
+        return rng.uniform(self.low, self.high, size)
+
+
+@dataclass(frozen=True)
+class Toll:
+    """A toll of cost paid on a given fraction of days, added to the daily other costs"""
+    cost: float
+    probability: float
+
+    def sample(self, rng, size):
+        return np.where(rng.random(size) < self.probability, self.cost, 0.0)
+
+
+class MonteCarloResult:
+    """Every sampled true wage plus its histogram and percentiles"""
+
+    def __init__(self, samples, counts, edges, percentiles):
+        self.samples = samples
+        self.counts = counts
+        self.edges = edges
+        self.percentiles = percentiles
+
+    def __len__(self):
+        return len(self.samples)
+
+    @property
+    def mean(self):
+        return float(self.samples.mean())
+
+    @property
+    def std(self):
+        return float(self.samples.std())
+
+    def percentile(self, q):
+        return float(np.percentile(self.samples, q))
+
+    def as_dict(self):
+        """Summary without the raw samples, ready for JSON"""
+        return {
+            'samples': len(self.samples),
+            'mean': self.mean,
+            'std': self.std,
+            'percentiles': {f"p{q:g}": value for q, value in self.percentiles.items()},
+            'histogram': {'counts': self.counts.tolist(), 'edges': self.edges.tolist()},
+        }
+
+
+class Simulation:
+    """A simulation run one chunk at a time, step() until it returns False
+
+    counts and edges hold the histogram of the samples so far. The bin edges
+    are fixed after the first chunk so partial histograms can be drawn as
+    they grow; samples past either end are counted in the end bins.
+    """
+
+    def __init__(self, base=None, samples=DEFAULT_SAMPLES, seed=None, bins=DEFAULT_BINS,
+                 percentiles=PERCENTILES, chunk_size=CHUNK_SIZE, toll=None, **distributions):
+        if samples < 1:
+            raise ValueError("Need at least one sample")
+        self.inputs = normalize_inputs(base or WageInputs()).as_dict()
+        self.distributions = {}
+        for name, distribution in distributions.items():
+            resolved = resolve_parameter(name)
+            if resolved in ('pay_frequency', 'transport_type', 'use_monthly_pass'):
+                raise ValueError(f"'{name}' can't be drawn from a distribution")
+            if hasattr(distribution, 'sample'):
+                self.distributions[resolved] = distribution
+            else:
+                self.inputs[resolved] = distribution  # a fixed value overriding the base
+        self.toll = toll
+        self.rng = np.random.default_rng(seed)
+        self.bins = bins
+        self.quantiles = tuple(percentiles)
+        self.chunk_size = chunk_size
+        self.samples = np.empty(samples)
+        self.done = 0
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.edges = None
+
+    @property
+    def total(self):
+        return len(self.samples)
+
+    @property
+    def finished(self):
+        return self.done >= self.total
+
+    def step(self):
+        """Draw and calculate one chunk, returns whether there is more to do"""
+        if self.finished:
+            return False
+        size = min(self.chunk_size, self.total - self.done)
+        inputs = dict(self.inputs)
+        for name, distribution in self.distributions.items():
+            inputs[name] = distribution.sample(self.rng, size)
+        if self.toll is not None:
+            inputs['daily_other_costs'] = inputs['daily_other_costs'] + self.toll.sample(self.rng, size)
+
+        wages = np.broadcast_to(calculate_batch(outputs=('true_wage',), **inputs)['true_wage'], (size,))
+        self.samples[self.done:self.done + size] = wages
+        self.done += size
+
+        if self.edges is None:
+            self.edges = histogram_edges(wages, self.bins)
+        low, high = self.edges[0], self.edges[-1]
+        index = ((wages - low) * (self.bins / (high - low))).astype(np.intp)
+        self.counts += np.bincount(np.clip(index, 0, self.bins - 1), minlength=self.bins)
+        return not self.finished
+
+    def result(self):
+        while self.step():
+            pass
+        values = np.percentile(self.samples, self.quantiles)
+        return MonteCarloResult(self.samples, self.counts, self.edges,
+                                {q: float(value) for q, value in zip(self.quantiles, values)})
+
+
+def price_field(inputs):
+    """Name of the input holding the price that varies for this commute, None for biking and walking"""
+    if inputs.transport_type == 'public' and inputs.use_monthly_pass:
+        return 'monthly_pass_cost'
+    return PRICE_FIELDS.get(inputs.transport_type)
+
+
+def histogram_edges(values, bins):
+    """Bin edges around the bulk of a first sample, padded for what later chunks bring"""
+    low, high = np.percentile(values, (0.1, 99.9))
+    pad = (high - low) * 0.1 or max(abs(high) * 0.01, 0.5)
+    return np.linspace(low - pad, high + pad, bins + 1)
+
+
+def simulate(base=None, samples=DEFAULT_SAMPLES, seed=None, bins=DEFAULT_BINS, percentiles=PERCENTILES,
+             chunk_size=CHUNK_SIZE, toll=None, on_chunk=None, **distributions):
+    """Run a whole simulation, calling on_chunk(simulation) after every chunk
+
+    Keywords are input names (the GUI's variable names work too) mapped to a
+    Normal, LogNormal or Uniform, or to a fixed value. toll is a Toll.
+    """
+    simulation = Simulation(base, samples, seed, bins, percentiles, chunk_size, toll, **distributions)
+    while simulation.step():
+        if on_chunk is not None:
+            on_chunk(simulation)
+    if on_chunk is not None:
+        on_chunk(simulation)
+    return simulation.result()
@@ -0,0 +1,130 @@
+"""Process pool execution for large batches, results come back in input order"""
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from wage_bulk import DEFAULT_CHUNK_SIZE, calculate_chunk, iter_chunks, parse_chunk
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+class ThroughputReport:
+    """Counts rows and chunks over a run so nodes can be sized"""
+
+    def __init__(self, workers=1, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.rows = 0
+        self.chunks = 0
+        self.started = time.perf_counter()
+        self.finished = None
+
+    def add_chunk(self, rows):
+        self.rows += rows
+        self.chunks += 1
+
+    def stop(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed > 0 else 0
+
+    def as_dict(self):
+        return {
+            'workers': self.workers,
+            'chunk_size': self.chunk_size,
+            'rows': self.rows,
+            'chunks': self.chunks,
+            'elapsed_seconds': round(self.elapsed, 6),
+            'rows_per_second': round(self.rows_per_second, 1),
+        }
+
+    def __str__(self):
+        return (f"{self.rows:,} rows in {self.chunks:,} chunks on {self.workers} worker(s): "
+                f"{self.elapsed:.2f}s, {self.rows_per_second:,.0f} rows/sec")
+
+
+def _calculate_raw_chunk(job):
+    """Worker side: parse and calculate one chunk of raw records, plus its ValidationReport when validating"""
+    records, first_row, validate = job
+    if not validate:
+        return calculate_chunk(parse_chunk(records, first_row)), None
+    from wage_validation import ValidationReport
+
+    errors = ValidationReport(max_rows=None)  # every row number, merged into the caller's report
+    return calculate_chunk(parse_chunk(records, first_row, errors), first_row, errors), errors
+
+
+def _calculate_column_chunk(columns):
+    """Worker side: calculate one slice of column arrays"""
+    from wage_batch import calculate_batch
+    return calculate_batch(**columns)
+
+
+def _ordered_map(function, jobs, workers):
+    """Like executor.map, but only keeps a bounded window of chunks in flight"""
+    window = workers * 2
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for job in jobs:
+            pending.append(executor.submit(function, job))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def calculate_records_parallel(records, chunk_size=DEFAULT_CHUNK_SIZE, workers=None, report=None, errors=None):
+    """Yield result column dicts for raw records, chunks are calculated across processes
+
+    With errors (a ValidationReport) bad rows are left out and the workers'
+    reports merged into it.
+    """
+    workers = workers or default_workers()
+
+    def jobs():
+        first_row = 1
+        for chunk in iter_chunks(records, chunk_size):
+            yield chunk, first_row, errors is not None
+            first_row += len(chunk)
+
+    for columns, chunk_errors in _ordered_map(_calculate_raw_chunk, jobs(), workers):
+        if chunk_errors is not None:
+            errors.merge(chunk_errors)
+        if report is not None:
+            report.add_chunk(len(columns['true_wage']))
+        yield columns
+
+
+def calculate_batch_parallel(chunk_size=DEFAULT_CHUNK_SIZE, workers=None, report=None, **columns):
+    """calculate_batch() over 1-d columns split across processes, merged back in order"""
+    import numpy as np
+    from wage_batch import OUTPUT_FIELDS, ResultBatch
+
+    workers = workers or default_workers()
+    arrays = {name: np.asarray(value) for name, value in columns.items()}
+    length = max((len(value) for value in arrays.values() if value.ndim), default=0)
+
+    def jobs():
+        for start in range(0, length, chunk_size):
+            stop = start + chunk_size
+            yield {name: value[start:stop] if value.ndim else value for name, value in arrays.items()}
+
+    parts = []
+    for result in _ordered_map(_calculate_column_chunk, jobs(), workers):
+        if report is not None:
+            report.add_chunk(len(result['true_wage']))
+        parts.append(result)
+    if report is not None:
+        report.stop()
+    if not parts:
+        return ResultBatch({name: np.empty(0) for name in OUTPUT_FIELDS}, columns)
+    return ResultBatch({name: np.concatenate([part[name] for part in parts]) for name in parts[0]}, columns)
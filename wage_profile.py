@@ -0,0 +1,246 @@
+"""Opt-in timing of the hot paths, off unless TRUECOST_PROFILE is set or enable() is called
+
+    with stage('display_results'):
+        ...
+
+When profiling is off stage() hands back one shared do-nothing context
+manager, so instrumented code costs a function call and a flag check.
+When it is on every stage gets a counter and a latency histogram, and the
+session can be written out as a Chrome trace (chrome://tracing, Perfetto)
+and/or a cProfile stats file.
+"""
+import atexit
+import cProfile
+import json
+import math
+import os
+import sys
+import threading
+import time
+from functools import wraps
+
+ENV_FLAG = 'TRUECOST_PROFILE'
+ENV_DIR = 'TRUECOST_PROFILE_DIR'
+DEFAULT_DIR = 'truecost-profile'
+
+# histogram buckets are powers of two in microseconds: <1us, <2us, <4us ... <~1min
+BUCKETS = 27
+
+enabled = False
+_stats = {}
+_trace = None
+_profiler = None
+_output_dir = None
+_lock = threading.Lock()
+_epoch = time.perf_counter()
+
+
+class StageStats:
+    """Counter, total/min/max and a log2 latency histogram for one stage"""
+    __slots__ = ('name', 'count', 'total', 'min', 'max', 'buckets')
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.buckets = [0] * BUCKETS
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        micros = int(seconds * 1e6)
+        self.buckets[min(micros.bit_length(), BUCKETS - 1)] += 1
+
+    def percentile(self, fraction):
+        """Upper bound of the bucket holding the given fraction of samples, in seconds"""
+        if not self.count:
+            return 0.0
+        wanted = fraction * self.count
+        seen = 0
+        for i, count in enumerate(self.buckets):
+            seen += count
+            if seen >= wanted:
+                return min((1 << i) / 1e6, self.max)
+        return self.max
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'total_ms': self.total * 1000,
+            'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+            'min_ms': self.min * 1000 if self.count else 0.0,
+            'max_ms': self.max * 1000,
+            'p50_ms': self.percentile(0.5) * 1000,
+            'p95_ms': self.percentile(0.95) * 1000,
+            'histogram_us': {f"<{1 << i}": count for i, count in enumerate(self.buckets) if count},
+        }
+
+
+class _Stage:
+    __slots__ = ('name', 'started')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, self.started, time.perf_counter())
+        return False
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name):
+    """Context manager timing one stage, free when profiling is off"""
+    if not enabled:
+        return _NULL_STAGE
+    return _Stage(name)
+
+
+def timed(name):
+    """Decorator version of stage(), checks the flag on every call so it can be turned on later"""
+    def decorate(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return function(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, started, time.perf_counter())
+        return wrapper
+    return decorate
+
+
+def wrap(obj, attribute, name):
+    """Time an existing bound method (e.g. a canvas' draw) when profiling is on"""
+    if enabled:
+        setattr(obj, attribute, timed(name)(getattr(obj, attribute)))
+
+
+def record(name, started, finished):
+    with _lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = StageStats(name)
+        stats.add(finished - started)
+        if _trace is not None:
+            _trace.append({
+                'name': name,
+                'ph': 'X',
+                'ts': (started - _epoch) * 1e6,
+                'dur': (finished - started) * 1e6,
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+            })
+
+
+def enable(trace=True, cprofile=False, output_dir=None, write_at_exit=True):
+    """Turn profiling on for the rest of the session"""
+    global enabled, _trace, _profiler, _output_dir
+    enabled = True
+    if trace and _trace is None:
+        _trace = []
+    if cprofile and _profiler is None:
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+    if write_at_exit and _output_dir is None:
+        atexit.register(_write_at_exit)
+    _output_dir = output_dir or _output_dir or os.environ.get(ENV_DIR) or DEFAULT_DIR
+
+
+def disable():
+    global enabled
+    enabled = False
+    if _profiler is not None:
+        _profiler.disable()
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+        if _trace is not None:
+            del _trace[:]
+
+
+def stats():
+    with _lock:
+        return {name: stage_stats.as_dict() for name, stage_stats in _stats.items()}
+
+
+def summary():
+    """Plain text table of every stage"""
+    lines = [f"{'stage':28} {'count':>8} {'total ms':>10} {'mean ms':>9} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}"]
+    for name, s in sorted(stats().items(), key=lambda item: -item[1]['total_ms']):
+        lines.append(f"{name:28} {s['count']:>8} {s['total_ms']:>10.2f} {s['mean_ms']:>9.3f} "
+                     f"{s['p50_ms']:>8.3f} {s['p95_ms']:>8.3f} {s['max_ms']:>8.3f}")
+    return "\n".join(lines)
+
+
+def write_chrome_trace(path):
+    with _lock:
+        events = list(_trace or [])
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+def write_cprofile(path):
+    if _profiler is None:
+        raise RuntimeError("cProfile was not enabled, use enable(cprofile=True)")
+    _profiler.disable()
+    _profiler.dump_stats(path)
+    if enabled:
+        _profiler.enable()
+
+
+def write_session(output_dir=None):
+    """Write stages.json, trace.json and profile.pstats (whichever apply), returns the paths"""
+    output_dir = output_dir or _output_dir or DEFAULT_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    paths = [os.path.join(output_dir, 'stages.json')]
+    with open(paths[0], 'w') as f:
+        json.dump(stats(), f, indent=2)
+    if _trace is not None:
+        paths.append(os.path.join(output_dir, 'trace.json'))
+        write_chrome_trace(paths[-1])
+    if _profiler is not None:
+        paths.append(os.path.join(output_dir, 'profile.pstats'))
+        write_cprofile(paths[-1])
+    return paths
+
+
+def _write_at_exit():
+    if not _stats and _profiler is None:
+        return
+    paths = write_session()
+    print(summary(), file=sys.stderr)
+    print(f"Profile written to {', '.join(paths)}", file=sys.stderr)
+
+
+def enable_from_env():
+    """TRUECOST_PROFILE=1 turns on stage timing, =cprofile adds a cProfile dump"""
+    value = os.environ.get(ENV_FLAG, '').strip().lower()
+    if value and value not in ('0', 'false', 'no', 'off'):
+        enable(cprofile='cprofile' in value)
+
+
+enable_from_env()
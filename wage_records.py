@@ -0,0 +1,223 @@
+"""Memory-mapped binary and fixed-width employee files, read straight into NumPy columns
+
+    records = open_fixed_width('survey.txt', FixedWidth((('paycheck', 10), ('pay_frequency', 12), ...)))
+    records = open_binary('survey.bin')            # RECORD_DTYPE records
+    layout = FixedWidth.parse('paycheck:10,_:2,transport_type:8', skip_lines=1)   # as --fixed-width takes it
+    for columns in calculate_records(records):     # one column dict per chunk
+        ...
+
+Both give a structured array backed by the file, so nothing is read until a
+chunk is used. Numbers in fixed-width files are parsed a whole column at a
+time and every chunk is range checked (see wage_validation) before it reaches
+calculate_batch(); no Python object is made per row.
+"""
+import os
+from dataclasses import dataclass
+
+import numpy as np
+
+from wage_batch import calculate_batch, encode_choices, encode_pay_frequency, encode_transport
+from wage_bulk import output_columns
+from wage_core import PAY_FREQUENCIES, TRANSPORT_TYPES, WageInputs
+from wage_validation import check_columns, validate_columns
+
+CHUNK_SIZE = 1 << 18
+DEFAULT_INPUTS = WageInputs()
+INPUT_FIELDS = tuple(DEFAULT_INPUTS.as_dict())
+
+# the layout write_binary() uses and open_binary() expects unless told otherwise
+RECORD_DTYPE = np.dtype([
+    (name, '<u1' if name in ('pay_frequency', 'transport_type') else '?' if name == 'use_monthly_pass' else '<f8')
+    for name in INPUT_FIELDS
+])
+
+_TRUE = (b'1', b'true', b'yes', b'y')
+
+
+@dataclass(frozen=True)
+class FixedWidth:
+    """Column layout of a fixed-width text file
+
+    columns is a sequence of (name, width); names that aren't inputs (say
+    '_' for filler) are skipped. skip_lines header lines are ignored.
+    """
+    columns: tuple
+    skip_lines: int = 0
+
+    @classmethod
+    def parse(cls, text, skip_lines=0):
+        """Layout from 'name:width,name:width,...' (the --fixed-width option)"""
+        columns = []
+        for item in text.split(','):
+            name, _, width = item.strip().partition(':')
+            try:
+                width = int(width)
+            except ValueError:
+                width = 0
+            if not name or width < 1:
+                raise ValueError(f"Fixed-width column '{item.strip()}' should be name:width, e.g. paycheck:10")
+            columns.append((name, width))
+        return cls(tuple(columns), skip_lines)
+
+    @property
+    def width(self):
+        return sum(width for _, width in self.columns)
+
+    def dtype(self, newline=1):
+        """Structured dtype of one line, each column as raw bytes"""
+        names, formats, offsets = [], [], []
+        offset = 0
+        for name, width in self.columns:
+            if name in INPUT_FIELDS:
+                names.append(name)
+                formats.append(f'S{width}')
+                offsets.append(offset)
+            offset += width
+        return np.dtype({'names': names, 'formats': formats, 'offsets': offsets, 'itemsize': offset + newline})
+
+
+def open_binary(path, dtype=RECORD_DTYPE, offset=0):
+    """Read-only structured array over a file of packed records"""
+    dtype = np.dtype(dtype)
+    if os.path.getsize(path) <= offset:
+        return np.zeros(0, dtype=dtype)  # an empty file can't be memory mapped
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset)
+
+
+def open_fixed_width(path, layout):
+    """Read-only structured array over a fixed-width text file, one record per line"""
+    with open(path, 'rb') as source:
+        for _ in range(layout.skip_lines):
+            source.readline()
+        offset = source.tell()
+        source.seek(0, 2)
+        size = source.tell() - offset
+        source.seek(offset + layout.width)
+        ending = source.read(2)
+
+    newline = 2 if ending == b'\r\n' else 1 if ending[:1] == b'\n' else 0
+    dtype = layout.dtype(newline)
+    if size % dtype.itemsize:
+        if (size + newline) % dtype.itemsize == 0:
+            raise ValueError(f"{path}: the last line has no line ending, add one")
+        raise ValueError(f"{path}: {size} bytes isn't a whole number of {dtype.itemsize} byte lines, "
+                         f"check the column widths")
+    if size == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset)
+
+
+def _parse_numbers(name, raw, first_row):
+    """Floats from a column of byte strings, blanks take the GUI default"""
+    try:
+        return raw.astype(np.float64)
+    except ValueError:
+        pass
+    # only the slow path looks at blanks and bad values
+    blank = np.char.strip(raw) == b''
+    values = np.where(blank, str(float(getattr(DEFAULT_INPUTS, name))).encode(), raw)
+    try:
+        return values.astype(np.float64)
+    except ValueError:
+        uniques, first = np.unique(values, return_index=True)
+        for value, row in zip(uniques, first):
+            try:
+                float(value)
+            except ValueError:
+                raise ValueError(f"Row {row + first_row}: {name} '{value.decode(errors='replace').strip()}' "
+                                 f"isn't a number") from None
+        raise
+
+
+def _parse_names(name, raw, first_row):
+    values = np.char.lower(np.char.strip(raw))
+    values = np.where(values == b'', getattr(DEFAULT_INPUTS, name).encode(), values).astype(str)
+    encode = encode_transport if name == 'transport_type' else encode_pay_frequency
+    try:
+        return encode(values)
+    except ValueError as e:
+        uniques, first = np.unique(values, return_index=True)
+        for value, row in zip(uniques, first):
+            try:
+                encode([value])
+            except ValueError:
+                raise ValueError(f"Row {row + first_row}: {e}") from None
+        raise
+
+
+def record_columns(records, first_row=1):
+    """Input column dict for calculate_batch() from a slice of records
+
+    Numeric fields of binary records are used as they are (strided views of
+    the file); byte string fields are parsed. Fields missing from the
+    records take the GUI defaults.
+    """
+    columns = {}
+    for name in INPUT_FIELDS:
+        if name not in records.dtype.names:
+            columns[name] = np.full(len(records), getattr(DEFAULT_INPUTS, name))
+            continue
+        raw = records[name]
+        if raw.dtype.kind != 'S':
+            if name == 'transport_type':
+                raw = encode_choices(raw, TRANSPORT_TYPES)
+            elif name == 'pay_frequency':
+                raw = encode_choices(raw, PAY_FREQUENCIES)
+            columns[name] = raw
+        elif name in ('transport_type', 'pay_frequency'):
+            columns[name] = _parse_names(name, raw, first_row)
+        elif name == 'use_monthly_pass':
+            columns[name] = np.isin(np.char.lower(np.char.strip(raw)), _TRUE)
+        else:
+            columns[name] = _parse_numbers(name, raw, first_row)
+    return columns
+
+
+def calculate_records(records, chunk_size=CHUNK_SIZE, outputs=None, validate=True, report=None, errors=None):
+    """Yield one column dict (inputs and results) per chunk of records
+
+    The dicts are what bulk mode writes, e.g. wage_columnar.write_chunks().
+    A chunk breaking the validate_input() limits raises ValueError, unless
+    errors (a wage_validation.ValidationReport) is given: then the bad rows
+    are recorded there and left out.
+    """
+    for start in range(0, len(records), chunk_size):
+        columns = record_columns(records[start:start + chunk_size], start + 1)
+        if errors is not None:
+            valid = validate_columns(columns, start + 1, errors)
+            if not valid.all():
+                columns = {name: column[valid] for name, column in columns.items()}
+        elif validate:
+            check_columns(columns, start + 1)
+        results = calculate_batch(outputs=outputs, **columns)
+        columns.update(output_columns(results.columns))
+        if report is not None:
+            report.add_chunk(len(results))
+        yield columns
+    if report is not None:
+        report.stop()
+
+
+def decode_columns(columns):
+    """Names instead of codes for pay frequency and transport type, for text output"""
+    columns = dict(columns)
+    for name, choices in (('pay_frequency', PAY_FREQUENCIES), ('transport_type', TRANSPORT_TYPES)):
+        if name in columns and np.asarray(columns[name]).dtype.kind in 'iu':
+            columns[name] = np.array(choices)[columns[name]]
+    return columns
+
+
+def write_binary(path, columns, dtype=RECORD_DTYPE):
+    """Write a column dict (or ResultBatch inputs) as packed records for open_binary()"""
+    dtype = np.dtype(dtype)
+    rows = max((len(np.atleast_1d(value)) for value in columns.values()), default=0)
+    records = np.zeros(rows, dtype=dtype)
+    for name in dtype.names:
+        value = columns.get(name, getattr(DEFAULT_INPUTS, name, 0))
+        if name == 'transport_type':
+            value = encode_transport(value)
+        elif name == 'pay_frequency':
+            value = encode_pay_frequency(value)
+        records[name] = value
+    records.tofile(path)
+    return rows
@@ -0,0 +1,344 @@
+"""Group-by statistics over batch results, built from sketches that merge across chunks and machines
+
+    report = Aggregator(by=('transport_type',))
+    for columns in chunks:                 # bulk chunks, ResultBatch objects, ...
+        report.add(columns)
+    report.merge(other_report)             # e.g. from another process, or Aggregator.from_dict(json)
+    print(report.table())
+
+Each group keeps, per field, the count, mean and variance (merged with
+Chan's formula), min, max and total, plus a log-bucket quantile sketch
+whose percentiles are within relative_accuracy (1% by default) of the
+exact ones. Memory depends on the number of groups and the spread of the
+values, never on the number of rows.
+"""
+import math
+
+import numpy as np
+
+from wage_batch import encode_pay_frequency, encode_transport
+from wage_core import PAY_FREQUENCIES, TRANSPORT_TYPES, WageInputs
+
+DEFAULT_FIELDS = ('true_wage', 'traditional_wage', 'yearly_commute_costs', 'yearly_commute_hours')
+PERCENTILES = (5, 25, 50, 75, 95)
+RELATIVE_ACCURACY = 0.01
+# values closer to zero than this share one bucket
+MIN_VALUE = 1e-9
+
+DEFAULT_INPUTS = WageInputs()
+# group keys stored as codes, reported as names
+_CHOICES = {'transport_type': (encode_transport, TRANSPORT_TYPES),
+            'pay_frequency': (encode_pay_frequency, PAY_FREQUENCIES)}
+
+
+class Moments:
+    """Count, mean, variance, min, max and total of a stream of values"""
+
+    def __init__(self, count=0, mean=0.0, m2=0.0, minimum=math.inf, maximum=-math.inf, total=0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2  # sum of squared differences from the mean
+        self.minimum = minimum
+        self.maximum = maximum
+        self.total = total
+
+    def add(self, values):
+        if len(values):
+            mean = float(values.mean())
+            self.merge(Moments(len(values), mean, float(((values - mean) ** 2).sum()),
+                               float(values.min()), float(values.max()), float(values.sum())))
+
+    def merge(self, other):
+        if not other.count:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        self.total += other.total
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / self.count) if self.count else 0.0
+
+    def as_dict(self):
+        # no values, no min or max: null rather than an infinity JSON can't hold
+        return {'count': self.count, 'mean': self.mean, 'm2': self.m2,
+                'minimum': self.minimum if self.count else None,
+                'maximum': self.maximum if self.count else None, 'total': self.total}
+
+    @classmethod
+    def from_dict(cls, data):
+        data = dict(data)
+        for name, empty in (('minimum', math.inf), ('maximum', -math.inf)):
+            if data.get(name) is None:
+                data[name] = empty
+        return cls(**data)
+
+
+class QuantileSketch:
+    """Counts per logarithmic bucket, a value's bucket is within relative_accuracy of it
+
+    Negative values (a commute costing more than the pay) get buckets of
+    their own, mirrored.
+    """
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zeros = 0
+
+    @property
+    def count(self):
+        return self.zeros + sum(self.positive.values()) + sum(self.negative.values())
+
+    def _add_to(self, buckets, magnitudes):
+        keys = np.ceil(np.log(magnitudes) / self.log_gamma).astype(np.int64)
+        for key, count in zip(*(part.tolist() for part in np.unique(keys, return_counts=True))):
+            buckets[key] = buckets.get(key, 0) + count
+
+    def add(self, values):
+        small = np.abs(values) <= MIN_VALUE
+        self.zeros += int(small.sum())
+        self._add_to(self.positive, values[(values > 0) & ~small])
+        self._add_to(self.negative, -values[(values < 0) & ~small])
+
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Can't merge sketches with different relative accuracy")
+        for buckets, theirs in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in theirs.items():
+                buckets[key] = buckets.get(key, 0) + count
+        self.zeros += other.zeros
+
+    def _value(self, key):
+        # the point of the bucket with the smallest relative error either side
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def quantiles(self, qs):
+        """Values at fractions qs (0 to 1) of the way through the sorted values, NaN when empty"""
+        negative = sorted(self.negative, reverse=True)
+        positive = sorted(self.positive)
+        values = np.array([-self._value(key) for key in negative] + [0.0] + [self._value(key) for key in positive])
+        counts = np.array([self.negative[key] for key in negative] + [self.zeros]
+                          + [self.positive[key] for key in positive])
+        total = counts.sum()
+        if not total:
+            return [math.nan for _ in qs]
+        ends = np.cumsum(counts)
+        ranks = np.asarray(qs, dtype=np.float64) * (total - 1)
+        return values[np.searchsorted(ends, ranks, side='right')].tolist()
+
+    def as_dict(self):
+        return {'relative_accuracy': self.relative_accuracy, 'zeros': self.zeros,
+                'positive': sorted(self.positive.items()), 'negative': sorted(self.negative.items())}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['relative_accuracy'])
+        sketch.zeros = data['zeros']
+        sketch.positive = {int(key): count for key, count in data['positive']}
+        sketch.negative = {int(key): count for key, count in data['negative']}
+        return sketch
+
+
+class FieldSummary:
+    """Moments and a quantile sketch for one field of one group"""
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY, moments=None, sketch=None):
+        self.moments = moments or Moments()
+        self.sketch = sketch or QuantileSketch(relative_accuracy)
+
+    def add(self, values):
+        values = values[np.isfinite(values)]
+        self.moments.add(values)
+        self.sketch.add(values)
+
+    def merge(self, other):
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+
+    def percentiles(self, percentiles=PERCENTILES):
+        """{percentile: value}, kept inside the exact min and max"""
+        values = self.sketch.quantiles([q / 100 for q in percentiles])
+        if self.moments.count:
+            values = [min(max(value, self.moments.minimum), self.moments.maximum) for value in values]
+        return dict(zip(percentiles, values))
+
+    @property
+    def median(self):
+        return self.percentiles((50,))[50]
+
+    def as_dict(self):
+        return {'moments': self.moments.as_dict(), 'sketch': self.sketch.as_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(moments=Moments.from_dict(data['moments']), sketch=QuantileSketch.from_dict(data['sketch']))
+
+
+def _column(columns, name, rows):
+    """One column of a bulk chunk dict or a ResultBatch, scalars and missing inputs broadcast to rows"""
+    if name in columns:
+        value = columns[name]
+    else:
+        value = getattr(columns, 'inputs', {}).get(name, getattr(DEFAULT_INPUTS, name, None))
+        if value is None:
+            raise ValueError(f"No column '{name}' to group or summarize by")
+    return np.broadcast_to(np.asarray(value), (rows,))
+
+
+class Aggregator:
+    """Group-by summaries of result chunks
+
+    by names the columns to group on (inputs or results), or gives
+    functions taking the chunk and returning one key per row, e.g. a
+    commute band; a function's name labels its column. fields are the
+    numeric columns summarized.
+    """
+
+    def __init__(self, by=(), fields=DEFAULT_FIELDS, percentiles=PERCENTILES,
+                 relative_accuracy=RELATIVE_ACCURACY):
+        self.by = (by,) if isinstance(by, str) or callable(by) else tuple(by)
+        self.fields = tuple(fields)
+        self.percentiles = tuple(percentiles)
+        self.relative_accuracy = relative_accuracy
+        self.groups = {}  # group key tuple -> {field: FieldSummary}
+        self.counts = {}  # group key tuple -> rows, a field's own count leaves out its NaN/inf values
+
+    @property
+    def keys(self):
+        """Column labels of the group keys"""
+        return tuple(key if isinstance(key, str) else key.__name__ for key in self.by)
+
+    def _group_keys(self, columns, rows):
+        """(labels, codes): one row of key values per group and the group of every row"""
+        codes = np.zeros(rows, dtype=np.intp)
+        labels = [()]
+        for key in self.by:
+            if isinstance(key, str):
+                values = _column(columns, key, rows)
+                if key in _CHOICES:
+                    encode, names = _CHOICES[key]
+                    uniques, inverse = np.unique(encode(values), return_inverse=True)
+                    uniques = [names[code] for code in uniques.tolist()]
+                else:
+                    uniques, inverse = np.unique(values, return_inverse=True)
+                    uniques = uniques.tolist()
+            else:
+                uniques, inverse = np.unique(np.broadcast_to(np.asarray(key(columns)), (rows,)), return_inverse=True)
+                uniques = uniques.tolist()
+            # mixed radix, then renumber to the combinations actually present
+            present, codes = np.unique(codes * len(uniques) + inverse.reshape(-1), return_inverse=True)
+            labels = [labels[code // len(uniques)] + (uniques[code % len(uniques)],) for code in present.tolist()]
+        return labels, codes.reshape(-1)
+
+    def add(self, columns):
+        """Take one chunk, a column dict or ResultBatch"""
+        rows = len(np.atleast_1d(columns[self.fields[0]]))
+        if not rows:
+            return
+        labels, codes = self._group_keys(columns, rows)
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+        for label, size in zip(labels, np.diff(bounds).tolist()):
+            self.counts[label] = self.counts.get(label, 0) + size
+        for name in self.fields:
+            values = np.asarray(_column(columns, name, rows), dtype=np.float64)[order]
+            for label, start, stop in zip(labels, bounds[:-1].tolist(), bounds[1:].tolist()):
+                self._summary(label, name).add(values[start:stop])
+
+    def _summary(self, label, name):
+        group = self.groups.get(label)
+        if group is None:
+            group = self.groups[label] = {field: FieldSummary(self.relative_accuracy) for field in self.fields}
+        return group[name]
+
+    def merge(self, other):
+        """Add another aggregator's groups, it must group and summarize the same way"""
+        if other.keys != self.keys or other.fields != self.fields:
+            raise ValueError("Can't merge reports grouped or summarized differently")
+        for label, group in other.groups.items():
+            for name, summary in group.items():
+                self._summary(label, name).merge(summary)
+            self.counts[label] = self.counts.get(label, 0) + other.counts.get(label, 0)
+        return self
+
+    def rows(self):
+        """One flat dict per group, sorted by key
+
+        count is the group's rows, {field}_count the ones with a finite
+        value; the statistics of a field with none are None.
+        """
+        rows = []
+        for label in sorted(self.groups, key=lambda label: tuple(map(str, label))):
+            row = dict(zip(self.keys, label))
+            row['count'] = self.counts.get(label, 0)
+            for name, summary in self.groups[label].items():
+                moments = summary.moments
+                empty = not moments.count
+                row[f'{name}_count'] = moments.count
+                row[f'{name}_mean'] = None if empty else moments.mean
+                row[f'{name}_std'] = None if empty else moments.std
+                row[f'{name}_min'] = None if empty else moments.minimum
+                row[f'{name}_max'] = None if empty else moments.maximum
+                row[f'{name}_total'] = moments.total
+                for q, value in summary.percentiles(self.percentiles).items():
+                    row[f'{name}_p{q:g}'] = None if empty else value
+            rows.append(row)
+        return rows
+
+    def table(self):
+        """Every group and field as aligned text"""
+        header = ' / '.join(self.keys) or 'All'
+        width = max([len(header)] + [len(' / '.join(map(str, label))) for label in self.groups])
+        columns = ['Count', 'Mean'] + [f"P{q:g}" for q in self.percentiles] + ['Total']
+        lines = []
+        for name in self.fields:
+            lines.append(f"{name}")
+            lines.append(f"  {header:{width}} " + " ".join(f"{column:>12}" for column in columns))
+            for row in self.rows():
+                label = ' / '.join(str(row[key]) for key in self.keys) or 'All'
+                values = [row[f'{name}_mean']] + [row[f'{name}_p{q:g}'] for q in self.percentiles]
+                lines.append(f"  {label:{width}} {row[f'{name}_count']:>12,} "
+                             + " ".join(f"{'-':>12}" if value is None else f"{value:>12,.2f}" for value in values)
+                             + f" {row[f'{name}_total']:>12,.0f}")
+        return "\n".join(lines)
+
+    def as_dict(self):
+        """Everything needed to merge this report elsewhere, ready for JSON"""
+        return {
+            'keys': list(self.keys),
+            'fields': list(self.fields),
+            'percentiles': list(self.percentiles),
+            'relative_accuracy': self.relative_accuracy,
+            'groups': [[list(label), {name: summary.as_dict() for name, summary in group.items()},
+                        self.counts.get(label, 0)]
+                       for label, group in self.groups.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """An aggregator from as_dict(), grouped by its key labels"""
+        aggregator = cls(data['keys'], data['fields'], data['percentiles'], data['relative_accuracy'])
+        for label, group, count in data['groups']:
+            aggregator.groups[tuple(label)] = {name: FieldSummary.from_dict(summary)
+                                               for name, summary in group.items()}
+            aggregator.counts[tuple(label)] = count
+        return aggregator
+
+
+def summarize(chunks, by=(), fields=DEFAULT_FIELDS, percentiles=PERCENTILES):
+    """An Aggregator over every chunk of an iterable"""
+    aggregator = Aggregator(by, fields, percentiles)
+    for columns in chunks:
+        aggregator.add(columns)
+    return aggregator
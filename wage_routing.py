@@ -0,0 +1,502 @@
+"""One-way commute distance and time from home and work coordinates, routed over a local road graph
+
+    graph = load_graph('city.osm')           # an OSM XML extract, an edge list CSV or a saved .npz
+    router = Router(graph)
+    route = router.route((40.7410, -73.9896), (40.7527, -73.9772), 'car')
+    route.miles, route.minutes
+
+Nothing goes online. Points are snapped to the nearest node the mode can
+use through a grid index, then routed by A* with a great-circle
+heuristic. route_many() runs one reverse Dijkstra per shared destination
+instead, which is what makes a whole roster (everyone going to the same
+few offices) quick. Routes are cached by origin/destination pair.
+
+OSM .pbf files need converting first, e.g. `osmium cat city.osm.pbf -o city.osm`.
+"""
+import csv
+import heapq
+import math
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+
+from wage_core import TRANSPORT_ALIASES
+
+EARTH_RADIUS_MILES = 3958.8
+MILES_PER_KM = 0.621371
+DEFAULT_CACHE_SIZE = 100000
+# grid index cell, in degrees (about a third of a mile north-south)
+CELL_DEGREES = 0.005
+# points further than this from the network can't be routed
+MAX_SNAP_MILES = 5
+# routes to a destination shared by at least this many origins use one reverse search
+SHARED_DESTINATION = 3
+
+HIGHWAYS = ('motorway', 'motorway_link', 'trunk', 'trunk_link', 'primary', 'primary_link', 'secondary',
+            'secondary_link', 'tertiary', 'tertiary_link', 'unclassified', 'residential', 'living_street',
+            'service', 'road', 'track', 'cycleway', 'path', 'footway', 'pedestrian', 'steps', 'bridleway')
+
+# typical driving speeds in mph when a road has no maxspeed
+DRIVE_SPEEDS = {'motorway': 60, 'motorway_link': 40, 'trunk': 50, 'trunk_link': 35, 'primary': 40,
+                'primary_link': 30, 'secondary': 35, 'secondary_link': 25, 'tertiary': 30, 'tertiary_link': 25,
+                'unclassified': 25, 'residential': 25, 'living_street': 10, 'service': 15, 'road': 25}
+_NOT_FOR_PEOPLE = ('motorway', 'motorway_link', 'trunk', 'trunk_link')
+BIKE_SPEEDS = {name: 12 for name in HIGHWAYS if name not in _NOT_FOR_PEOPLE + ('steps', 'footway', 'pedestrian')}
+WALK_SPEEDS = {name: 3 for name in HIGHWAYS if name not in _NOT_FOR_PEOPLE}
+
+# bits of RoadGraph.blocked, from the access tags
+NO_MOTOR, NO_BICYCLE, NO_FOOT = 1, 2, 4
+
+
+@dataclass(frozen=True)
+class Profile:
+    """How one transport type uses the roads
+
+    speeds maps the highway types it may use to mph. access_speed is the
+    mph of the straight line between a point and the road it snaps to.
+    """
+    speeds: dict
+    blocked_by: int
+    oneway: bool = True
+    use_maxspeed: bool = False
+    access_speed: float = 3
+
+
+PROFILES = {
+    'car': Profile(DRIVE_SPEEDS, NO_MOTOR, use_maxspeed=True, access_speed=10),
+    'ev': Profile(DRIVE_SPEEDS, NO_MOTOR, use_maxspeed=True, access_speed=10),
+    'biking': Profile(BIKE_SPEEDS, NO_BICYCLE, access_speed=8),
+    'walking': Profile(WALK_SPEEDS, NO_FOOT, oneway=False),
+}
+
+
+def haversine_miles(lat1, lon1, lat2, lon2):
+    """Great-circle distance, works on scalars or arrays"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.minimum(a, 1)))
+
+
+def parse_maxspeed(value):
+    """mph from an OSM maxspeed tag ('50' is km/h, '30 mph'), NaN when there isn't a number"""
+    value = (value or '').strip().lower()
+    try:
+        if value.endswith('mph'):
+            return float(value[:-3])
+        return float(value.replace('km/h', '').replace('kmh', '')) * MILES_PER_KM
+    except ValueError:
+        return math.nan
+
+
+def _blocked(tags):
+    blocked = 0
+    if tags.get('access') in ('no', 'private'):
+        blocked = NO_MOTOR | NO_BICYCLE | NO_FOOT
+    for tag, bit in (('motor_vehicle', NO_MOTOR), ('bicycle', NO_BICYCLE), ('foot', NO_FOOT)):
+        if tags.get(tag) in ('no', 'private'):
+            blocked |= bit
+        elif tags.get(tag) in ('yes', 'designated', 'permissive'):
+            blocked &= ~bit
+    return blocked
+
+
+class RoadGraph:
+    """Nodes (lat/lon) and road segments, each with its highway type, one-way flag, maxspeed and access"""
+
+    def __init__(self, lat, lon, source, target, highway, oneway, maxspeed, blocked):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.source = np.asarray(source, dtype=np.int64)
+        self.target = np.asarray(target, dtype=np.int64)
+        self.highway = np.asarray(highway, dtype=np.int8)
+        self.oneway = np.asarray(oneway, dtype=bool)
+        self.maxspeed = np.asarray(maxspeed, dtype=np.float64)
+        self.blocked = np.asarray(blocked, dtype=np.int8)
+        self.miles = haversine_miles(self.lat[self.source], self.lon[self.source],
+                                     self.lat[self.target], self.lon[self.target])
+
+    def __len__(self):
+        return len(self.lat)
+
+    @property
+    def edges(self):
+        return len(self.source)
+
+    def save(self, path):
+        """Write the graph as .npz, which load_graph() reads far quicker than XML"""
+        np.savez_compressed(path, lat=self.lat, lon=self.lon, source=self.source, target=self.target,
+                            highway=self.highway, oneway=self.oneway, maxspeed=self.maxspeed, blocked=self.blocked)
+
+
+def _segments(nodes, ways):
+    """RoadGraph from {osm id: (lat, lon)} and (refs, tags) per way, keeping only the nodes roads use"""
+    index = {}
+    lat, lon = [], []
+    source, target, highway, oneway, maxspeed, blocked = [], [], [], [], [], []
+    for refs, tags in ways:
+        refs = [ref for ref in refs if ref in nodes]
+        direction = tags.get('oneway')
+        if direction == '-1':
+            refs.reverse()
+        for ref in refs:
+            if ref not in index:
+                index[ref] = len(lat)
+                lat.append(nodes[ref][0])
+                lon.append(nodes[ref][1])
+        kind = HIGHWAYS.index(tags['highway'])
+        is_oneway = direction in ('yes', 'true', '1', '-1') or tags['highway'] in ('motorway', 'motorway_link') \
+            or tags.get('junction') == 'roundabout'
+        speed = parse_maxspeed(tags.get('maxspeed'))
+        access = _blocked(tags)
+        for start, end in zip(refs, refs[1:]):
+            source.append(index[start])
+            target.append(index[end])
+            highway.append(kind)
+            oneway.append(is_oneway)
+            maxspeed.append(speed)
+            blocked.append(access)
+    return RoadGraph(lat, lon, source, target, highway, oneway, maxspeed, blocked)
+
+
+def load_osm(path):
+    """RoadGraph from an OSM XML extract, streamed so only the coordinates and roads are kept"""
+    from xml.etree.ElementTree import iterparse
+
+    nodes = {}
+    ways = []
+    refs, tags = [], {}
+    for _, element in iterparse(path, events=('end',)):
+        if element.tag == 'node':
+            nodes[element.get('id')] = (float(element.get('lat')), float(element.get('lon')))
+            refs, tags = [], {}  # a node's own tags (traffic signals, ...) aren't the next way's
+            element.clear()
+        elif element.tag == 'nd':
+            refs.append(element.get('ref'))
+        elif element.tag == 'tag':
+            tags[element.get('k')] = element.get('v')
+        elif element.tag == 'way':
+            if tags.get('highway') in HIGHWAYS and tags.get('area') != 'yes':
+                ways.append((refs, tags))
+            refs, tags = [], {}
+            element.clear()
+        elif element.tag == 'relation':
+            refs, tags = [], {}
+            element.clear()
+    return _segments(nodes, ways)
+
+
+def load_edges_csv(path):
+    """RoadGraph from a CSV of segments: from_lat, from_lon, to_lat, to_lon and optional highway, oneway, maxspeed
+
+    Segment ends at the same coordinates are the same node; highway
+    defaults to residential and maxspeed follows the OSM tag format.
+    """
+    nodes = {}
+    ways = []
+    with open(path, newline='', encoding='utf-8') as source:
+        for row, record in enumerate(csv.DictReader(source), 1):
+            try:
+                ends = ((float(record['from_lat']), float(record['from_lon'])),
+                        (float(record['to_lat']), float(record['to_lon'])))
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"{path} row {row}: needs from_lat, from_lon, to_lat and to_lon") from None
+            tags = {name: value.strip() for name, value in record.items()
+                    if name in ('highway', 'oneway', 'maxspeed', 'access', 'motor_vehicle', 'bicycle', 'foot')
+                    and value and value.strip()}
+            tags.setdefault('highway', 'residential')
+            if tags['highway'] not in HIGHWAYS:
+                raise ValueError(f"{path} row {row}: unknown highway '{tags['highway']}'")
+            for end in ends:
+                nodes.setdefault(end, end)
+            ways.append((list(ends), tags))
+    return _segments(nodes, ways)
+
+
+def load_graph(path):
+    """RoadGraph from a .osm/.xml extract, an edge list .csv or a .npz from RoadGraph.save()"""
+    lowered = path.lower()
+    if lowered.endswith('.npz'):
+        with np.load(path) as data:
+            return RoadGraph(**{name: data[name] for name in data.files})
+    if lowered.endswith('.csv'):
+        return load_edges_csv(path)
+    if lowered.endswith(('.osm', '.xml')):
+        return load_osm(path)
+    raise ValueError(f"Can't tell the road graph format of {path}, expected .osm, .csv or .npz")
+
+
+class GridIndex:
+    """Nodes bucketed by lat/lon cell, for finding the nearest one"""
+
+    def __init__(self, lat, lon, nodes):
+        self.lat = lat
+        self.lon = lon
+        self.cells = {}
+        rows = np.floor(lat[nodes] / CELL_DEGREES).astype(np.int64).tolist()
+        columns = np.floor(lon[nodes] / CELL_DEGREES).astype(np.int64).tolist()
+        for node, row, column in zip(nodes.tolist(), rows, columns):
+            self.cells.setdefault((row, column), []).append(node)
+
+    def nearest(self, lat, lon, max_miles=MAX_SNAP_MILES):
+        """(node, miles) of the nearest node, searched ring by ring outwards; None past max_miles"""
+        row, column = math.floor(lat / CELL_DEGREES), math.floor(lon / CELL_DEGREES)
+        # the narrowest a cell gets at this latitude, so a ring is never closer than assumed
+        cell_miles = CELL_DEGREES * math.pi / 180 * EARTH_RADIUS_MILES * max(math.cos(math.radians(lat)), 0.01)
+        best, best_miles = None, math.inf
+        ring = 0
+        while (ring - 1) * cell_miles <= min(best_miles, max_miles):
+            candidates = []
+            for r in range(row - ring, row + ring + 1):
+                for c in range(column - ring, column + ring + 1):
+                    if max(abs(r - row), abs(c - column)) == ring:
+                        candidates.extend(self.cells.get((r, c), ()))
+            if candidates:
+                miles = haversine_miles(lat, lon, self.lat[candidates], self.lon[candidates])
+                i = int(np.argmin(miles))
+                if miles[i] < best_miles:
+                    best, best_miles = candidates[i], float(miles[i])
+            ring += 1
+        if best is None or best_miles > max_miles:
+            return None
+        return best, best_miles
+
+
+class Network:
+    """The part of a RoadGraph one profile can use, as forward and reverse adjacency lists"""
+
+    def __init__(self, graph, profile):
+        speeds = np.array([profile.speeds.get(name, 0) for name in HIGHWAYS], dtype=np.float64)[graph.highway]
+        if profile.use_maxspeed:
+            speeds = np.where(np.isnan(graph.maxspeed), speeds, np.where(speeds > 0, graph.maxspeed, 0))
+        usable = (speeds > 0) & ((graph.blocked & profile.blocked_by) == 0)
+        minutes = graph.miles[usable] / speeds[usable] * 60
+        miles = graph.miles[usable]
+        source, target = graph.source[usable], graph.target[usable]
+        both = ~graph.oneway[usable] if profile.oneway else np.ones(len(source), dtype=bool)
+        source, target = np.concatenate([source, target[both]]), np.concatenate([target, source[both]])
+        minutes, miles = np.concatenate([minutes, minutes[both]]), np.concatenate([miles, miles[both]])
+        self.max_speed = float(speeds[usable].max()) if usable.any() else 1.0
+        self.forward = self._adjacency(len(graph), source, target, minutes, miles)
+        self.reverse = self._adjacency(len(graph), target, source, minutes, miles)
+        self.lat = graph.lat.tolist()
+        self.lon = graph.lon.tolist()
+        self.index = GridIndex(graph.lat, graph.lon, np.unique(source))
+
+    @staticmethod
+    def _adjacency(size, source, target, minutes, miles):
+        """Per node, a list of (neighbour, minutes, miles)"""
+        order = np.argsort(source, kind='stable')
+        bounds = np.searchsorted(source[order], np.arange(size + 1)).tolist()
+        edges = list(zip(target[order].tolist(), minutes[order].tolist(), miles[order].tolist()))
+        return [edges[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+
+    def _straight_minutes(self, node, lat, lon):
+        # great-circle distance at the fastest speed, never more than the real route
+        lat1, lon1 = math.radians(self.lat[node]), math.radians(self.lon[node])
+        a = math.sin((lat - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat) * math.sin((lon - lon1) / 2) ** 2
+        return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(min(a, 1))) / self.max_speed * 60
+
+    def astar(self, source, target):
+        """(minutes, miles) of the quickest route between two nodes, None when there is none"""
+        lat, lon = math.radians(self.lat[target]), math.radians(self.lon[target])
+        best = {source: 0.0}
+        heap = [(self._straight_minutes(source, lat, lon), 0.0, 0.0, source)]
+        done = set()
+        while heap:
+            _, minutes, miles, node = heapq.heappop(heap)
+            if node == target:
+                return minutes, miles
+            if node in done:
+                continue
+            done.add(node)
+            for neighbour, edge_minutes, edge_miles in self.forward[node]:
+                total = minutes + edge_minutes
+                if total < best.get(neighbour, math.inf):
+                    best[neighbour] = total
+                    heapq.heappush(heap, (total + self._straight_minutes(neighbour, lat, lon), total,
+                                          miles + edge_miles, neighbour))
+        return None
+
+    def to_target(self, target, sources):
+        """{source: (minutes, miles)} to one node, one reverse Dijkstra that stops once every source is reached"""
+        wanted = set(sources)
+        found = {}
+        best = {target: 0.0}
+        heap = [(0.0, 0.0, target)]
+        while heap and wanted:
+            minutes, miles, node = heapq.heappop(heap)
+            if node in found or minutes > best.get(node, math.inf):
+                continue
+            found[node] = (minutes, miles)
+            wanted.discard(node)
+            for neighbour, edge_minutes, edge_miles in self.reverse[node]:
+                total = minutes + edge_minutes
+                if total < best.get(neighbour, math.inf):
+                    best[neighbour] = total
+                    heapq.heappush(heap, (total, miles + edge_miles, neighbour))
+        return {source: found[source] for source in sources if source in found}
+
+
+class Route:
+    """One-way distance and time between two points, snapping to and from the road included"""
+
+    def __init__(self, miles, minutes, road_miles, access_miles):
+        self.miles = miles
+        self.minutes = minutes
+        self.road_miles = road_miles
+        self.access_miles = access_miles  # straight line between the points and the roads they snapped to
+
+    def as_dict(self):
+        return {'miles': self.miles, 'minutes': self.minutes, 'road_miles': self.road_miles,
+                'access_miles': self.access_miles}
+
+    def __repr__(self):
+        return f"Route({self.miles:.2f} mi, {self.minutes:.1f} min)"
+
+
+def _mode(transport_type):
+    mode = TRANSPORT_ALIASES.get(transport_type, transport_type)
+    if mode not in PROFILES:
+        raise ValueError(f"No road routing for '{transport_type}', expected one of {', '.join(PROFILES)}")
+    return mode
+
+
+class Router:
+    """Routes over one RoadGraph, with an LRU cache of routes by rounded origin/destination
+
+    The network for each transport type is built on first use.
+    """
+
+    def __init__(self, graph, cache_size=DEFAULT_CACHE_SIZE, max_snap_miles=MAX_SNAP_MILES):
+        self.graph = graph
+        self.cache_size = cache_size
+        self.max_snap_miles = max_snap_miles
+        self.networks = {}
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.unrouted = 0  # records fill_commutes() had coordinates for but couldn't route
+
+    def network(self, mode):
+        network = self.networks.get(mode)
+        if network is None:
+            network = self.networks[mode] = Network(self.graph, PROFILES[mode])
+        return network
+
+    def _key(self, origin, destination, mode):
+        # five decimals is about a metre
+        return (mode, round(origin[0], 5), round(origin[1], 5), round(destination[0], 5), round(destination[1], 5))
+
+    def _cached(self, key):
+        route = self.cache.get(key)
+        if route is not None:
+            self.hits += 1
+            self.cache.move_to_end(key)
+        return route
+
+    def _store(self, key, route):
+        self.misses += 1
+        self.cache[key] = route
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def snap(self, point, mode):
+        """(node, miles) of the nearest node the mode can use"""
+        snapped = self.network(mode).index.nearest(point[0], point[1], self.max_snap_miles)
+        if snapped is None:
+            raise ValueError(f"({point[0]}, {point[1]}) is more than {self.max_snap_miles} miles from any road "
+                             f"for {mode}")
+        return snapped
+
+    def _route(self, mode, origin_snap, destination_snap, found):
+        if found is None:
+            return None
+        minutes, miles = found
+        access = origin_snap[1] + destination_snap[1]
+        return Route(miles + access, minutes + access / PROFILES[mode].access_speed * 60, miles, access)
+
+    def route(self, origin, destination, transport_type='car'):
+        """Route between two (lat, lon) points, None when the roads don't connect them"""
+        mode = _mode(transport_type)
+        key = self._key(origin, destination, mode)
+        route = self._cached(key)
+        if route is None:
+            start, end = self.snap(origin, mode), self.snap(destination, mode)
+            route = self._route(mode, start, end, self.network(mode).astar(start[0], end[0]))
+            if route is not None:
+                self._store(key, route)
+        return route
+
+    def route_many(self, pairs, transport_type='car'):
+        """Routes for a list of (origin, destination) points, None where there isn't one
+
+        Origins sharing a destination are routed together by one search out
+        from it; points off the network give None too.
+        """
+        mode = _mode(transport_type)
+        network = self.network(mode)
+        routes = [None] * len(pairs)
+        by_destination = {}
+        for i, (origin, destination) in enumerate(pairs):
+            key = self._key(origin, destination, mode)
+            route = self._cached(key)
+            if route is not None:
+                routes[i] = route
+                continue
+            start = network.index.nearest(origin[0], origin[1], self.max_snap_miles)
+            end = network.index.nearest(destination[0], destination[1], self.max_snap_miles)
+            if start is not None and end is not None:
+                by_destination.setdefault(end, []).append((i, key, start))
+        for end, waiting in by_destination.items():
+            if len(waiting) >= SHARED_DESTINATION:
+                found = network.to_target(end[0], [start[0] for _, _, start in waiting])
+                results = [found.get(start[0]) for _, _, start in waiting]
+            else:
+                results = [network.astar(start[0], end[0]) for _, _, start in waiting]
+            for (i, key, start), result in zip(waiting, results):
+                routes[i] = self._route(mode, start, end, result)
+                if routes[i] is not None:
+                    self._store(key, routes[i])
+        return routes
+
+
+COORDINATE_FIELDS = ('home_lat', 'home_lon', 'work_lat', 'work_lon')
+
+
+def _point(record, lat, lon):
+    try:
+        return float(record[lat]), float(record[lon])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def fill_commutes(records, router, chunk_size=10000):
+    """Yield raw bulk records with daily_miles and commute_minutes routed from home_lat/lon and work_lat/lon
+
+    Records without coordinates, going by public transport or that can't
+    be routed keep whatever distance and time they had; router.unrouted
+    counts the ones that had coordinates.
+    """
+    from wage_bulk import iter_chunks
+
+    for chunk in iter_chunks(records, chunk_size):
+        by_mode = {}
+        for i, record in enumerate(chunk):
+            home = _point(record, 'home_lat', 'home_lon')
+            work = _point(record, 'work_lat', 'work_lon')
+            if home is None or work is None:
+                continue
+            mode = str(record.get('transport_type') or 'car').strip()
+            mode = TRANSPORT_ALIASES.get(mode, mode)
+            if mode not in PROFILES:
+                continue
+            by_mode.setdefault(mode, []).append((i, (home, work)))
+        for mode, waiting in by_mode.items():
+            routes = router.route_many([pair for _, pair in waiting], mode)
+            for (i, _), route in zip(waiting, routes):
+                if route is None:
+                    router.unrouted += 1
+                    continue
+                chunk[i] = dict(chunk[i], daily_miles=route.miles, commute_minutes=route.minutes)
+        yield from chunk
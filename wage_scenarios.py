@@ -0,0 +1,287 @@
+"""Named scenarios and their results in SQLite, indexed for range queries
+
+    with ScenarioStore('scenarios.db') as store:
+        store.add_many({'Alice': WageInputs(paycheck=2100), 'Bob': WageInputs(commute_minutes=70)})
+        for name, result in store.query(min_wage_loss=0.2, transport_type='car'):
+            ...
+
+Results are stored next to the inputs so queries never recalculate. Each row
+remembers the assumptions (wage_core.ASSUMPTIONS) it was calculated with; a
+row whose inputs were edited, or that was calculated under other
+assumptions, is stale and refresh() recalculates just those rows, in
+batches, before any query.
+"""
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import fields
+from operator import attrgetter
+
+from wage_core import ASSUMPTIONS, OUTPUT_COLUMNS, RESULT_FIELDS, WageInputs, WageResult, normalize_inputs
+
+DEFAULT_PATH = os.path.join(os.path.expanduser('~'), '.truecost', 'scenarios.db')
+CHUNK_SIZE = 10000
+# writes of at least this many rows (and a quarter of the table) rebuild the indexes instead of updating them
+BULK_ROWS = 10000
+
+_SQL_TYPES = {float: 'REAL', str: 'TEXT', bool: 'INTEGER'}
+INPUT_COLUMNS = tuple((field.name, _SQL_TYPES[field.type]) for field in fields(WageInputs))
+INPUT_FIELDS = tuple(name for name, _ in INPUT_COLUMNS)
+input_values = attrgetter(*INPUT_FIELDS)
+
+RESULT_COLUMNS = tuple(OUTPUT_COLUMNS.get(name, name) for name in RESULT_FIELDS)
+# share of the traditional hourly wage lost to the commute, and of take-home pay spent on it
+DERIVED_FIELDS = ('wage_loss', 'cost_share')
+STORED_RESULTS = RESULT_COLUMNS + DERIVED_FIELDS
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS scenarios (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    {', '.join(f'{name} {kind} NOT NULL' for name, kind in INPUT_COLUMNS)},
+    {', '.join(f'{name} REAL' for name in STORED_RESULTS)},
+    computed_with TEXT
+);
+"""
+
+INDEXES = {
+    'scenarios_transport': '(transport_type, true_wage)',
+    'scenarios_pay_frequency': '(pay_frequency, true_wage)',
+    'scenarios_true_wage': '(true_wage)',
+    'scenarios_wage_loss': '(wage_loss)',
+    'scenarios_computed_with': '(computed_with)',
+}
+
+# rows calculated under other assumptions, or never, written so the computed_with index is used
+STALE = "(computed_with IS NULL OR computed_with < ? OR computed_with > ?)"
+
+# query() filters: keyword -> (column, operator)
+RANGE_FILTERS = {
+    'min_true_wage': ('true_wage', '>='),
+    'max_true_wage': ('true_wage', '<='),
+    'min_wage_loss': ('wage_loss', '>='),
+    'max_wage_loss': ('wage_loss', '<='),
+    'min_cost_share': ('cost_share', '>='),
+    'max_cost_share': ('cost_share', '<='),
+}
+
+
+def assumptions_key():
+    """What stored results depend on besides the inputs"""
+    return json.dumps(ASSUMPTIONS, sort_keys=True)
+
+
+def _inputs(value):
+    if not isinstance(value, WageInputs):
+        value = WageInputs.from_dict(value)
+    return normalize_inputs(value)
+
+
+def derived_columns(results):
+    """wage_loss and cost_share columns for a calculate_batch() result"""
+    import numpy as np
+
+    traditional = results['traditional_wage']
+    income = results['annual_income']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        wage_loss = np.where(traditional > 0, 1 - results['true_wage'] / traditional, 0.0)
+        cost_share = np.where(income > 0, results['yearly_commute_costs'] / income, 0.0)
+    return {'wage_loss': wage_loss, 'cost_share': cost_share}
+
+
+def calculate_rows(rows):
+    """Stored result values for rows of input values (in INPUT_FIELDS order), calculated as one batch"""
+    from wage_batch import calculate_batch  # numpy is only needed once there is something to calculate
+
+    results = calculate_batch(**dict(zip(INPUT_FIELDS, zip(*rows))))
+    columns = [results[name] for name in RESULT_FIELDS] + list(derived_columns(results).values())
+    return list(zip(*(column.tolist() for column in columns)))
+
+
+class ScenarioStore:
+    """A SQLite file of named scenarios, ':memory:' for a throwaway one"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute('PRAGMA cache_size=-65536')  # 64MB, keeps the indexes in memory during bulk writes
+        self.connection.executescript(SCHEMA)
+        self._create_indexes()
+
+    def _create_indexes(self):
+        for name, columns in INDEXES.items():
+            self.connection.execute(f"CREATE INDEX IF NOT EXISTS {name} ON scenarios {columns}")
+
+    @contextmanager
+    def _bulk_write(self, rows):
+        """One transaction, without the indexes for big writes; building them once beats updating them row by row"""
+        with self.connection:
+            rebuild = rows >= BULK_ROWS and rows * 4 >= len(self)
+            if rebuild:
+                for name in INDEXES:
+                    self.connection.execute(f"DROP INDEX IF EXISTS {name}")
+            yield
+            if rebuild:
+                self._create_indexes()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM scenarios').fetchone()[0]
+
+    def __contains__(self, name):
+        return self.connection.execute('SELECT 1 FROM scenarios WHERE name = ?', (name,)).fetchone() is not None
+
+    def names(self):
+        return [name for name, in self.connection.execute('SELECT name FROM scenarios ORDER BY name')]
+
+    def add(self, name, inputs):
+        self.add_many([(name, inputs)])
+
+    def add_many(self, scenarios, chunk_size=CHUNK_SIZE, calculate=True):
+        """Insert or replace scenarios, a dict or (name, inputs) pairs, returns how many
+
+        Inputs are WageInputs or dicts of fields. Results are calculated a
+        chunk at a time on the way in, or on the next refresh() with
+        calculate=False.
+        """
+        if isinstance(scenarios, dict):
+            scenarios = scenarios.items()
+        columns = ('name',) + INPUT_FIELDS + (STORED_RESULTS + ('computed_with',) if calculate else ())
+        statement = (f"INSERT OR REPLACE INTO scenarios ({', '.join(columns)}) "
+                     f"VALUES ({', '.join('?' * len(columns))})")
+        key = assumptions_key()
+        count = 0
+        chunk = []
+        with self._bulk_write(len(scenarios) if hasattr(scenarios, '__len__') else 0):
+            for name, inputs in scenarios:
+                chunk.append((name, _inputs(inputs)))
+                if len(chunk) == chunk_size:
+                    count += self._insert(statement, chunk, calculate, key)
+                    chunk = []
+            if chunk:
+                count += self._insert(statement, chunk, calculate, key)
+        return count
+
+    def _insert(self, statement, chunk, calculate, key):
+        values = [input_values(inputs) for _, inputs in chunk]
+        rows = [(name,) + row for (name, _), row in zip(chunk, values)]
+        if calculate:
+            rows = [row + results + (key,) for row, results in zip(rows, calculate_rows(values))]
+        self.connection.executemany(statement, rows)
+        return len(rows)
+
+    def update(self, name, **changes):
+        """Change some inputs of one scenario, its results go stale until the next refresh()"""
+        inputs = _inputs(dict(self.inputs(name).as_dict(), **changes))
+        with self.connection:
+            self.connection.execute(
+                f"UPDATE scenarios SET {', '.join(f'{field} = ?' for field in INPUT_FIELDS)}, computed_with = NULL "
+                f"WHERE name = ?", input_values(inputs) + (name,))
+
+    def delete(self, name):
+        with self.connection:
+            self.connection.execute('DELETE FROM scenarios WHERE name = ?', (name,))
+
+    def inputs(self, name):
+        row = self.connection.execute(f"SELECT {', '.join(INPUT_FIELDS)} FROM scenarios WHERE name = ?",
+                                      (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return self._row_inputs(row)
+
+    @staticmethod
+    def _row_inputs(row):
+        values = dict(zip(INPUT_FIELDS, row))
+        values['use_monthly_pass'] = bool(values['use_monthly_pass'])
+        return WageInputs(**values)
+
+    def stale_count(self):
+        key = assumptions_key()
+        return self.connection.execute(f"SELECT COUNT(*) FROM scenarios WHERE {STALE}", (key, key)).fetchone()[0]
+
+    def refresh(self, chunk_size=CHUNK_SIZE):
+        """Recalculate the stale rows only, returns how many there were"""
+        stale = self.stale_count()
+        if not stale:
+            return 0
+        key = assumptions_key()
+        # walk the table in id order so each batch starts where the last one ended
+        select = (f"SELECT id, {', '.join(INPUT_FIELDS)} FROM scenarios "
+                  f"WHERE id > ? AND {STALE} ORDER BY id LIMIT ?")
+        update = (f"UPDATE scenarios SET {', '.join(f'{name} = ?' for name in STORED_RESULTS)}, computed_with = ? "
+                  f"WHERE id = ?")
+        count = 0
+        last = 0
+        with self._bulk_write(stale):
+            while True:
+                rows = self.connection.execute(select, (last, key, key, chunk_size)).fetchall()
+                if not rows:
+                    break
+                results = calculate_rows([row[1:] for row in rows])
+                self.connection.executemany(update, [values + (key, row[0]) for row, values in zip(rows, results)])
+                count += len(rows)
+                last = rows[-1][0]
+        return count
+
+    def get(self, name):
+        """WageResult for one scenario"""
+        for _, result in self.query(name=name):
+            return result
+        raise KeyError(name)
+
+    def _where(self, name=None, transport_type=None, pay_frequency=None, **ranges):
+        clauses, params = [], []
+        for column, value in (('name', name), ('transport_type', transport_type), ('pay_frequency', pay_frequency)):
+            if value is None:
+                continue
+            values = [value] if isinstance(value, str) else list(value)
+            clauses.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+        for keyword, value in ranges.items():
+            if keyword not in RANGE_FILTERS:
+                raise ValueError(f"Unknown filter '{keyword}', expected one of {', '.join(RANGE_FILTERS)}")
+            if value is not None:
+                column, operator = RANGE_FILTERS[keyword]
+                clauses.append(f"{column} {operator} ?")
+                params.append(value)
+        return (f" WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+    def count(self, **filters):
+        """Number of scenarios matching the query() filters"""
+        self.refresh()
+        where, params = self._where(**filters)
+        return self.connection.execute(f"SELECT COUNT(*) FROM scenarios{where}", params).fetchone()[0]
+
+    def query(self, order_by='true_wage', descending=False, limit=None, **filters):
+        """Yield (name, WageResult) for the matching scenarios
+
+        Filters are name, transport_type and pay_frequency (a value or a
+        list of values) and the ranges in RANGE_FILTERS, e.g.
+        min_wage_loss=0.2 for everyone losing a fifth or more of their
+        hourly wage to the commute.
+        """
+        if order_by not in STORED_RESULTS + INPUT_FIELDS + ('name',):
+            raise ValueError(f"Can't order by '{order_by}'")
+        self.refresh()
+        where, params = self._where(**filters)
+        sql = (f"SELECT name, {', '.join(INPUT_FIELDS)}, {', '.join(RESULT_COLUMNS)} FROM scenarios{where} "
+               f"ORDER BY {order_by}{' DESC' if descending else ''}")
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        split = 1 + len(INPUT_FIELDS)
+        for row in self.connection.execute(sql, params):
+            yield row[0], WageResult(self._row_inputs(row[1:split]), **dict(zip(RESULT_FIELDS, row[split:])))
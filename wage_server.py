@@ -0,0 +1,288 @@
+"""Local HTTP/JSON calculation service on asyncio
+
+    python wage_server.py --port 8080
+
+    POST /calculate   one input record (JSON object), returns its inputs and results
+    POST /batch       {"records": [...]} or a bare list, returns {"results": [...]}
+    GET  /health      liveness check
+    GET  /stats       request counters and cache stats
+
+Both give the same flat object for a record, results named as
+wage_core.OUTPUT_COLUMNS has them (the commute with walking is
+one_way_minutes, commute_minutes stays the input). Connections are
+HTTP/1.1 keep-alive. Pipelined requests are answered in the
+order they were sent. Single records are calculated inline through the
+result cache, which takes microseconds. Batches go to a bounded process
+pool so the event loop keeps serving while they run.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from wage_bulk import calculate_chunk, columns_to_rows, inputs_to_columns, parse_chunk
+from wage_cache import DEFAULT_CACHE_SIZE, ResultCache
+from wage_core import WageInputs
+from wage_profile import stage
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8080
+MAX_BODY = 64 * 1024 * 1024
+MAX_HEADER = 64 * 1024
+# batches smaller than this are cheaper to run inline than to ship to a worker
+INLINE_BATCH = 256
+IDLE_TIMEOUT = 60
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           408: 'Request Timeout', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _ready():
+    return True
+
+
+def _check_inputs(inputs):
+    """ValueError (a 400) naming every wage_validation rule or check the inputs break, rows count from 1"""
+    from wage_validation import check_columns  # numpy, kept out of plain truecost runs
+
+    check_columns(inputs_to_columns(inputs))
+
+
+def _check_input(inputs):
+    _check_inputs([inputs])
+
+
+def _calculate_batch(records):
+    """Worker side of /batch"""
+    inputs = parse_chunk(records)
+    _check_inputs(inputs)
+    return list(columns_to_rows(calculate_chunk(inputs)))
+
+
+class WageServer:
+    """The service; start() binds, serve_forever() runs until cancelled"""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=None, cache_size=DEFAULT_CACHE_SIZE,
+                 max_pending=None):
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.cache = ResultCache(cache_size)
+        self.max_pending = max_pending or self.workers * 2
+        self.executor = None
+        self.pending = None
+        self.server = None
+        self.requests = 0
+        self.errors = 0
+        self.connections = 0
+
+    async def start(self):
+        # at most max_pending batches queued or running in the pool, the rest wait their turn;
+        # made here so it belongs to the running loop
+        self.pending = asyncio.Semaphore(self.max_pending)
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        # fork the workers now, before there are client sockets to inherit, and so the
+        # first big batch doesn't pay for process startup
+        await asyncio.get_running_loop().run_in_executor(self.executor, _ready)
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port,
+                                                 limit=MAX_HEADER)
+        self.port = self.server.sockets[0].getsockname()[1]  # when started on port 0
+        return self
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False)
+
+    async def handle_connection(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self.read_request(reader), IDLE_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except HTTPError as e:
+                    # the stream can't be trusted after a malformed request
+                    self.write_response(writer, e.status, {'error': str(e)}, keep_alive=False)
+                    await writer.drain()
+                    return
+                if request is None:
+                    return
+
+                method, path, headers, body, keep_alive = request
+                status, payload = await self.dispatch(method, path, body)
+                self.write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            if not e.partial.strip():
+                return None  # clean close between requests
+            raise
+        except asyncio.LimitOverrunError:
+            raise HTTPError(413, "Headers too large") from None
+
+        lines = head.decode('latin-1').split("\r\n")
+        try:
+            method, path, version = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line") from None
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            raise HTTPError(400, "Chunked request bodies are not supported, send Content-Length")
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HTTPError(400, "Bad Content-Length") from None
+        if length < 0:
+            raise HTTPError(400, "Bad Content-Length")
+        if length > MAX_BODY:
+            raise HTTPError(413, f"Body larger than {MAX_BODY} bytes")
+        body = await reader.readexactly(length) if length else b""
+
+        connection = headers.get('connection', '').lower()
+        if version.upper() == 'HTTP/1.0':
+            keep_alive = connection == 'keep-alive'
+        else:
+            keep_alive = connection != 'close'
+        return method.upper(), path.split('?', 1)[0], headers, body, keep_alive
+
+    def write_response(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode()
+        head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+
+    async def dispatch(self, method, path, body):
+        self.requests += 1
+        try:
+            routes = {
+                '/calculate': ('POST', self.calculate),
+                '/batch': ('POST', self.batch),
+                '/health': ('GET', self.health),
+                '/stats': ('GET', self.stats),
+            }
+            if path not in routes:
+                raise HTTPError(404, f"No endpoint {path}")
+            allowed, handler = routes[path]
+            if method != allowed:
+                raise HTTPError(405, f"{path} takes {allowed}")
+            data = None
+            if allowed == 'POST':
+                try:
+                    data = json.loads(body or b'null')
+                except ValueError as e:
+                    raise HTTPError(400, f"Invalid JSON: {e}") from None
+            return 200, await handler(data)
+        except HTTPError as e:
+            self.errors += 1
+            return e.status, {'error': str(e)}
+        except (TypeError, ValueError) as e:
+            self.errors += 1
+            return 400, {'error': str(e)}
+        except Exception as e:  # keep serving whatever one request does
+            self.errors += 1
+            return 500, {'error': f"{type(e).__name__}: {e}"}
+
+    async def calculate(self, data):
+        if not isinstance(data, dict):
+            raise HTTPError(400, "Expected a JSON object of inputs")
+        with stage('server.calculate'):
+            # a cache hit was checked when it was first calculated
+            result = self.cache.calculate(WageInputs.from_dict(data), check=_check_input)
+            return result.as_dict()
+
+    async def batch(self, data):
+        records = data.get('records') if isinstance(data, dict) else data
+        if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+            raise HTTPError(400, "Expected a list of input objects, or {\"records\": [...]}")
+        if len(records) < INLINE_BATCH:
+            with stage('server.batch_inline'):
+                return {'results': _calculate_batch(records) if records else []}
+        async with self.pending:
+            with stage('server.batch_pool'):
+                loop = asyncio.get_running_loop()
+                results = await loop.run_in_executor(self.executor, _calculate_batch, records)
+        return {'results': results}
+
+    async def health(self, data):
+        return {'status': 'ok'}
+
+    async def stats(self, data):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'connections': self.connections,
+            'workers': self.workers,
+            'cache': self.cache.stats(),
+        }
+
+
+async def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, workers=None, cache_size=DEFAULT_CACHE_SIZE):
+    server = await WageServer(host, port, workers, cache_size).start()
+    print(f"Serving true wage calculations on http://{server.host}:{server.port}", file=sys.stderr)
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def add_server_arguments(parser):
+    parser.add_argument('--host', default=DEFAULT_HOST, help="Address to listen on")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument('--server-workers', type=int, default=0,
+                        help="Processes for /batch requests, 0 means one per CPU core")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE,
+                        help="Distinct single calculations to remember")
+
+
+def run(args):
+    """Serve until interrupted, options left as None (truecost --serve) take the defaults above"""
+    host = DEFAULT_HOST if args.host is None else args.host
+    port = DEFAULT_PORT if args.port is None else args.port
+    cache_size = DEFAULT_CACHE_SIZE if args.cache_size is None else args.cache_size
+    try:
+        asyncio.run(serve(host, port, args.server_workers or None, cache_size))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve true wage calculations over HTTP/JSON")
+    add_server_arguments(parser)
+    return run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+"""Inverse questions: which paycheck, commute or gas price gives a true wage of $X
+
+    solve_for(WageInputs(...), 'gas_price', 20.0)
+    solve(target=[18, 20, 22], parameter='paycheck', **department_columns)
+
+The true wage is net income over committed hours, and every numeric input
+enters both of those linearly, either as itself or as its reciprocal (MPG,
+EV efficiency). Two probes of the batch engine give the coefficients, after
+which every target is one division. Other engines (a calendar year, say)
+fall back on bisection, all rows and targets at once.
+"""
+import warnings
+from functools import partial
+
+import numpy as np
+
+from wage_batch import calculate_batch
+from wage_core import normalize_inputs
+from wage_validation import RULES, rule_mask
+
+# how each input enters net income and committed hours
+LINEAR = 'linear'
+RECIPROCAL = 'reciprocal'
+FORMS = {
+    'paycheck': LINEAR,
+    'daily_hours': LINEAR,
+    'work_days': LINEAR,
+    'commute_minutes': LINEAR,
+    'daily_miles': LINEAR,
+    'gas_mileage': RECIPROCAL,
+    'gas_price': LINEAR,
+    'ev_efficiency': RECIPROCAL,
+    'electricity_price': LINEAR,
+    'daily_public_cost': LINEAR,
+    'monthly_pass_cost': LINEAR,
+    'walking_minutes': LINEAR,
+    'daily_other_costs': LINEAR,
+}
+
+# search range for bisection
+BOUNDS = {
+    'paycheck': (0, 1e6),
+    'daily_hours': (0.1, 24),
+    'work_days': (0.1, 7),
+    'commute_minutes': (0, 720),
+    'daily_miles': (0, 500),
+    'gas_mileage': (1, 200),
+    'gas_price': (0, 50),
+    'ev_efficiency': (0.5, 20),
+    'electricity_price': (0, 5),
+    'daily_public_cost': (0, 500),
+    'monthly_pass_cost': (0, 5000),
+    'walking_minutes': (0, 600),
+    'daily_other_costs': (0, 1000),
+}
+
+BISECTION_STEPS = 60
+
+
+def _parameter(name):
+    from wage_sweep import resolve_parameter  # accepts the GUI's variable names too
+    name = resolve_parameter(name)
+    if name not in FORMS:
+        raise ValueError(f"Can't solve for '{name}', expected one of {', '.join(FORMS)}")
+    return name
+
+
+def _warn_if_ignored(parameter, changes):
+    """Warn when the parameter moves nobody's true wage, every answer is NaN then (gas price for a cyclist)"""
+    if not np.any(changes):
+        warnings.warn(f"'{parameter}' doesn't change the true wage of any row, so every answer is NaN; "
+                      f"check transport_type and the inputs it uses", RuntimeWarning, stacklevel=3)
+
+
+def within_limits(parameter, values):
+    """values with NaN where the prompts and bulk validation would reject them (wage_validation.RULES)"""
+    for rule in RULES:
+        if rule.field == parameter:
+            values = np.where(rule_mask(rule, values), np.nan, values)
+    return values
+
+
+def solve_closed_form(target, parameter, engine=calculate_batch, **columns):
+    """Exact solution from two probes, NaN where no value of the parameter gives the target"""
+    target = np.asarray(target, dtype=np.float64)
+    form = FORMS[parameter]
+    probes = []
+    for x in (1.0, 2.0):
+        batch = engine(outputs=('net_yearly_income', 'total_committed_hours'), **dict(columns, **{parameter: x}))
+        g = x if form == LINEAR else 1 / x
+        probes.append((g, batch['net_yearly_income'], batch['total_committed_hours']))
+
+    # net income = n0 + n1 g, committed hours = d0 + d1 g, with g = x or 1/x
+    (g0, n_at0, d_at0), (g1, n_at1, d_at1) = probes
+    n1 = (n_at1 - n_at0) / (g1 - g0)
+    d1 = (d_at1 - d_at0) / (g1 - g0)
+    n0 = n_at0 - n1 * g0
+    d0 = d_at0 - d1 * g0
+    _warn_if_ignored(parameter, (n1 != 0) | (d1 != 0))
+
+    # target * (d0 + d1 g) = n0 + n1 g
+    numerator = n0 - target * d0
+    denominator = target * d1 - n1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        g = np.where(denominator != 0, numerator / denominator, np.nan)
+        x = g if form == LINEAR else 1 / g
+    # negative values, and hours that would have to be negative, are no solution
+    feasible = (x >= 0) & (d0 + d1 * g > 0)
+    return np.where(feasible, x, np.nan)
+
+
+def solve_bisection(target, parameter, engine=calculate_batch, bounds=None, steps=BISECTION_STEPS, **columns):
+    """Root of true_wage(x) - target inside bounds for every row at once, NaN where it isn't bracketed"""
+    low, high = bounds or BOUNDS[parameter]
+    target = np.asarray(target, dtype=np.float64)
+
+    def error(x):
+        return engine(outputs=('true_wage',), **dict(columns, **{parameter: x}))['true_wage'] - target
+
+    shape = np.shape(error(np.float64(low)))
+    low = np.full(shape, float(low))
+    high = np.full(shape, float(high))
+    low_error = error(low)
+    high_error = error(high)
+    _warn_if_ignored(parameter, low_error != high_error)
+    bracketed = np.sign(low_error) != np.sign(high_error)
+    bracketed |= (low_error == 0) | (high_error == 0)
+
+    for _ in range(steps):
+        middle = (low + high) / 2
+        middle_error = error(middle)
+        same_side = np.sign(middle_error) == np.sign(low_error)
+        low = np.where(same_side, middle, low)
+        low_error = np.where(same_side, middle_error, low_error)
+        high = np.where(same_side, high, middle)
+    return np.where(bracketed, (low + high) / 2, np.nan)
+
+
+def solve(target, parameter, engine=None, method=None, bounds=None, **columns):
+    """Value of one input that makes the true wage equal target
+
+    target and the input columns broadcast against each other, so one call
+    answers many targets for many people. The other keywords are the
+    calculate_batch() inputs. method is 'closed' (the default with the
+    standard engine) or 'bisect' (the default with any other engine). NaN
+    marks targets no value of the parameter reaches, and targets only a
+    value outside the input limits reaches (more than seven work days).
+    """
+    parameter = _parameter(parameter)
+    columns.pop(parameter, None)
+    if method is None:
+        method = 'closed' if engine is None else 'bisect'
+    engine = engine or calculate_batch
+    if method == 'closed':
+        return within_limits(parameter, solve_closed_form(target, parameter, engine, **columns))
+    if method == 'bisect':
+        return within_limits(parameter, solve_bisection(target, parameter, engine, bounds, **columns))
+    raise ValueError(f"Unknown method '{method}', use closed or bisect")
+
+
+def solve_for(inputs, parameter, target, **options):
+    """Single answer for one person, NaN when the target can't be reached"""
+    return float(solve(target, parameter, **options, **normalize_inputs(inputs).as_dict()))
+
+
+def break_even_table(parameter, targets, engine=None, **columns):
+    """(people, targets) table of the parameter each person needs for each target wage"""
+    targets = np.asarray(targets, dtype=np.float64)
+    columns = {name: np.asarray(value)[..., None] if np.ndim(value) else value for name, value in columns.items()}
+    return solve(targets, parameter, engine, **columns)
+
+
+def calendar_engine(year, **schedule):
+    """An engine for solve() that works over a real year, see wage_calendar"""
+    from wage_calendar import calculate_calendar_batch
+    return partial(calculate_calendar_batch, year, **schedule)
@@ -0,0 +1,117 @@
+"""Sensitivity sweeps: true wage over a Cartesian grid of inputs as one broadcast computation"""
+from dataclasses import fields
+
+import numpy as np
+
+from wage_batch import calculate_batch
+from wage_core import WageInputs, normalize_inputs
+
+SWEEPABLE = tuple(field.name for field in fields(WageInputs))
+
+# the GUI's variable names are accepted too, e.g. gas_price_var or mpg_var
+PARAMETER_ALIASES = {
+    'mpg': 'gas_mileage',
+    'daily_commute_minutes': 'commute_minutes',
+    'paycheck_var': 'paycheck',
+    'daily_hours_var': 'daily_hours',
+    'work_days_var': 'work_days',
+    'commute_minutes_var': 'commute_minutes',
+    'daily_miles_var': 'daily_miles',
+    'gas_price_var': 'gas_price',
+    'mpg_var': 'gas_mileage',
+    'daily_costs_var': 'daily_other_costs',
+    'ev_efficiency_var': 'ev_efficiency',
+    'electricity_price_var': 'electricity_price',
+    'public_daily_cost_var': 'daily_public_cost',
+    'public_monthly_cost_var': 'monthly_pass_cost',
+    'public_walking_minutes_var': 'walking_minutes',
+}
+
+# grid points per slab, keeps the engine's temporaries at a few hundred MB
+SLAB_SIZE = 1 << 21
+
+
+class SweepResult:
+    """N-dimensional results, one axis per swept parameter in the order given"""
+
+    def __init__(self, axes, results):
+        self.axes = axes
+        self.results = results
+
+    @property
+    def names(self):
+        return list(self.axes)
+
+    @property
+    def shape(self):
+        return tuple(len(values) for values in self.axes.values())
+
+    def __getitem__(self, output):
+        return self.results[output]
+
+    def point(self, output='true_wage', **where):
+        """Value at the grid point nearest to the given parameter values"""
+        where = {resolve_parameter(name): value for name, value in where.items()}
+        index = []
+        for name, values in self.axes.items():
+            if name not in where:
+                raise KeyError(f"Missing value for axis '{name}'")
+            target = where[name]
+            if values.dtype.kind in 'US':
+                index.append(int(np.flatnonzero(values == target)[0]))
+            else:
+                index.append(int(np.abs(values - target).argmin()))
+        return self.results[output][tuple(index)]
+
+
+def resolve_parameter(name):
+    name = PARAMETER_ALIASES.get(name, name)
+    if name not in SWEEPABLE:
+        raise ValueError(f"Can't sweep '{name}', expected one of {', '.join(SWEEPABLE)}")
+    return name
+
+
+def sweep(base=None, outputs=('true_wage',), **axes):
+    """Evaluate outputs over every combination of the given parameter values
+
+    base is the WageInputs every other parameter comes from. Each keyword is
+    a parameter name and a sequence of values, e.g.
+
+        sweep(gas_price=np.linspace(3, 6, 31), work_days=[3, 4, 5])
+
+    gives a SweepResult whose ['true_wage'] has shape (31, 3).
+    """
+    base = normalize_inputs(base or WageInputs())
+    if not axes:
+        raise ValueError("Give at least one parameter to sweep")
+
+    grid = {}
+    for name, values in axes.items():
+        resolved = resolve_parameter(name)
+        if resolved in grid:
+            raise ValueError(f"'{name}' is swept twice")
+        values = np.asarray(values)
+        if values.ndim != 1 or not len(values):
+            raise ValueError(f"Values for '{name}' must be a non-empty 1-d sequence")
+        grid[resolved] = values
+
+    shape = tuple(len(values) for values in grid.values())
+    results = {output: np.empty(shape) for output in outputs}
+
+    # split the first axis into slabs so huge grids don't need every temporary at full size
+    names = list(grid)
+    rest = int(np.prod(shape[1:], dtype=np.int64))
+    step = max(1, SLAB_SIZE // max(rest, 1))
+    for start in range(0, shape[0], step):
+        stop = min(start + step, shape[0])
+        inputs = base.as_dict()
+        for axis, name in enumerate(names):
+            values = grid[name][start:stop] if axis == 0 else grid[name]
+            view = [1] * len(shape)
+            view[axis] = -1
+            inputs[name] = values.reshape(view)
+        slab = calculate_batch(outputs=outputs, **inputs)
+        for output in outputs:
+            results[output][start:stop] = slab[output]
+
+    return SweepResult(grid, results)
@@ -0,0 +1,264 @@
+"""Vectorized input checks, the same limits the command line prompts enforce one value at a time
+
+    report = ValidationReport()
+    valid = validate_columns(columns, first_row, report)   # one bool per row
+    columns = {name: column[valid] for name, column in columns.items()}
+    print(report)                                          # what was left out, with row numbers
+
+Besides the per-field RULES, CHECKS look at several fields of a row at
+once, e.g. a commute plus working day longer than 24 hours.
+"""
+import csv
+from dataclasses import dataclass
+
+import numpy as np
+
+from wage_batch import encode_transport
+from wage_core import TRANSPORT_TYPES
+
+
+@dataclass(frozen=True)
+class Rule:
+    """validate_input() limits for one field
+
+    transport lists the transport types the field is asked for (None for
+    everyone), monthly_pass narrows public transport to one kind of fare.
+    Rows the field isn't asked for aren't checked.
+    """
+    field: str
+    min_value: float = None
+    max_value: float = None
+    allow_zero: bool = False
+    transport: tuple = None
+    monthly_pass: bool = None
+
+    def describe(self):
+        limits = []
+        if self.min_value is not None:
+            limits.append(f"at least {self.min_value:g}")
+        if self.max_value is not None:
+            limits.append(f"at most {self.max_value:g}")
+        if not self.allow_zero:
+            limits.append("not zero")
+        return f"{self.field} must be {', '.join(limits)}"
+
+
+# the prompts in truecost.py, keep the two in step
+RULES = (
+    Rule('paycheck', min_value=0.01),
+    Rule('daily_hours', min_value=0.1, max_value=24),
+    Rule('work_days', min_value=0.1, max_value=7),
+    Rule('commute_minutes', min_value=0, max_value=1440),
+    Rule('daily_miles', min_value=0, transport=('car', 'ev', 'biking', 'walking')),
+    Rule('gas_mileage', min_value=0.1, transport=('car',)),
+    Rule('gas_price', min_value=0.01, transport=('car',)),
+    Rule('ev_efficiency', min_value=0.1, transport=('ev',)),
+    Rule('electricity_price', min_value=0.01, transport=('ev',)),
+    Rule('daily_public_cost', min_value=0, transport=('public',), monthly_pass=False),
+    Rule('monthly_pass_cost', min_value=0, transport=('public',), monthly_pass=True),
+    Rule('walking_minutes', min_value=0, transport=('public',)),
+    Rule('daily_other_costs', min_value=0, allow_zero=True),
+)
+
+
+@dataclass(frozen=True)
+class Check:
+    """A limit spanning several fields, function(columns) is True where a row breaks it
+
+    Only run when the columns have every field it needs.
+    """
+    message: str
+    fields: tuple
+    function: object
+
+    def describe(self):
+        return self.message
+
+
+def _one_way_minutes(columns):
+    # walking to/from stations only counts for public transport
+    minutes = np.asarray(columns['commute_minutes'], dtype=np.float64)
+    public = encode_transport(columns['transport_type']) == TRANSPORT_TYPES.index('public')
+    return minutes + np.where(public, np.asarray(columns['walking_minutes'], dtype=np.float64), 0)
+
+
+def _day_too_long(columns):
+    return np.asarray(columns['daily_hours'], dtype=np.float64) + _one_way_minutes(columns) * 2 / 60 > 24
+
+
+def _too_fast(columns):
+    minutes = np.asarray(columns['commute_minutes'], dtype=np.float64)
+    limits = np.array([MAX_SPEEDS.get(name, np.inf) for name in TRANSPORT_TYPES])
+    limit = limits[encode_transport(columns['transport_type'])]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mph = np.asarray(columns['daily_miles'], dtype=np.float64) / (minutes / 60)
+    # no time given says nothing about speed
+    return (minutes > 0) & (mph > limit)
+
+
+# one-way miles per hour nobody commutes faster than
+MAX_SPEEDS = {'car': 120, 'ev': 120, 'biking': 40, 'walking': 10}
+
+CHECKS = (
+    Check("one-way commute (walking included) must be at most 24h", ('commute_minutes', 'transport_type',
+                                                                    'walking_minutes'),
+          lambda columns: _one_way_minutes(columns) > 1440),
+    Check("work hours plus the round trip must fit in 24h", ('daily_hours', 'commute_minutes', 'transport_type',
+                                                           'walking_minutes'), _day_too_long),
+    Check("commute distance and time must give a possible speed", ('daily_miles', 'commute_minutes',
+                                                                  'transport_type'), _too_fast),
+)
+
+# row numbers kept per problem, the rest are only counted
+MAX_ROWS = 10
+
+
+def rule_mask(rule, values, transport=None, use_monthly_pass=None):
+    """True where values break the rule, transport is a column of codes"""
+    values = np.asarray(values, dtype=np.float64)
+    bad = np.isnan(values)
+    if rule.min_value is not None:
+        bad |= values < rule.min_value
+    if rule.max_value is not None:
+        bad |= values > rule.max_value
+    if not rule.allow_zero:
+        bad |= values == 0
+    if rule.transport is not None and transport is not None:
+        asked = np.isin(transport, [TRANSPORT_TYPES.index(name) for name in rule.transport])
+        if rule.monthly_pass is not None and use_monthly_pass is not None:
+            asked &= np.asarray(use_monthly_pass, dtype=bool) == rule.monthly_pass
+        bad &= asked
+    return bad
+
+
+def rule_masks(columns, rules=RULES):
+    """{field: rows breaking its rule} for the fields present in a column dict
+
+    Fields that depend on the transport type are only checked when the
+    columns say which transport each row uses.
+    """
+    transport = columns.get('transport_type')
+    if transport is not None:
+        transport = encode_transport(transport)
+    use_monthly_pass = columns.get('use_monthly_pass')
+    masks = {}
+    for rule in rules:
+        if rule.field not in columns:
+            continue
+        if rule.transport is not None and transport is None:
+            continue
+        masks[rule.field] = rule_mask(rule, columns[rule.field], transport, use_monthly_pass)
+    return masks
+
+
+def invalid_rows(columns, rules=RULES):
+    """One bool per row, True where any rule is broken"""
+    masks = list(rule_masks(columns, rules).values())
+    if not masks:
+        return np.zeros(0, dtype=bool)
+    return np.logical_or.reduce(np.broadcast_arrays(*masks))
+
+
+def problem_masks(columns, rules=RULES, checks=CHECKS):
+    """{description: rows breaking it} for every rule and check the columns can be tested against"""
+    by_field = {rule.field: rule for rule in rules}
+    masks = {by_field[field].describe(): mask for field, mask in rule_masks(columns, rules).items()}
+    for check in checks:
+        if all(field in columns for field in check.fields):
+            masks[check.describe()] = check.function(columns)
+    return masks
+
+
+def check_columns(columns, first_row=1, rules=RULES, checks=CHECKS):
+    """Raise ValueError with the first bad row (numbered from first_row) and how many rows break each rule"""
+    problems = []
+    first = None
+    for problem, mask in problem_masks(columns, rules, checks).items():
+        bad = np.flatnonzero(mask)
+        if len(bad):
+            problems.append(f"{problem} ({len(bad):,} row{'s' if len(bad) > 1 else ''})")
+            first = bad[0] if first is None else min(first, bad[0])
+    if problems:
+        raise ValueError(f"Bad input from row {first + first_row}: " + "; ".join(problems))
+
+
+def validate_columns(columns, first_row=1, report=None, rules=RULES, checks=CHECKS):
+    """One bool per row, True where every rule and check passes
+
+    Bad rows go into report (a ValidationReport) numbered from first_row,
+    or by an array of row numbers when the rows aren't consecutive.
+    """
+    rows = max((len(np.atleast_1d(column)) for column in columns.values()), default=0)
+    masks = problem_masks(columns, rules, checks)
+    bad = np.zeros(rows, dtype=bool)
+    for mask in masks.values():
+        bad |= mask
+    if report is not None:
+        invalid = int(bad.sum())
+        numbers = first_row + np.arange(rows) if np.ndim(first_row) == 0 else np.asarray(first_row)
+        report.add({problem: numbers[mask] for problem, mask in masks.items() if invalid and mask.any()},
+                   checked=rows, invalid=invalid)
+    return ~bad
+
+
+def _ranges(rows):
+    """'3-5, 9' for rows 3, 4, 5 and 9"""
+    parts = []
+    for row in rows:
+        if parts and row == parts[-1][1] + 1:
+            parts[-1][1] = row
+        else:
+            parts.append([row, row])
+    return ", ".join(f"{start}-{stop}" if stop > start else f"{start}" for start, stop in parts)
+
+
+class ValidationReport:
+    """Rows left out of a run, counted per problem with the first few row numbers
+
+    max_rows=None keeps every row number (for reports merged elsewhere).
+    A stream gets a CSV line (row, problem) for every bad row as it is found.
+    """
+
+    def __init__(self, max_rows=MAX_ROWS, stream=None):
+        self.max_rows = max_rows
+        self.checked = 0
+        self.invalid = 0
+        self.counts = {}
+        self.rows = {}
+        self.writer = None
+        if stream is not None:
+            self.writer = csv.writer(stream)
+            self.writer.writerow(['row', 'problem'])
+
+    def add(self, problems, checked=0, invalid=0, counts=None):
+        """Record {problem: row numbers} for a chunk of checked rows, invalid of which were bad"""
+        self.checked += checked
+        self.invalid += invalid
+        lines = []
+        for problem, rows in problems.items():
+            kept = self.rows.setdefault(problem, [])
+            room = len(rows) if self.max_rows is None else max(self.max_rows - len(kept), 0)
+            kept.extend(int(row) for row in rows[:room])
+            self.counts[problem] = self.counts.get(problem, 0) + (counts or {}).get(problem, len(rows))
+            if self.writer is not None:
+                lines.extend((int(row), problem) for row in rows)
+        if lines:
+            self.writer.writerows(sorted(lines))
+
+    def merge(self, other):
+        """Add a report from another chunk or process"""
+        self.add(other.rows, other.checked, other.invalid, other.counts)
+        return self
+
+    def as_dict(self):
+        return {'checked': self.checked, 'invalid': self.invalid,
+                'problems': {problem: {'count': count, 'rows': self.rows[problem]}
+                             for problem, count in self.counts.items()}}
+
+    def __str__(self):
+        lines = [f"{self.invalid:,} of {self.checked:,} rows left out"]
+        for problem, count in sorted(self.counts.items(), key=lambda item: -item[1]):
+            rows = self.rows[problem]
+            more = ", ..." if count > len(rows) else ""
+            lines.append(f"  {problem}: {count:,} row{'s' if count > 1 else ''} ({_ranges(rows)}{more})")
+        return "\n".join(lines)